@@ -0,0 +1,151 @@
+import json
+import os
+import sqlite3
+import threading
+import numpy as np
+from .instrumentation import stage
+
+DEFAULT_DB_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'database', 'master_cards_final.db'))
+
+
+class CardRecord:
+    """One card's T&Cs, typed once at load time. Multipliers are already a dict."""
+    __slots__ = (
+        'id', 'bank_name', 'card_name', 'display_name',
+        'joining_fee', 'renewal_fee', 'waiver_spend_limit',
+        'spends_per_reward_unit', 'unified_reward_value_inr',
+        'multipliers', 'terms_parsed', 'valid', 'details'
+    )
+
+    def __init__(self, row):
+        self.id = row.get('id')
+        self.bank_name = row.get('bank_name')
+        self.card_name = row.get('card_name')
+        self.display_name = f"{self.bank_name} {self.card_name}"
+        self.joining_fee = _to_float(row.get('joining_fee'))
+        self.renewal_fee = _to_float(row.get('renewal_fee'))
+        self.waiver_spend_limit = _to_float(row.get('waiver_spend_limit'))
+        self.spends_per_reward_unit = _to_float(row.get('spends_per_reward_unit'))
+        self.unified_reward_value_inr = _to_float(row.get('unified_reward_value_inr'))
+        # Every other column (perks, benefits, network...) stays as plain text
+        self.details = row
+
+        # Same failure rule as calculate_reward_inr: broken T&Cs -> card earns 0.0
+        # terms_parsed only says multipliers_json was readable (the chat's ROI ranking skips cards where it wasn't)
+        try:
+            self.multipliers = {k: float(v) for k, v in json.loads(row.get('multipliers_json')).items()}
+            self.terms_parsed = True
+            self.valid = self.spends_per_reward_unit > 0
+        except Exception:
+            self.multipliers = {}
+            self.terms_parsed = False
+            self.valid = False
+
+    def __repr__(self):
+        return f"CardRecord({self.display_name!r})"
+
+
+def _to_float(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return float('nan')
+
+
+class CardCatalog:
+    """
+    Immutable in-memory snapshot of the credit_cards table.
+    Loaded ONCE into typed records + NumPy arrays and never modified afterwards,
+    so a reader holding a catalog always sees records, arrays and names from the
+    same load. has_changed() is a cheap 'did the DB change?' check (file stat +
+    PRAGMA data_version); get_card_catalog() then builds a NEW snapshot and swaps
+    it in. `version` is one higher than the snapshot it replaced, so downstream
+    indexes know to rebuild.
+    """
+
+    def __init__(self, db_path=DEFAULT_DB_PATH, version=1):
+        self.db_path = db_path
+        self.version = version
+        self._frame = None
+        self._frame_lock = threading.Lock()
+
+        with stage('card_catalog_reload') as record:
+            if not os.path.exists(db_path):
+                # sqlite3.connect would silently create an empty DB file here
+                raise FileNotFoundError(f"Card database not found: {db_path}")
+            # Kept open only for change detection (data_version is per connection)
+            self._conn = sqlite3.connect(db_path, check_same_thread=False)
+
+            cursor = self._conn.execute("SELECT * FROM credit_cards")
+            # The DataFrame view is built on first use - the chat path never needs pandas
+            self.columns = [d[0] for d in cursor.description]
+            self._rows = cursor.fetchall()
+            self.records = [CardRecord(dict(zip(self.columns, row))) for row in self._rows]
+
+            # Compact numeric columns for vectorized math
+            self.spend_units = np.array([r.spends_per_reward_unit for r in self.records], dtype=float)
+            self.inr_values = np.array([r.unified_reward_value_inr for r in self.records], dtype=float)
+            self.joining_fees = np.array([r.joining_fee for r in self.records], dtype=float)
+            self.renewal_fees = np.array([r.renewal_fee for r in self.records], dtype=float)
+            self.waiver_limits = np.array([r.waiver_spend_limit for r in self.records], dtype=float)
+            self.valid = np.array([r.valid for r in self.records], dtype=bool)
+            self.display_names = [r.display_name for r in self.records]
+
+            self._fingerprint = self._current_fingerprint()
+            record.rows_out = len(self.records)
+
+    # --- Change detection ---
+    def _file_stat(self):
+        st = os.stat(self.db_path)
+        return (st.st_ino, st.st_mtime_ns, st.st_size)
+
+    def _current_fingerprint(self):
+        # inode catches a replaced file, data_version catches commits from any other connection
+        return (self._file_stat(), self._conn.execute('PRAGMA data_version').fetchone()[0])
+
+    def has_changed(self):
+        """True once the DB differs from what this snapshot was loaded from."""
+        try:
+            return self._current_fingerprint() != self._fingerprint
+        except (OSError, sqlite3.Error):
+            return True
+
+    def reloaded(self):
+        """A fresh snapshot of the same DB (version + 1). This one is left untouched."""
+        return CardCatalog(self.db_path, self.version + 1)
+
+    @property
+    def frame(self):
+        """The raw credit_cards table as a DataFrame (built lazily, once per snapshot)."""
+        with self._frame_lock:
+            if self._frame is None:
+                import pandas as pd
+                self._frame = pd.DataFrame.from_records(self._rows, columns=self.columns or None)
+            return self._frame
+
+    def __len__(self):
+        return len(self.records)
+
+    def __iter__(self):
+        return iter(self.records)
+
+
+# One shared snapshot per process: the CLI, the Streamlit app and batch jobs all use this
+_shared_catalogs = {}
+_shared_lock = threading.Lock()
+
+
+def get_card_catalog(db_path=DEFAULT_DB_PATH):
+    """
+    Returns the process-wide CardCatalog for db_path. When the DB changed, a new
+    snapshot is loaded and published with one dict assignment; callers still
+    holding the old one keep a consistent (just older) view.
+    """
+    db_path = os.path.abspath(db_path)
+    with _shared_lock:
+        catalog = _shared_catalogs.get(db_path)
+        if catalog is None:
+            catalog = _shared_catalogs[db_path] = CardCatalog(db_path)
+        elif catalog.has_changed():
+            catalog = _shared_catalogs[db_path] = catalog.reloaded()
+        return catalog
@@ -0,0 +1,310 @@
+"""
+Bulk loading + indexed SQL queries for the credit_cards catalog.
+
+    python -m ai_engine.catalog_db cards.csv more_cards.json          # from backend/
+    python -m ai_engine.catalog_db cards.csv --db /tmp/catalog.db
+
+Card files (CSV, JSON list / {"cards": [...]}, or JSONL) use the credit_cards column
+names; multipliers go in `multipliers_json` (JSON text) or `multipliers` (a JSON object).
+Every file of one load is validated first, then written in ONE transaction with
+batched executemany upserts keyed on (bank_name, card_name): a card that is
+already there keeps its id and gets updated, nothing is ever dropped.
+
+multipliers_json stays the source of truth for the optimizer (CardCatalog parses
+it); each card's multipliers are also normalized into card_multipliers, one row
+per (card, category-or-merchant key) plus a '*' base-rate row, with the card's
+reward rate precomputed. "Best card for dining" / "lowest joining fee" / "waived
+under Rs 2L" then run as index range scans instead of Python loops over SELECT *.
+"""
+import argparse
+import csv
+import json
+import os
+import sqlite3
+import threading
+
+from .card_catalog import DEFAULT_DB_PATH
+from .instrumentation import get_logger, stage, configure_logging
+
+log = get_logger('catalog_db')
+
+# The credit_cards table, column by column (init_db and every loader go through this)
+CARD_COLUMN_TYPES = {
+    'bank_name': 'TEXT', 'card_name': 'TEXT',
+    # 1. Network & category
+    'network': 'TEXT', 'primary_category': 'TEXT',
+    # 2. Fees
+    'joining_fee': 'REAL', 'renewal_fee': 'REAL', 'waiver_spend_limit': 'REAL',
+    # 3. Rewards mechanism: spends per point / mile / coin, its INR value, expiry of rewards
+    'reward_type': 'TEXT', 'spends_per_reward_unit': 'REAL', 'multipliers_json': 'TEXT',
+    'unified_reward_value_inr': 'REAL', 'reward_expiry_months': 'TEXT',
+    # 4. Perks
+    'lounge_domestic': 'TEXT', 'lounge_international': 'TEXT', 'perk_movies': 'TEXT', 'perk_golf': 'TEXT',
+    'perk_others': 'TEXT',
+    # 5. Other benefits
+    'benefit_welcome': 'TEXT', 'benefit_milestones': 'TEXT', 'benefit_special_tieups': 'TEXT',
+}
+CARD_COLUMNS = list(CARD_COLUMN_TYPES)
+NUMERIC_COLUMNS = {c for c, sql_type in CARD_COLUMN_TYPES.items() if sql_type == 'REAL'}
+BASE_KEY = '*'   # card_multipliers row holding the card's base (1x) rate
+FEE_COLUMNS = {'joining': 'joining_fee', 'renewal': 'renewal_fee'}
+
+SCHEMA = f'''
+    CREATE TABLE IF NOT EXISTS credit_cards (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        {', '.join(f'{column} {sql_type}' for column, sql_type in CARD_COLUMN_TYPES.items())}
+    );
+    -- Upsert key; its leading column also serves every per-bank lookup
+    CREATE UNIQUE INDEX IF NOT EXISTS ux_credit_cards_bank_card ON credit_cards (bank_name, card_name);
+    CREATE INDEX IF NOT EXISTS idx_credit_cards_joining_fee ON credit_cards (joining_fee);
+    CREATE INDEX IF NOT EXISTS idx_credit_cards_renewal_fee ON credit_cards (renewal_fee);
+    CREATE INDEX IF NOT EXISTS idx_credit_cards_waiver_limit ON credit_cards (waiver_spend_limit);
+
+    -- rate = multiplier * unified_reward_value_inr / spends_per_reward_unit (INR back per INR spent),
+    -- NULL for cards with broken reward terms
+    CREATE TABLE IF NOT EXISTS card_multipliers (
+        card_id INTEGER NOT NULL REFERENCES credit_cards (id),
+        key TEXT NOT NULL,
+        multiplier REAL NOT NULL,
+        rate REAL,
+        PRIMARY KEY (card_id, key)
+    ) WITHOUT ROWID;
+    -- Best card for a key = the first rows of this index
+    CREATE INDEX IF NOT EXISTS idx_card_multipliers_key_rate ON card_multipliers (key, rate DESC, card_id);
+'''
+
+
+# --- Reading card files ---
+def read_card_file(path):
+    """CSV / JSON / JSONL card file -> list of dicts (values as written in the file)."""
+    lower = path.lower()
+    with open(path, newline='' if lower.endswith('.csv') else None, encoding='utf-8-sig') as f:
+        if lower.endswith('.csv'):
+            return list(csv.DictReader(f))
+        if lower.endswith('.jsonl'):
+            return [json.loads(line) for line in f if line.strip()]
+        if lower.endswith('.json'):
+            data = json.load(f)
+            return data['cards'] if isinstance(data, dict) else data
+    raise ValueError(f"Unsupported card file '{path}'. Use .csv, .json or .jsonl.")
+
+
+def _number(value):
+    if value is None or (isinstance(value, str) and not value.strip()):
+        return None
+    return float(str(value).replace(',', '')) if isinstance(value, str) else float(value)
+
+
+def card_row(entry):
+    """One card dict -> (row tuple in CARD_COLUMNS order, {key: multiplier}). ValueError if unusable."""
+    bank, card = (str(entry.get(c) or '').strip() for c in ('bank_name', 'card_name'))
+    if not bank or not card:
+        raise ValueError("bank_name and card_name are required")
+
+    multipliers = entry.get('multipliers_json', entry.get('multipliers'))
+    if isinstance(multipliers, str):
+        multipliers = json.loads(multipliers) if multipliers.strip() else {}
+    if not isinstance(multipliers, dict):
+        raise ValueError(f"multipliers must be a JSON object, got {type(multipliers).__name__}")
+    # Same key normalization the multiplier index applies when it reads the JSON
+    multipliers = {str(k).lower().strip(): float(v) for k, v in multipliers.items()}
+
+    row = []
+    for column in CARD_COLUMNS:
+        if column in ('bank_name', 'card_name'):
+            row.append(bank if column == 'bank_name' else card)
+        elif column == 'multipliers_json':
+            row.append(json.dumps(multipliers))
+        elif column in NUMERIC_COLUMNS:
+            row.append(_number(entry.get(column)))
+        else:
+            value = entry.get(column)
+            row.append(None if value is None else str(value))
+    return tuple(row), multipliers
+
+
+def multiplier_rows(card_id, multipliers, spend_unit, inr_value):
+    """card_multipliers rows for one card: its keys + the '*' base rate."""
+    if not (spend_unit and spend_unit > 0 and inr_value is not None):
+        return [(card_id, BASE_KEY, 1.0, None)] + [(card_id, key, value, None) for key, value in multipliers.items()]
+    # (multiplier / unit) * value: the chat ROI engine's float order, so ties rank the same
+    return [(card_id, key, value, value / spend_unit * inr_value)
+            for key, value in [(BASE_KEY, 1.0), *multipliers.items()]]
+
+
+class CatalogDB:
+    """
+    Write + query side of the card catalog DB. Readers that need every card's
+    parsed terms (the optimizer, the chat indexes) keep using CardCatalog;
+    this answers the questions SQLite can answer from its own indexes.
+    """
+
+    def __init__(self, db_path=DEFAULT_DB_PATH):
+        self.db_path = os.path.abspath(db_path)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False, timeout=30)
+        self.ensure_schema()
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def ensure_schema(self):
+        """Creates / migrates tables + indexes, and backfills card_multipliers for cards that predate it."""
+        with self._lock, self._conn:
+            try:
+                self._conn.executescript(SCHEMA)
+            except sqlite3.IntegrityError as e:
+                raise ValueError(f"{self.db_path}: duplicate (bank_name, card_name) rows - dedupe credit_cards "
+                                 f"before loading ({e})") from e
+            missing = self._conn.execute('''
+                SELECT id, multipliers_json, spends_per_reward_unit, unified_reward_value_inr FROM credit_cards
+                WHERE NOT EXISTS (SELECT 1 FROM card_multipliers m WHERE m.card_id = credit_cards.id)
+            ''').fetchall()
+            rows = []
+            for card_id, multipliers_json, unit, value in missing:
+                try:
+                    multipliers = {str(k).lower().strip(): float(v) for k, v in json.loads(multipliers_json).items()}
+                except (TypeError, ValueError, AttributeError):
+                    multipliers, unit = {}, None  # broken T&Cs earn nothing, same as CardRecord
+                rows += multiplier_rows(card_id, multipliers, unit, value)
+            self._conn.executemany("INSERT INTO card_multipliers VALUES (?, ?, ?, ?)", rows)
+        if missing:
+            log.info(f"🗂️ Normalized multipliers for {len(missing)} existing cards")
+
+    # --- Writes ---
+    def load_cards(self, entries, source='cards'):
+        """
+        Upserts card dicts in one transaction. Every entry is validated before anything
+        is written, so a bad row leaves the DB untouched. Returns load stats.
+        """
+        # 1. Validate everything first (a later duplicate of the same card wins)
+        cards, errors = {}, []
+        for i, entry in enumerate(entries, 1):
+            try:
+                row, multipliers = card_row(entry)
+            except (TypeError, ValueError, AttributeError) as e:
+                errors.append(f"{source} row {i}: {e}")
+                continue
+            cards[(row[0], row[1])] = (row, multipliers)
+        if errors:
+            raise ValueError(f"{len(errors)} invalid card rows, nothing loaded:\n  " + "\n  ".join(errors[:10]))
+
+        placeholders = ', '.join('?' * len(CARD_COLUMNS))
+        updates = ', '.join(f"{c} = excluded.{c}" for c in CARD_COLUMNS[2:])
+        unit_at, value_at = CARD_COLUMNS.index('spends_per_reward_unit'), CARD_COLUMNS.index('unified_reward_value_inr')
+        with stage('catalog_bulk_load', rows_in=len(cards)) as record, self._lock, self._conn:
+            existing = set(self._conn.execute("SELECT bank_name, card_name FROM credit_cards").fetchall())
+
+            # 2. Batched upsert: known cards keep their id
+            self._conn.executemany(f'''
+                INSERT INTO credit_cards ({', '.join(CARD_COLUMNS)}) VALUES ({placeholders})
+                ON CONFLICT (bank_name, card_name) DO UPDATE SET {updates}
+            ''', [row for row, _ in cards.values()])
+
+            # 3. Re-normalize the touched cards' multipliers
+            ids = dict(((bank, card), card_id) for card_id, bank, card in
+                       self._conn.execute("SELECT id, bank_name, card_name FROM credit_cards"))
+            touched = [(ids[key],) for key in cards]
+            self._conn.executemany("DELETE FROM card_multipliers WHERE card_id = ?", touched)
+            rows = [r for key, (row, multipliers) in cards.items()
+                    for r in multiplier_rows(ids[key], multipliers, row[unit_at], row[value_at])]
+            self._conn.executemany("INSERT INTO card_multipliers VALUES (?, ?, ?, ?)", rows)
+
+            stats = {'cards': len(cards), 'inserted': len(cards.keys() - existing),
+                     'updated': len(cards.keys() & existing), 'multiplier_rows': len(rows)}
+            record.count(**stats)
+            record.rows_out = len(cards)
+        log.info(f"✅ Loaded {stats['cards']} cards from {source}: {stats['inserted']} new, {stats['updated']} updated")
+        return stats
+
+    def load_files(self, paths):
+        """Every file validated, then all of them written in one transaction."""
+        entries = []
+        for path in paths:
+            entries.extend(read_card_file(path))
+        return self.load_cards(entries, source=', '.join(os.path.basename(p) for p in paths))
+
+    # --- Indexed reads ---
+    def _query(self, sql, params):
+        with self._lock:
+            cursor = self._conn.execute(sql, params)
+            columns = [c[0] for c in cursor.description]
+            return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+    def best_cards_for_category(self, key, n=5):
+        """
+        Top-n cards by ROI % for one multiplier key ('dining', 'swiggy', ...): the key's
+        multiplier where a card lists it, else the card's base rate. `key` is matched exactly
+        ('dining', not 'food'); the chat maps words to keys itself and ranks from its own
+        in-memory indexes. Both halves stop after n index entries.
+        """
+        key = str(key).lower().strip()
+        return self._query('''
+            SELECT c.bank_name, c.card_name, best.key, best.multiplier, ROUND(best.rate * 100, 4) AS roi_pct
+            FROM (
+                SELECT * FROM (SELECT card_id, key, multiplier, rate FROM card_multipliers
+                               WHERE key = :key AND rate IS NOT NULL ORDER BY rate DESC, card_id LIMIT :n)
+                UNION ALL
+                SELECT * FROM (SELECT card_id, key, multiplier, rate FROM card_multipliers b
+                               WHERE key = :base AND rate IS NOT NULL
+                                 AND NOT EXISTS (SELECT 1 FROM card_multipliers x WHERE x.card_id = b.card_id AND x.key = :key)
+                               ORDER BY rate DESC, card_id LIMIT :n)
+            ) best JOIN credit_cards c ON c.id = best.card_id
+            ORDER BY best.rate DESC, best.card_id
+            LIMIT :n
+        ''', {'key': key, 'base': BASE_KEY, 'n': int(n)})
+
+    def lowest_fee_cards(self, fee='joining', n=5):
+        """Cheapest cards by joining or renewal fee (ties keep catalog order)."""
+        column = FEE_COLUMNS[fee]
+        return self._query(f'''
+            SELECT bank_name, card_name, {column} AS fee, waiver_spend_limit FROM credit_cards
+            WHERE {column} IS NOT NULL ORDER BY {column}, id LIMIT ?
+        ''', (int(n),))
+
+    def waiver_cards(self, max_spend=None, n=None):
+        """Cards with a spend-based fee waiver, lowest waiver limit first (optionally capped at max_spend)."""
+        return self._query('''
+            SELECT bank_name, card_name, waiver_spend_limit, renewal_fee FROM credit_cards
+            WHERE waiver_spend_limit > 0 AND waiver_spend_limit <= ?
+            ORDER BY waiver_spend_limit, id LIMIT ?
+        ''', (float('inf') if max_spend is None else float(max_spend), -1 if n is None else int(n)))
+
+    def cards_by_bank(self, bank_name):
+        return self._query("SELECT * FROM credit_cards WHERE bank_name = ? ORDER BY card_name", (bank_name,))
+
+
+_shared_dbs = {}
+_shared_lock = threading.Lock()
+
+
+def get_catalog_db(db_path=DEFAULT_DB_PATH):
+    """One CatalogDB (connection) per DB file per process."""
+    db_path = os.path.abspath(db_path)
+    with _shared_lock:
+        db = _shared_dbs.get(db_path)
+        if db is None:
+            db = _shared_dbs[db_path] = CatalogDB(db_path)
+        return db
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk-load cards into the catalog DB (upsert, one transaction).")
+    parser.add_argument('files', nargs='+', help=".csv / .json / .jsonl card files")
+    parser.add_argument('--db', default=DEFAULT_DB_PATH, help="card catalog SQLite file")
+    args = parser.parse_args()
+    configure_logging()
+
+    try:
+        stats = CatalogDB(args.db).load_files(args.files)
+    except ValueError as e:
+        log.error(f"❌ {e}")
+        raise SystemExit(1)
+    print(json.dumps(stats))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,66 +1,169 @@
+import numpy as np
 import pandas as pd
-import sys
 import os
 import re
+import json
+import hashlib
+
+from parsers.excel_parser import parse_user_transactions, iter_user_transactions, DEFAULT_CHUNK_SIZE
+from .merchant_cache import MerchantCategoryCache, DEFAULT_CACHE_DB, normalize_merchant, normalize_merchants
+from .instrumentation import get_logger, stage, configure_logging
+
+log = get_logger('categorizer')
+
+# Ordered by priority: the FIRST category with any keyword hit wins
+CATEGORY_KEYWORDS = {
+    "Travel": ["IRCTC", "MAKE MY TRIP", "MMT", "UBER", "OLA", "INDIGO", "FLIGHT", "FASTAG", "RAPIDO"],
+    "Dining": ["ZOMATO", "SWIGGY", "MCDONALDS", "KFC", "STARBUCKS", "CAFE", "RESTAURANT", "DOMINOS", "GOLA", "SUNBURN"],
+    "Groceries": ["BLINKIT", "ZEPTO", "INSTAMART", "BIGBASKET", "DMART", "RELIANCE SMART", "GROFERS"],
+    "Shopping": ["AMAZON", "FLIPKART", "MYNTRA", "AJIO", "ZARA", "SHOPPERS STOP", "CHUMBAK", "ZETWERK"],
+    "Utilities": ["BESCOM", "AIRTEL", "JIO", "RECHARGE", "BILL", "ELECTRICITY", "BWSSB", "CRED"],
+    "Health": ["PHARMACY", "APOLLO", "HOSPITAL", "CLINIC", "PHYSIO", "1MG", "PRACTO"],
+    "Fuel": ["PETROL", "HPCL", "BPCL", "INDIAN OIL", "SHELL", "FUEL"],
+    "Investment": ["MUTUAL FUND", "SIP", "ZERODHA", "GROWW", "PPFAS", "HDFCMF", "BSE", "NSE"]
+}
+DEFAULT_CATEGORY = "Retail/Others"
+
+# Bumps automatically whenever the keyword table changes (stale cache entries are ignored)
+CATEGORIZER_VERSION = hashlib.sha1(json.dumps(CATEGORY_KEYWORDS).encode()).hexdigest()[:12]
+
+
+def _group_name(category):
+    # Regex group names must be identifiers ("Retail/Others" style names aren't)
+    return re.sub(r'\W', '_', category)
+
+
+def _compile_category_automaton(category_keywords):
+    """
+    Compiles ALL keywords into ONE regex. Each category is a lookahead branch
+    with its own named group, tried in priority order from the start of the
+    string - so the first category with a whole-word hit anywhere wins,
+    exactly like the old nested loop, but in a single C-level scan.
+    """
+    branches = []
+    group_to_category = {}
+    for category, keywords in category_keywords.items():
+        group = _group_name(category)
+        group_to_category[group] = category
+        alternation = "|".join(re.escape(k) for k in keywords)
+        branches.append(rf"(?=.*?\b(?P<{group}>{alternation})\b)")
+    return re.compile("^(?:" + "|".join(branches) + ")", re.DOTALL), group_to_category
+
+
+CATEGORY_PATTERN, GROUP_TO_CATEGORY = _compile_category_automaton(CATEGORY_KEYWORDS)
+
+# Merchant key -> category memo. In-memory LRU by default;
+# call enable_persistent_cache() to also keep it in SQLite across runs.
+MERCHANT_CACHE = MerchantCategoryCache(CATEGORIZER_VERSION)
+
+
+def enable_persistent_cache(db_path=DEFAULT_CACHE_DB):
+    MERCHANT_CACHE.attach_db(db_path)
+
+
+def get_cache_stats():
+    return MERCHANT_CACHE.stats()
+
+
+def _categorize_clean(clean_desc):
+    # The Senior Fix: \b ensures we only match whole words!
+    match = CATEGORY_PATTERN.match(clean_desc)
+    if match:
+        return GROUP_TO_CATEGORY[match.lastgroup]
+    return DEFAULT_CATEGORY
 
-# Sys path hack so we can import our parser from another folder
-sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
-from parsers.excel_parser import parse_user_transactions
 
 def categorize_transaction(description):
     """
     Advanced Local NLP Engine with Word Boundary Regex.
     Prevents 'GOLA' from being categorized as 'OLA' (Travel).
+    Repeat merchants are answered from the merchant cache.
     """
-    desc = str(description).upper()
-
-    categories = {
-        "Travel": ["IRCTC", "MAKE MY TRIP", "MMT", "UBER", "OLA", "INDIGO", "FLIGHT", "FASTAG", "RAPIDO"],
-        "Dining": ["ZOMATO", "SWIGGY", "MCDONALDS", "KFC", "STARBUCKS", "CAFE", "RESTAURANT", "DOMINOS", "GOLA", "SUNBURN"],
-        "Groceries": ["BLINKIT", "ZEPTO", "INSTAMART", "BIGBASKET", "DMART", "RELIANCE SMART", "GROFERS"],
-        "Shopping": ["AMAZON", "FLIPKART", "MYNTRA", "AJIO", "ZARA", "SHOPPERS STOP", "CHUMBAK", "ZETWERK"],
-        "Utilities": ["BESCOM", "AIRTEL", "JIO", "RECHARGE", "BILL", "ELECTRICITY", "BWSSB", "CRED"],
-        "Health": ["PHARMACY", "APOLLO", "HOSPITAL", "CLINIC", "PHYSIO", "1MG", "PRACTO"],
-        "Fuel": ["PETROL", "HPCL", "BPCL", "INDIAN OIL", "SHELL", "FUEL"],
-        "Investment": ["MUTUAL FUND", "SIP", "ZERODHA", "GROWW", "PPFAS", "HDFCMF", "BSE", "NSE"]
-    }
-
-    for category, keywords in categories.items():
-        for keyword in keywords:
-            # The Senior Fix: \b ensures we only match whole words!
-            # \W+ matches non-word characters (like hyphens in UPI-OLA)
-            pattern = rf"\b{keyword}\b"
-            # We replace hyphens and dots with spaces so the regex boundary works perfectly on UPI notes
-            clean_desc = desc.replace("-", " ").replace(".", " ")
-            if re.search(pattern, clean_desc):
-                return category
-                
-    return "Retail/Others"
-
-
-def run_ai_categorization(file_path):
+    return MERCHANT_CACHE.get_or_compute(normalize_merchant(description), _categorize_clean)
+
+
+def _categorize_keys(keys):
+    """Runs the compiled regex over a batch of (already cleaned) merchant keys."""
+    hits = pd.Series(keys, dtype=object).str.extract(CATEGORY_PATTERN)
+
+    # Only one named group is set per row, and it's the winning category
+    matched = hits.notna()
+    labels = matched.idxmax(axis=1).map(GROUP_TO_CATEGORY)
+    return labels.where(matched.any(axis=1), DEFAULT_CATEGORY).tolist()
+
+
+def categorize_descriptions(descriptions):
+    """
+    Batch mode: categorizes a whole description column in one vectorized pass.
+    Descriptions collapse to merchant keys first; only keys the cache has
+    never seen go through the regex, then results broadcast back to every row.
+    """
+    descriptions = pd.Series(descriptions)
+    with stage('categorize_descriptions', rows_in=len(descriptions)) as record:
+        codes, uniques = pd.factorize(descriptions, use_na_sentinel=False)
+        if len(uniques) == 0:
+            record.rows_out = 0
+            return pd.Series([], index=descriptions.index, dtype=object)
+
+        # 1. Raw descriptions -> canonical merchant keys
+        key_codes, keys = pd.factorize(normalize_merchants(pd.Series(uniques, dtype=object)))
+        keys = list(keys)
+
+        # 2. Cache first, regex only for brand-new merchants
+        known = MERCHANT_CACHE.get_many(keys)
+        missing = [k for k in keys if k not in known]
+        if missing:
+            fresh = dict(zip(missing, _categorize_keys(missing)))
+            MERCHANT_CACHE.put_many(fresh)
+            known.update(fresh)
+        record.count(merchants=len(keys), merchant_cache_hits=len(keys) - len(missing),
+                     merchant_cache_misses=len(missing))
+
+        # 3. Broadcast back: key -> unique description -> every row
+        labels = np.array([known[k] for k in keys], dtype=object)
+        record.rows_out = len(descriptions)
+        return pd.Series(labels[key_codes][codes], index=descriptions.index)
+
+
+def run_ai_categorization(file_path, strict=False):
     """
     Takes the raw Excel file, parses it, and adds the smart categories.
+    strict=True lets the parser's read errors propagate (see parse_user_transactions).
     """
-    print("🧠 Starting Local NLP Engine...")
+    log.info("🧠 Starting Local NLP Engine...")
     
-    # 1. Get clean data from our parser
-    df = parse_user_transactions(file_path)
-    
-    if df is None or df.empty:
-        print("❌ No data to categorize.")
-        return None
+    with stage('run_ai_categorization') as record:
+        # 1. Get clean data from our parser
+        df = parse_user_transactions(file_path, strict=strict)
+        
+        if df is None or df.empty:
+            log.warning("❌ No data to categorize.")
+            record.rows_out = 0
+            return None
 
-    # 2. Apply our 'AI' Brain to every single row!
-    print("⏳ Categorizing 101 transactions... Please wait.")
-    df['category'] = df['description'].apply(categorize_transaction)
+        # 2. Apply our 'AI' Brain to every single row!
+        record.rows_in = record.rows_out = len(df)
+        log.info(f"⏳ Categorizing {len(df)} transactions... Please wait.")
+        df['category'] = categorize_descriptions(df['description'])
+        
+        log.info("✅ Categorization Complete!")
+        return df
+
+def iter_ai_categorization(file_path, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Streaming twin of run_ai_categorization: yields categorized chunks as the
+    parser reads them, so huge statements never sit in memory all at once.
+    """
+    log.info("🧠 Starting Local NLP Engine (streaming mode)...")
     
-    print("✅ Categorization Complete!")
-    return df
+    for chunk in iter_user_transactions(file_path, chunk_size=chunk_size):
+        chunk['category'] = categorize_descriptions(chunk['description'])
+        yield chunk
 
 if __name__ == "__main__":
     # Test path
-    test_file = "../../data_samples/transactions.xlsx"
+    test_file = os.path.join(os.path.dirname(__file__), '..', '..', 'data_samples', 'transactions.xlsx')
+    configure_logging()
     
     categorized_data = run_ai_categorization(test_file)
     
@@ -1,48 +1,57 @@
-import sqlite3
 import json
-import pandas as pd
-import sys
 import os
+import numpy as np
+import pandas as pd
+
+from .reward_engine import resolve_card_multiplier, build_reward_matrix, best_cards_for_transactions, encode_spend_classes, card_display_names, get_multiplier_index
+from .card_catalog import get_card_catalog
+from .compact import to_compact, transaction_amounts, card_codes
+from .intent_router import IntentRouter
+from .instrumentation import get_logger, instrumented, configure_logging
+
+log = get_logger('chat_agent')
 
-# Connecting our Categorizer
-sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
-from categorizer import run_ai_categorization
+SAMPLE_STATEMENT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', 'data_samples', 'transactions.xlsx'))
 
+# CLI intents, in priority order
+CLI_ROUTER = (IntentRouter()
+              .add_intent('savings', ['save', 'total', 'savings'])
+              .add_intent('top', ['top', 'show'])
+              .add_intent('wallet', ['wallet', 'portfolio', 'combo'])
+              .add_intent('dining', ['dining'])
+              .add_intent('logic', ['logic', 'how']))
+
+@instrumented('load_cards_from_db')
 def load_cards_from_db():
-    """Fetches ALL columns dynamically from our master database."""
+    """
+    Fetches ALL columns dynamically from our master database.
+    Served from the shared CardCatalog snapshot - the DB is only re-read when it changes.
+    """
     try:
-        current_dir = os.path.dirname(os.path.abspath(__file__))
-        db_path = os.path.join(current_dir, '..', 'database', 'master_cards_final.db')
-        
-        conn = sqlite3.connect(db_path)
-        # CHANGED TO SELECT *: Now we have golf, lounges, fees dynamically!
-        query = "SELECT * FROM credit_cards" 
-        df = pd.read_sql_query(query, conn)
-        conn.close()
-        return df
+        return get_card_catalog().frame.copy()
     except Exception as e:
-        print(f"❌ Database Error: {e}")
+        log.error(f"❌ Database Error: {e}")
         return None
 
-def calculate_reward_inr(amount, category, card):
+def calculate_reward_inr(amount, category, card, description=None):
     """
     The Core Math Engine: Calculates EXACT Rupee savings.
-    Equation: (Amount / Spend Unit) * Category Multiplier * Value of 1 Point in INR
+    Equation: (Amount / Spend Unit) * Multiplier * Value of 1 Point in INR
+    Multiplier precedence: merchant key (e.g. 'swiggy', needs the description) > category key > 1.0
     """
     try:
-        spends_unit = float(card['spends_per_reward_unit'])
-        inr_value = float(card['unified_reward_value_inr'])
-        multipliers = json.loads(card['multipliers_json'])
-        
-        # Match category (e.g., 'Dining' -> 'dining')
-        cat_key = str(category).lower().strip()
+        if hasattr(card, 'multipliers'):
+            # CardRecords from the CardCatalog are already parsed
+            spends_unit = card.spends_per_reward_unit
+            inr_value = card.unified_reward_value_inr
+            multipliers = card.multipliers
+        else:
+            spends_unit = float(card['spends_per_reward_unit'])
+            inr_value = float(card['unified_reward_value_inr'])
+            multipliers = json.loads(card['multipliers_json'])
         
-        # Default multiplier is 1.0 unless a special category matches
-        applicable_multiplier = 1.0
-        for key, val in multipliers.items():
-            if key in cat_key:
-                applicable_multiplier = float(val)
-                break
+        # Merchant first ('SWIGGY' -> 'swiggy'), then category ('Dining' -> 'dining'), else 1.0
+        applicable_multiplier = resolve_card_multiplier(multipliers, category, description)
                 
         # Math calculation
         if spends_unit > 0:
@@ -53,31 +62,156 @@ def calculate_reward_inr(amount, category, card):
     except:
         return 0.0
 
+def score_transactions(transactions_df, cards_df):
+    """
+    The optimizer core, shared by every output layout: (best card index, INR saved)
+    per transaction. The (category, merchant) x card reward matrix is built once
+    from the catalog, then one vectorized argmax picks the winner for ALL rows.
+    Takes working or compact frames.
+    """
+    # 1. (category, merchant) pairs -> small integer codes; merchant keys like 'swiggy' outrank categories
+    index = get_multiplier_index(cards_df)
+    merchants = index.merchants_of(transactions_df['description'])
+    codes, categories, merchant_labels = encode_spend_classes(transactions_df['category'], merchants)
+
+    # 2. Precompute every card's rate for every (category, merchant) pair we actually saw
+    matrix = build_reward_matrix(cards_df, categories, merchant_labels, index=index)
+
+    # 3. One NumPy pass: best card + exact INR saved per transaction
+    return best_cards_for_transactions(transaction_amounts(transactions_df), codes, matrix)
+
+@instrumented('optimize_spends', rows_in=lambda transactions_df, cards_df: 0 if transactions_df is None else len(transactions_df))
 def optimize_spends(transactions_df, cards_df):
-    """Finds the absolute best card for every single transaction."""
-    optimized_results = []
-    total_savings = 0.0
-    
-    for _, txn in transactions_df.iterrows():
-        best_card = "No Recommendation"
-        max_saving = -1.0
-        
-        for _, card in cards_df.iterrows():
-            saving = calculate_reward_inr(txn['amount'], txn['category'], card)
-            if saving > max_saving:
-                max_saving = saving
-                best_card = f"{card['bank_name']} {card['card_name']}"
-                
-        optimized_results.append({
-            "Description": str(txn['description'])[:30] + "...", # Trimmed for chat display
-            "Amount": txn['amount'],
-            "Category": txn['category'],
-            "Recommended_Card": best_card,
-            "Saved_INR": round(max_saving, 2)
-        })
-        total_savings += max_saving
-        
-    return pd.DataFrame(optimized_results), total_savings
+    """
+    Finds the absolute best card for every single transaction.
+    Returns the display-ready (frame, total) pair - see optimize_compact for bulk jobs.
+    """
+    columns = ["Description", "Amount", "Category", "Recommended_Card", "Saved_INR"]
+    if transactions_df is None or transactions_df.empty:
+        return pd.DataFrame(columns=columns), 0.0
+
+    best, saved = score_transactions(transactions_df, cards_df)
+    return format_optimized_spends(transactions_df, best, saved, cards_df)
+
+@instrumented('optimize_compact', rows_in=lambda transactions, cards_df: 0 if transactions is None else len(transactions))
+def optimize_compact(transactions, cards_df):
+    """
+    optimize_spends without the per-row display strings.
+    Returns (result, total_savings): result has the transactions' index, a 'card'
+    Categorical (int16 codes over the card names) and float 'saved_inr'.
+    Use render_optimized() for the rows you actually show.
+    """
+    if transactions is None or transactions.empty:
+        return pd.DataFrame({'card': card_codes([], []), 'saved_inr': np.array([], dtype=float)}), 0.0
+
+    best, saved = score_transactions(transactions, cards_df)
+    result = pd.DataFrame({'card': card_codes(best, card_display_names(cards_df)), 'saved_inr': saved},
+                          index=transactions.index)
+    return result, float(saved.cumsum()[-1])
+
+def render_optimized(transactions, result, rows=None):
+    """
+    Display strings for an optimize_compact result, in optimize_spends' layout.
+    `rows` (index labels) limits rendering to what's on screen.
+    """
+    if rows is not None:
+        transactions, result = transactions.loc[rows], result.loc[rows]
+    return pd.DataFrame({
+        "Description": transactions['description'].astype(str).str[:30].to_numpy() + "...",
+        "Amount": transaction_amounts(transactions),
+        "Category": transactions['category'].astype(object).to_numpy(),
+        "Recommended_Card": result['card'].astype(object).to_numpy(),
+        "Saved_INR": [round(x, 2) for x in result['saved_inr'].tolist()]
+    })
+
+def top_savings(result, n):
+    """Index labels of the n biggest savings (ties keep statement order) - no full sort."""
+    return result['saved_inr'].nlargest(n, keep='first').index
+
+def format_optimized_spends(transactions_df, best, saved, cards_df):
+    """(best card index, INR saved) per transaction -> the optimize_spends (frame, total) pair."""
+    card_labels = np.array(card_display_names(cards_df) + ["No Recommendation"], dtype=object)
+
+    optimized_df = pd.DataFrame({
+        "Description": transactions_df['description'].astype(str).str[:30].to_numpy() + "...", # Trimmed for chat display
+        "Amount": transaction_amounts(transactions_df),
+        "Category": transactions_df['category'].to_numpy(),
+        "Recommended_Card": card_labels[best],
+        # Python's round() is correctly rounded; np.round drifts on half-paise
+        "Saved_INR": [round(x, 2) for x in saved.tolist()]
+    })
+    # Left-to-right running sum, so the total matches the old loop to the last bit
+    total_savings = float(saved.cumsum()[-1])
+
+    return optimized_df, total_savings
+
+def iter_optimized_spends(transaction_chunks, cards_df):
+    """
+    Incremental optimize_spends for streamed statements.
+    Yields (optimized_chunk, chunk_savings) per incoming chunk - callers keep
+    a running total or aggregate instead of holding every row at once.
+    """
+    for chunk in transaction_chunks:
+        if chunk is None or chunk.empty:
+            continue
+        opt_chunk, chunk_savings = optimize_spends(chunk, cards_df)
+        opt_chunk.index = chunk.index
+        yield opt_chunk, chunk_savings
+
+def chat_session(user_data, cards_data):
+    """Everything the CLI chat answers from: the compact statement, its optimized result and the catalog."""
+    opt_result, total_savings = optimize_compact(user_data, cards_data)
+    return {'transactions': user_data, 'result': opt_result, 'total_savings': total_savings, 'cards': cards_data}
+
+def answer_cli_query(user_input, session):
+    """
+    One CLI chat turn without input()/print(): (intent, reply text).
+    `user_input` is already stripped + lower-cased; intent is None when nothing matched (help text).
+    """
+    from .wallet_optimizer import optimize_wallet
+
+    user_data, opt_result, total_savings = session['transactions'], session['result'], session['total_savings']
+    match = CLI_ROUTER.best(user_input)
+    intent = match.intent if match else None
+
+    if intent == 'savings':
+        return intent, (f"🤖 AI Agent: Your total mathematically optimized savings are ₹{total_savings:.2f}.\n"
+                        "This is calculated by comparing base rates and category multipliers across all cards in the database.")
+
+    if intent == 'top':
+        # Biggest savings first; only these 5 rows ever get display strings
+        top_5 = render_optimized(user_data, opt_result, top_savings(opt_result, 5))
+        return intent, ("🤖 AI Agent: Here are your top 5 optimized transactions showing which card to use:\n\n"
+                        + top_5[['Description', 'Category', 'Recommended_Card', 'Saved_INR']].to_string(index=False))
+
+    if intent == 'wallet':
+        wallet = optimize_wallet(user_data, session['cards'], k=2)
+        reply = "🤖 AI Agent: If you could only carry 2 cards, this wallet earns the most AFTER annual fees:\n"
+        if wallet['wallet']:
+            return intent, (reply + "\n" + wallet['routed_spend'].to_string(index=False)
+                            + f"\n\n💰 Net annual value: ₹{wallet['net_savings']:,.2f} (rewards ₹{wallet['gross_rewards']:,.2f} - fees ₹{wallet['fees_paid']:,.2f})")
+        return intent, reply + "No card beats its own annual fee on your spend pattern."
+
+    if intent == 'dining':
+        dining = opt_result[(user_data['category'] == 'Dining').to_numpy()]
+        if not dining.empty:
+            best = dining['card'].mode()[0]
+            return intent, f"🤖 AI Agent: You had {len(dining)} dining spends. The most optimized card for your dining habits is {best}."
+        return intent, "🤖 AI Agent: No dining spends detected in your statement."
+
+    if intent == 'logic':
+        return intent, ("🤖 AI Agent: I don't guess. I use a Deterministic Math Engine.\n"
+                        "1. I extract your spend category using Regex NLP.\n"
+                        "2. I fetch bank T&Cs (multipliers, point value in INR) from SQLite.\n"
+                        "3. I simulate the transaction across ALL cards and pick the highest yield.")
+
+    return intent, ("🤖 AI Agent: I am your financial optimization bot. Ask me about:\n"
+                    "  - 'Total savings'\n"
+                    "  - 'Top spends'\n"
+                    "  - 'Dining / Travel'\n"
+                    "  - 'Best 2-card wallet'\n"
+                    "  - 'Your logic'\n"
+                    "Type 'exit' to quit.")
 
 def run_chat_environment():
     """The Interactive Chat-Based AI Environment requested by the assignment."""
@@ -86,27 +220,33 @@ def run_chat_environment():
     print("=======================================================")
     print("Initializing Data Pipelines & Optimization Engines...")
     
-    # 1. Run Excel Parsing & Categorization
-    test_excel_path = "../../data_samples/transactions.xlsx"
-    user_data = run_ai_categorization(test_excel_path)
+    # Heavy pipeline modules load only when the CLI actually runs
+    from .statement_cache import cached_ai_categorization
+
+    # 1. Run Excel Parsing & Categorization (kept compact: codes + paise, no per-row strings)
+    user_data = to_compact(cached_ai_categorization(SAMPLE_STATEMENT))
     
     if user_data is None or user_data.empty:
         print("❌ Could not load or categorize user transactions.")
         return
         
-    # 2. Load the Master Database Framework
-    cards_data = load_cards_from_db()
-    if cards_data is None or cards_data.empty:
+    # 2. Load the Master Database Framework (shared, pre-parsed snapshot)
+    try:
+        cards_data = get_card_catalog()
+    except Exception as e:
+        print(f"❌ Database Error: {e}")
+        return
+    if len(cards_data) == 0:
         return
         
     # 3. Optimize every single spend!
     print("⚙️ AI Brain is analyzing multiple real-world card T&Cs...")
-    opt_df, total_savings = optimize_spends(user_data, cards_data)
+    session = chat_session(user_data, cards_data)
     
     print("\n✅ Setup Complete! I am ready.")
-    print(f"💰 INITIAL INSIGHT: By routing your spends optimally, you could have saved ₹{total_savings:.2f} this month!")
+    print(f"💰 INITIAL INSIGHT: By routing your spends optimally, you could have saved ₹{session['total_savings']:.2f} this month!")
     
-    # 4. THE CHAT LOOP
+    # 4. THE CHAT LOOP (answers come from answer_cli_query, so it also runs headless)
     while True:
         print("\n-------------------------------------------------------")
         user_input = input("🗣️ You: ").strip().lower()
@@ -115,37 +255,9 @@ def run_chat_environment():
             print("🤖 AI Agent: Goodbye! Keep optimizing your wealth. 🚀")
             break
             
-        elif 'save' in user_input or 'total' in user_input or 'savings' in user_input:
-            print(f"🤖 AI Agent: Your total mathematically optimized savings are ₹{total_savings:.2f}.")
-            print("This is calculated by comparing base rates and category multipliers across all cards in the database.")
-            
-        elif 'top' in user_input or 'show' in user_input:
-            print("🤖 AI Agent: Here are your top 5 optimized transactions showing which card to use:")
-            # Sorting to show biggest savings first
-            top_5 = opt_df.sort_values(by='Saved_INR', ascending=False).head(5)
-            print("\n" + top_5[['Description', 'Category', 'Recommended_Card', 'Saved_INR']].to_string(index=False))
-            
-        elif 'dining' in user_input:
-            dining = opt_df[opt_df['Category'] == 'Dining']
-            if not dining.empty:
-                best = dining['Recommended_Card'].mode()[0]
-                print(f"🤖 AI Agent: You had {len(dining)} dining spends. The most optimized card for your dining habits is {best}.")
-            else:
-                print("🤖 AI Agent: No dining spends detected in your statement.")
-                
-        elif 'logic' in user_input or 'how' in user_input:
-            print("🤖 AI Agent: I don't guess. I use a Deterministic Math Engine.")
-            print("1. I extract your spend category using Regex NLP.")
-            print("2. I fetch bank T&Cs (multipliers, point value in INR) from SQLite.")
-            print("3. I simulate the transaction across ALL cards and pick the highest yield.")
-            
-        else:
-            print("🤖 AI Agent: I am your financial optimization bot. Ask me about:")
-            print("  - 'Total savings'")
-            print("  - 'Top spends'")
-            print("  - 'Dining / Travel'")
-            print("  - 'Your logic'")
-            print("Type 'exit' to quit.")
+        _, reply = answer_cli_query(user_input, session)
+        print(reply)
 
 if __name__ == "__main__":
+    configure_logging()
     run_chat_environment()
\ No newline at end of file
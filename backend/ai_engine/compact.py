@@ -0,0 +1,94 @@
+"""
+Compact columnar statements for holding many users' transactions in memory.
+
+Working frames carry one Python string per row for description / type / category
+and float rupees. A compact frame keeps:
+    date           datetime64[ns]
+    description    category  (dictionary-encoded: small int codes + each distinct text once)
+    type           category
+    category       category
+    amount_paise   int64
+Optimize results are a card code (Categorical over the card names) plus float INR
+saved per row; display strings are only built for the rows actually rendered.
+"""
+import numpy as np
+import pandas as pd
+
+TEXT_COLUMNS = ('description', 'type', 'category')
+NO_RECOMMENDATION = "No Recommendation"
+
+
+def statement_dates(values):
+    """
+    Parser dates -> datetime64 (NaT when unreadable). Excel / CSV rows carry ISO
+    timestamps ('2025-02-06 12:00:00'), PDF rows dd/mm/yyyy; dayfirst on the ISO
+    ones would swap day and month, so it only applies to what ISO can't read.
+    """
+    values = pd.Series(values)
+    if values.dtype.kind == 'M':
+        return values
+    dates = pd.to_datetime(values, errors='coerce', format='ISO8601')
+    missing = dates.isna()
+    if missing.any():
+        dates[missing] = pd.to_datetime(values[missing], errors='coerce', dayfirst=True, format='mixed')
+    return dates
+
+
+def to_compact(df):
+    """Working frame (parsers / categorizer output) -> compact frame. None / empty pass through."""
+    if df is None or df.empty:
+        return df
+    out = {}
+    if 'date' in df.columns:
+        out['date'] = statement_dates(df['date'])
+    for col in TEXT_COLUMNS:
+        if col in df.columns:
+            out[col] = df[col].astype('category')
+    if 'amount_paise' in df.columns:
+        out['amount_paise'] = df['amount_paise'].astype(np.int64)
+    else:
+        out['amount_paise'] = np.rint(df['amount'].to_numpy(dtype=float) * 100).astype(np.int64)
+    return pd.DataFrame(out, index=df.index)
+
+
+def from_compact(df):
+    """Compact frame -> working frame (object text, float rupees) for code that needs one."""
+    if df is None or 'amount_paise' not in df.columns:
+        return df
+    out = df.drop(columns='amount_paise')
+    for col in TEXT_COLUMNS:
+        if col in out.columns:
+            out[col] = out[col].astype(object)
+    # Same column order the parsers produce: date, description, amount, type, category
+    position = out.columns.get_loc('description') + 1 if 'description' in out.columns else 0
+    out.insert(position, 'amount', transaction_amounts(df))
+    return out
+
+
+def is_compact(df):
+    return df is not None and 'amount_paise' in df.columns
+
+
+def transaction_amounts(df):
+    """Float rupees per row from either layout (paise / 100 is exact for 2-decimal amounts)."""
+    if 'amount_paise' in df.columns:
+        return df['amount_paise'].to_numpy() / 100
+    return df['amount'].to_numpy(dtype=float)
+
+
+def card_codes(best, card_names):
+    """Best-card indexes (-1 = none) -> Categorical over the card names + 'No Recommendation'."""
+    best = np.asarray(best)
+    codes = np.where(best < 0, len(card_names), best)
+    dtype = np.int16 if len(card_names) < np.iinfo(np.int16).max else np.int32
+    # Categories must be unique; two cards with the same display name get a ' (2)' suffix
+    labels, seen = [], {}
+    for name in list(card_names) + [NO_RECOMMENDATION]:
+        seen[name] = seen.get(name, 0) + 1
+        labels.append(name if seen[name] == 1 else f"{name} ({seen[name]})")
+    return pd.Categorical.from_codes(codes.astype(dtype), categories=labels)
+
+
+def frame_bytes(df):
+    """Real in-memory size, including every Python string object."""
+    return int(df.memory_usage(deep=True).sum())
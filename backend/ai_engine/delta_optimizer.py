@@ -0,0 +1,282 @@
+"""
+Incremental (delta) re-optimization.
+
+Nightly re-runs mostly see the same statement with a few rows appended, or a
+catalog where one card's T&Cs changed (row ids are not trusted: older catalogs
+were rebuilt from scratch, and DB copies can number cards differently). Per
+statement key, the last run's results are persisted:
+  - every transaction's fingerprint, category, best card and INR saved
+  - every card's content hash and its parsed per-category terms
+and the next run only
+  1. categorizes (and finds the merchant of) transactions it has never seen,
+  2. parses T&Cs of cards that are new or whose row changed,
+  3. re-scores new or re-classified rows, rows whose stored best card was edited
+     or removed, and rows a new / edited card matches or beats - checked against
+     the stored best card's rate, so untouched rows never go through an argmax.
+Everything else is reused as-is. Results are identical to a full optimize_spends.
+"""
+import hashlib
+import json
+import os
+import re
+import shutil
+import numpy as np
+import pandas as pd
+
+from .reward_engine import (assemble_reward_matrix, best_cards_for_transactions, build_reward_matrix,
+                            encode_spend_classes, get_multiplier_index)
+from .categorizer import categorize_descriptions, CATEGORIZER_VERSION
+from .chat_agent import format_optimized_spends
+from .compact import transaction_amounts
+from .statement_cache import save_frame, load_frame
+from .instrumentation import get_logger, stage
+
+log = get_logger('delta_optimizer')
+
+DELTA_STATE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '.delta_state')
+STATE_FORMAT = 2
+NO_CARD = ''
+
+
+class _CardSubset:
+    """A few CardCatalog records, shaped so build_reward_matrix accepts them."""
+
+    def __init__(self, records):
+        self.records = records
+
+    def __len__(self):
+        return len(self.records)
+
+
+def _card_rows(cards):
+    if hasattr(cards, 'records'):
+        return [r.details for r in cards.records]
+    return cards.to_dict('records')
+
+
+def _card_subset(cards, indexes):
+    if hasattr(cards, 'records'):
+        return _CardSubset([cards.records[j] for j in indexes])
+    return cards.iloc[list(indexes)]
+
+
+def card_fingerprints(cards):
+    """
+    (key, content hash) per card. The key is the bank + card name (the catalog's upsert
+    key; ids can differ between DB copies); the hash covers every other column, so
+    any T&C edit shows up.
+    """
+    keys, hashes, seen = [], [], {}
+    for row in _card_rows(cards):
+        name = f"{row.get('bank_name')}|{row.get('card_name')}"
+        repeat = seen.get(name, 0)
+        seen[name] = repeat + 1
+        keys.append(name if repeat == 0 else f"{name}#{repeat}")
+        terms = {k: v for k, v in row.items() if k != 'id'}
+        hashes.append(hashlib.sha1(json.dumps(terms, sort_keys=True, default=str).encode()).hexdigest()[:16])
+    return keys, hashes
+
+
+def transaction_keys(transactions_df):
+    """
+    Stable uint64 fingerprint per row: (date, description, amount) plus which
+    repeat of that triple it is, so two identical coffees stay two rows.
+    """
+    columns = [c for c in ('date', 'description', 'amount', 'amount_paise') if c in transactions_df.columns]
+    base = pd.util.hash_pandas_object(transactions_df[columns], index=False).to_numpy()
+    repeat = pd.Series(base).groupby(base).cumcount().to_numpy()
+    return pd.util.hash_pandas_object(pd.DataFrame({'row': base, 'repeat': repeat}), index=False).to_numpy()
+
+
+def _state_path(state_key, state_dir):
+    return os.path.join(state_dir, re.sub(r'[^\w.-]', '_', str(state_key)))
+
+
+def _load_state(path):
+    """(meta, rows) of the last run, or (None, None) when there is none / it's unreadable."""
+    try:
+        with open(os.path.join(path, 'state.json')) as f:
+            meta = json.load(f)
+        if meta.get('format') != STATE_FORMAT:
+            return None, None
+        return meta, load_frame(os.path.join(path, 'rows'))
+    except (OSError, ValueError, KeyError) as e:
+        if os.path.exists(path):
+            log.warning(f"⚠️ Ignoring unreadable delta state {path}: {e}")
+        return None, None
+
+
+def _save_state(path, meta, rows):
+    # Rows + meta are swapped in together, so a crash never pairs new rows with old meta
+    tmp_dir = f"{path}.tmp-{os.getpid()}"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+    save_frame(rows, os.path.join(tmp_dir, 'rows'))
+    with open(os.path.join(tmp_dir, 'state.json'), 'w') as f:
+        # dumps() uses the C encoder; dump() streams through the pure-Python one
+        f.write(json.dumps(meta))
+    shutil.rmtree(path, ignore_errors=True)
+    os.replace(tmp_dir, path)
+
+
+def _reward_matrix(cards, card_keys, card_hashes, categories, merchants, cached_cards):
+    """
+    build_reward_matrix, but unchanged cards come from the cached terms of the last run.
+    Returns (matrix, changed card mask, card terms to persist).
+    """
+    n_cards = len(card_keys)
+    multipliers = np.ones((len(categories), n_cards))
+    spend_units, inr_values = np.zeros(n_cards), np.zeros(n_cards)
+    valid = np.zeros(n_cards, dtype=bool)
+    changed = np.zeros(n_cards, dtype=bool)
+    # One cache label per (category, merchant) class
+    labels = [json.dumps([str(c), m]) for c, m in zip(categories, merchants)]
+    stale, terms = [], {}
+
+    # 1. Reuse cards whose row is byte-for-byte the same and that know every category
+    for j, (key, card_hash) in enumerate(zip(card_keys, card_hashes)):
+        cached = cached_cards.get(key)
+        changed[j] = cached is None or cached['hash'] != card_hash
+        if changed[j] or any(label not in cached['multipliers'] for label in labels):
+            stale.append(j)
+            continue
+        spend_units[j], inr_values[j], valid[j] = cached['unit'], cached['value'], cached['valid']
+        multipliers[:, j] = [cached['multipliers'][label] for label in labels]
+        terms[key] = cached
+
+    # 2. Parse T&Cs only for new / edited cards (and unseen categories)
+    if stale:
+        fresh = build_reward_matrix(_card_subset(cards, stale), categories, merchants)
+        for i, j in enumerate(stale):
+            spend_units[j], inr_values[j], valid[j] = fresh['spend_units'][i], fresh['inr_values'][i], fresh['valid'][i]
+            multipliers[:, j] = fresh['multipliers'][:, i]
+            known = {} if changed[j] else dict(cached_cards[card_keys[j]]['multipliers'])
+            known.update(zip(labels, fresh['multipliers'][:, i].tolist()))
+            terms[card_keys[j]] = {'hash': card_hashes[j], 'unit': float(spend_units[j]),
+                                   'value': float(inr_values[j]), 'valid': bool(valid[j]), 'multipliers': known}
+
+    return assemble_reward_matrix(multipliers, spend_units, inr_values, valid), changed, terms
+
+
+def incremental_optimize(transactions_df, cards, state_key, state_dir=DELTA_STATE_DIR):
+    """
+    optimize_spends that remembers its last run for `state_key` (a user or account id).
+    transactions_df is the FULL current statement (categorized or not); cards is a
+    CardCatalog or cards DataFrame. Only the delta since the last run is computed.
+
+    Returns (optimized_df, total_savings, stats) - the first two exactly as
+    optimize_spends would return them; stats counts reused vs recomputed work.
+    """
+    columns = ["Description", "Amount", "Category", "Recommended_Card", "Saved_INR"]
+    if transactions_df is None or transactions_df.empty:
+        return pd.DataFrame(columns=columns), 0.0, {}
+
+    df = transactions_df.reset_index(drop=True)
+    path = _state_path(state_key, state_dir)
+    with stage('incremental_optimize', rows_in=len(df)) as record:
+        meta, old = _load_state(path)
+        keys = transaction_keys(df)
+        card_keys, card_hashes = card_fingerprints(cards)
+
+        # 1. Match rows against the last run (-1 = new transaction)
+        if old is not None:
+            pos = pd.Index(old['txn_key'].to_numpy()).get_indexer(keys)
+            old_categories = old['category'].to_numpy(dtype=object)
+            # 'no merchant' round-trips through the column store as NaN
+            old_merchants = old['merchant'].astype(object).where(old['merchant'].notna(), None).to_numpy(dtype=object)
+            old_cards = old['card_key'].to_numpy(dtype=object)
+            old_saved = old['saved'].to_numpy(dtype=float)
+        else:
+            pos = np.full(len(df), -1)
+            old_categories = old_merchants = old_cards = np.array([], dtype=object)
+            old_saved = np.array([], dtype=float)
+        seen = pos >= 0
+        cached_cards = meta['cards'] if meta else {}
+
+        # 2. Categorize only what the last run didn't (everything, if the rules changed)
+        if 'category' in df.columns:
+            categories = df['category'].to_numpy(dtype=object)
+            to_categorize = np.zeros(len(df), dtype=bool)
+        else:
+            categories = np.empty(len(df), dtype=object)
+            reusable = seen if meta and meta.get('categorizer_version') == CATEGORIZER_VERSION else np.zeros(len(df), dtype=bool)
+            categories[reusable] = old_categories[pos[reusable]]
+            to_categorize = ~reusable
+            if to_categorize.any():
+                categories[to_categorize] = categorize_descriptions(df['description'][to_categorize]).to_numpy(dtype=object)
+
+        # 3. Merchants: reused while the catalog's merchant keys stay the same
+        index = get_multiplier_index(cards)
+        merchants = np.empty(len(df), dtype=object)
+        reusable = seen if meta and meta.get('merchant_tokens') == index.tokens else np.zeros(len(df), dtype=bool)
+        merchants[reusable] = old_merchants[pos[reusable]]
+        if (~reusable).any():
+            merchants[~reusable] = index.merchants_of(df['description'][~reusable])
+        codes, category_labels, merchant_labels = encode_spend_classes(pd.Series(categories, dtype=object), merchants)
+
+        # 4. Reward matrix: cached columns for unchanged cards, fresh ones for the rest
+        matrix, changed, card_terms = _reward_matrix(cards, card_keys, card_hashes, category_labels,
+                                                     merchant_labels, cached_cards)
+        amounts = transaction_amounts(df)
+        n_cards = len(card_keys)
+
+        # 5. Rows to re-score. A seen row keeps its stored best card unless it was
+        #    re-classified, that card was edited / removed, or a new / edited card
+        #    matches or beats its rate (ties go by catalog order, so those re-score too)
+        prev = np.where(seen, pos, 0)
+        stored = pd.Index(card_keys).get_indexer(old_cards[prev]) if seen.any() else np.full(len(df), -1)
+        incumbent = np.where(stored >= 0, stored, 0)
+        rescore = ~seen | (stored < 0)
+        previous_order = meta.get('card_order') if meta else []
+        if previous_order is None:
+            reordered = True  # state from before card order was recorded
+        else:
+            surviving = set(previous_order) & set(card_keys)
+            reordered = [k for k in previous_order if k in surviving] != [k for k in card_keys if k in surviving]
+        if not n_cards or reordered:
+            rescore[:] = True  # cards moved relative to each other: their ties may resolve differently
+        elif seen.any():
+            rates = np.round(matrix['rates'], 12)
+            rescore |= (old_categories[prev] != categories) | (old_merchants[prev] != merchants) | changed[incumbent]
+            if changed.any():
+                rescore |= rates[:, changed].max(axis=1)[codes] >= rates[codes, incumbent]
+            # A zero spend always goes to the catalog's first card
+            rescore |= (amounts <= 0) & (incumbent != 0)
+
+        best = incumbent
+        saved = np.where(seen, old_saved[prev] if len(old_saved) else 0.0, 0.0)
+        if rescore.any():
+            best[rescore], saved[rescore] = best_cards_for_transactions(amounts[rescore], codes[rescore], matrix)
+        best_keys = (np.array(card_keys, dtype=object)[best] if n_cards
+                     else np.full(len(df), NO_CARD, dtype=object))
+
+        optimized_df, total_savings = format_optimized_spends(df.assign(category=categories), best, saved, cards)
+
+        # 6. Persist for the next run (a no-op re-run leaves the state untouched)
+        removed = set(cached_cards) - set(card_keys)
+        if (old is None or len(old) != len(df) or rescore.any() or to_categorize.any() or (~reusable).any()
+                or card_terms != cached_cards or meta.get('card_order') != card_keys):
+            _save_state(path, {
+                'format': STATE_FORMAT,
+                'categorizer_version': CATEGORIZER_VERSION,
+                'catalog_version': hashlib.sha1(json.dumps([card_keys, card_hashes]).encode()).hexdigest()[:12],
+                'merchant_tokens': index.tokens,
+                'cards': card_terms,
+                'card_order': card_keys,
+            }, pd.DataFrame({'txn_key': keys, 'category': categories, 'merchant': merchants,
+                             'card_key': best_keys, 'saved': saved}))
+
+        stats = {
+            'rows': len(df),
+            'new_rows': int((~seen).sum()),
+            'categorized_rows': int(to_categorize.sum()),
+            'rescored_rows': int(rescore.sum()),
+            'reused_rows': int((~rescore).sum()),
+            'changed_cards': int(changed.sum()),
+            'removed_cards': len(removed),
+        }
+        record.count(**{k: v for k, v in stats.items() if k != 'rows'})
+        record.rows_out = len(optimized_df)
+        log.info(f"♻️ Delta run '{state_key}': {stats['rescored_rows']} of {stats['rows']} rows re-scored, "
+                 f"{stats['changed_cards']} changed / {stats['removed_cards']} removed cards")
+        return optimized_df, total_savings, stats
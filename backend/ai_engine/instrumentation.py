@@ -0,0 +1,287 @@
+"""
+Lightweight pipeline instrumentation.
+
+    with stage('optimize_spends', rows_in=len(df)) as s:
+        ...
+        s.rows_out = len(result)
+        s.count(cache_hits=12)
+
+    @instrumented('parse_user_transactions')
+    def parse_user_transactions(file_path): ...
+
+Every stage records wall time, CPU time (of the calling thread), rows in/out
+and any counters (cache hits, ...) into a process-wide metrics dict
+(get_metrics()) and emits one structured 'stage' log record at DEBUG.
+
+A generator stage wraps each yield in suspended(record), so the consumer's
+work between chunks isn't charged to it:
+
+    with stage('iter_user_transactions') as record:
+        for chunk in chunks:
+            with suspended(record):
+                yield chunk
+
+Opt-in profiling, no code changes needed:
+    CARD_OPTIMIZER_PROFILE=cpu,mem   cProfile and/or tracemalloc per top-level stage
+    CARD_OPTIMIZER_PROFILE_DIR=...   where the .prof / .mem.txt dumps go (default backend/.profiles)
+    CARD_OPTIMIZER_LOG=json          one JSON object per log line instead of plain text
+"""
+import cProfile
+import functools
+import json
+import logging
+import os
+import re
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime
+
+ROOT_LOGGER = 'card_optimizer'
+DEFAULT_PROFILE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '.profiles'))
+TRACEMALLOC_TOP = 25
+
+_metrics = {}
+_metrics_lock = threading.Lock()
+_local = threading.local()
+# cProfile is process-global on newer Pythons, so only one stage profiles at a time
+_profile_lock = threading.Lock()
+
+
+def get_logger(name):
+    return logging.getLogger(f"{ROOT_LOGGER}.{name}")
+
+
+log = get_logger('instrumentation')
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {
+            'ts': datetime.fromtimestamp(record.created).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        if hasattr(record, 'metrics'):
+            entry['metrics'] = record.metrics
+        if record.exc_info:
+            entry['exc'] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+def configure_logging(level=logging.INFO, fmt=None):
+    """For entry points (CLI, app, server). Libraries only ever log."""
+    fmt = fmt or os.environ.get('CARD_OPTIMIZER_LOG', 'text')
+    root = logging.getLogger(ROOT_LOGGER)
+    if root.handlers:
+        return root
+    handler = logging.StreamHandler()
+    handler.setFormatter(JsonFormatter() if fmt == 'json' else logging.Formatter('%(message)s'))
+    root.addHandler(handler)
+    root.setLevel(level)
+    root.propagate = False
+    return root
+
+
+# --- Metrics ---
+class StageRecord:
+    """What one run of a stage reports. Stage code fills rows_out / counters as it goes."""
+
+    __slots__ = ('name', 'rows_in', 'rows_out', 'counters', 'wall_s', 'cpu_s', 'paused_wall_s', 'paused_cpu_s',
+                 'error')
+
+    def __init__(self, name, rows_in=None):
+        self.name = name
+        self.rows_in = rows_in
+        self.rows_out = None
+        self.counters = {}
+        self.wall_s = self.cpu_s = 0.0
+        self.paused_wall_s = self.paused_cpu_s = 0.0
+        self.error = None
+
+    def count(self, **counters):
+        for key, value in counters.items():
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def as_dict(self):
+        return {'stage': self.name, 'wall_s': round(self.wall_s, 6), 'cpu_s': round(self.cpu_s, 6),
+                'rows_in': self.rows_in, 'rows_out': self.rows_out, **self.counters,
+                **({'error': self.error} if self.error else {})}
+
+
+def _aggregate(record):
+    with _metrics_lock:
+        m = _metrics.setdefault(record.name, {'calls': 0, 'errors': 0, 'wall_s': 0.0, 'cpu_s': 0.0,
+                                              'rows_in': 0, 'rows_out': 0})
+        m['calls'] += 1
+        m['errors'] += 1 if record.error else 0
+        m['wall_s'] += record.wall_s
+        m['cpu_s'] += record.cpu_s
+        m['last_wall_s'] = record.wall_s
+        m['rows_in'] += record.rows_in or 0
+        m['rows_out'] += record.rows_out or 0
+        for key, value in record.counters.items():
+            m[key] = m.get(key, 0) + value
+
+
+def get_metrics():
+    """Snapshot of per-stage totals: {stage: {calls, errors, wall_s, cpu_s, rows_in, rows_out, ...}}."""
+    with _metrics_lock:
+        return {name: dict(values) for name, values in _metrics.items()}
+
+
+def reset_metrics():
+    with _metrics_lock:
+        _metrics.clear()
+
+
+def _stack():
+    stack = getattr(_local, 'stack', None)
+    if stack is None:
+        stack = _local.stack = []
+    return stack
+
+
+def current_stage():
+    """The innermost running stage on this thread (or None) - for counters deep inside a stage."""
+    stack = getattr(_local, 'stack', None)
+    return stack[-1] if stack else None
+
+
+def count(**counters):
+    """Adds counters to the running stage, if there is one."""
+    record = current_stage()
+    if record is not None:
+        record.count(**counters)
+
+
+# --- Profiling ---
+def _profile_modes():
+    return {m.strip().lower() for m in os.environ.get('CARD_OPTIMIZER_PROFILE', '').split(',') if m.strip()}
+
+
+@contextmanager
+def profiling(label, modes=None, out_dir=None):
+    """cProfile ('cpu') and/or tracemalloc ('mem') around a block; dumps land in out_dir."""
+    modes = _profile_modes() if modes is None else set(modes)
+    if not modes or not _profile_lock.acquire(blocking=False):
+        yield
+        return
+
+    out_dir = out_dir or os.environ.get('CARD_OPTIMIZER_PROFILE_DIR', DEFAULT_PROFILE_DIR)
+    safe_label = re.sub(r'[^\w.-]', '_', label)
+    base = os.path.join(out_dir, f"{safe_label}_{datetime.now():%Y%m%d_%H%M%S}_{os.getpid()}")
+    profiler = cProfile.Profile() if 'cpu' in modes else None
+    started_tracing = 'mem' in modes and not tracemalloc.is_tracing()
+    try:
+        if started_tracing:
+            tracemalloc.start()
+        if profiler:
+            profiler.enable()
+        yield
+    finally:
+        try:
+            if profiler:
+                profiler.disable()
+            # Snapshot memory before dump_stats() allocates its own report
+            if 'mem' in modes and tracemalloc.is_tracing():
+                current, peak = tracemalloc.get_traced_memory()
+                snapshot = tracemalloc.take_snapshot().filter_traces([
+                    tracemalloc.Filter(False, tracemalloc.__file__),
+                    tracemalloc.Filter(False, cProfile.__file__),
+                ])
+                top = snapshot.statistics('lineno')[:TRACEMALLOC_TOP]
+            os.makedirs(out_dir, exist_ok=True)
+            if profiler:
+                profiler.dump_stats(base + '.prof')
+            if 'mem' in modes and tracemalloc.is_tracing():
+                with open(base + '.mem.txt', 'w') as f:
+                    f.write(f"current={current} peak={peak}\n")
+                    f.writelines(f"{stat}\n" for stat in top)
+            log.info(f"🔬 Profile written: {base}.*")
+        except OSError as e:
+            log.warning(f"⚠️ Could not write profile: {e}")
+        finally:
+            if started_tracing:
+                tracemalloc.stop()
+            _profile_lock.release()
+
+
+# --- Stages ---
+@contextmanager
+def stage(name, rows_in=None):
+    stack = _stack()
+    record = StageRecord(name, rows_in)
+    outermost = not stack
+    stack.append(record)
+
+    wall, cpu = time.perf_counter(), time.thread_time()
+    try:
+        if outermost:
+            with profiling(name):
+                yield record
+        else:
+            yield record
+    except GeneratorExit:
+        # A streaming stage whose consumer stopped early - not a failure
+        raise
+    except BaseException as e:
+        record.error = type(e).__name__
+        raise
+    finally:
+        record.wall_s = time.perf_counter() - wall - record.paused_wall_s
+        record.cpu_s = time.thread_time() - cpu - record.paused_cpu_s
+        # This thread's stack, not the one it started on: a generator stage can be resumed from another thread.
+        # remove(), not pop(): stages of interleaved generators may close out of order
+        _stack().remove(record)
+        _aggregate(record)
+        rows = f"{record.rows_in if record.rows_in is not None else '?'} -> {record.rows_out if record.rows_out is not None else '?'} rows"
+        log.debug(f"⏱️ {name}: {rows} in {record.wall_s * 1000:.1f} ms",
+                  extra={'metrics': record.as_dict()})
+
+
+@contextmanager
+def suspended(record):
+    """
+    Around a generator stage's yield: while the consumer runs, the stage is off the
+    stack (its counters and nested stages aren't ours) and its clock is stopped.
+    """
+    _stack().remove(record)
+    wall, cpu = time.perf_counter(), time.thread_time()
+    try:
+        yield
+    finally:
+        record.paused_wall_s += time.perf_counter() - wall
+        record.paused_cpu_s += time.thread_time() - cpu
+        _stack().append(record)
+
+
+def _row_count(value):
+    # DataFrames, lists... and (frame, total) tuples like optimize_spends returns
+    if isinstance(value, tuple) and value:
+        value = value[0]
+    try:
+        return len(value) if value is not None else 0
+    except TypeError:
+        return None
+
+
+def instrumented(name=None, rows_in=None):
+    """
+    Decorator form of stage(). rows_in(*args, **kwargs) optionally counts the input;
+    rows_out is taken from len() of the result unless the function set it itself.
+    """
+    def decorator(fn):
+        stage_name = name or fn.__name__
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with stage(stage_name, rows_in(*args, **kwargs) if rows_in else None) as record:
+                result = fn(*args, **kwargs)
+                if record.rows_out is None:
+                    record.rows_out = _row_count(result)
+                return result
+        return wrapper
+    return decorator
@@ -0,0 +1,182 @@
+import re
+from collections import namedtuple
+from functools import lru_cache
+
+TOKEN_PATTERN = re.compile(r'[a-z0-9]+')
+
+# Everyday words that sit within 2 edits of a keyword ('longer' ~ 'lounge', 'offline' ~ 'online').
+# They are real words, not typos, so they never go through fuzzy matching.
+COMMON_WORDS = frozenset("""
+    a an and any are as at be best better bonus but by can card cards do does for from get give good great
+    has have how i in is it its longer longest lower me more most my no not of offer offers offline on or
+    our over please points rate rates should showing spend spends than that the their them there these this
+    to use want what when where which who why will with would you your
+""".split())
+
+# Word endings stripped to find a keyword's stem ('saved' -> save, 'missing' -> missed)
+SUFFIXES = ('ations', 'ation', 'ings', 'ing', 'ers', 'er', 'est', 'ed', 'ly', 'al', 'es', 'd', 's')
+# Shorter stems collide with unrelated words ('feed' -> fee, 'tied' -> tie)
+MIN_STEM = 4
+
+# What the router reports back: which intent fired, on which keyword, and how sure it is
+IntentMatch = namedtuple('IntentMatch', ['intent', 'keyword', 'token', 'distance', 'confidence'])
+
+
+def edit_distance(a, b, max_distance):
+    """
+    Optimal-string-alignment distance (Levenshtein + adjacent swaps, so
+    'miletsone' -> 'milestone' is 1). Gives up early once it exceeds max_distance.
+    """
+    if abs(len(a) - len(b)) > max_distance:
+        return max_distance + 1
+    prev_prev, prev = None, list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        cur = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = 0 if a[i - 1] == b[j - 1] else 1
+            cur[j] = min(prev[j] + 1, cur[j - 1] + 1, prev[j - 1] + cost)
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                cur[j] = min(cur[j], prev_prev[j - 2] + 1)
+        if min(cur) > max_distance:
+            return max_distance + 1
+        prev_prev, prev = prev, cur
+    return prev[-1]
+
+
+def _deletes(word, depth):
+    """Every string reachable from `word` by deleting up to `depth` characters (SymSpell trick)."""
+    results = {word}
+    frontier = {word}
+    for _ in range(depth):
+        frontier = {w[:i] + w[i + 1:] for w in frontier for i in range(len(w))}
+        results |= frontier
+    return results
+
+
+def stems(word):
+    """
+    The word plus what it reads as without a common ending: 'saved' -> save,
+    'shopping' -> shop (doubled consonant), 'optimization' -> optimize (dropped e).
+    Stems under MIN_STEM letters are left out.
+    """
+    results = {word}
+    for suffix in SUFFIXES:
+        if word.endswith(suffix) and len(word) - len(suffix) >= MIN_STEM - 1:
+            base = word[:-len(suffix)]
+            results |= {base, base + 'e'}
+            if base[-1] == base[-2]:
+                results.add(base[:-1])
+    return {stem for stem in results if len(stem) >= MIN_STEM}
+
+
+def allowed_typos(word):
+    # Short words are too easy to collide ('food' vs 'good', 'move' vs 'movie'), so they must match exactly
+    if len(word) <= 4:
+        return 0
+    if len(word) <= 5:
+        return 1
+    return 2
+
+
+class IntentRouter:
+    """
+    Keyword -> intent router built once, queried many times.
+      - exact words and simple plurals resolve through a hash index
+      - inflected forms ('saved', 'billing') resolve through a stem index
+      - typos resolve through a SymSpell-style deletes index (no typo lists!)
+      - two-word phrases ('less spend') resolve on consecutive tokens
+    Intents are ranked by the order they were registered (= priority),
+    then by confidence.
+    """
+
+    def __init__(self, common_words=COMMON_WORDS):
+        self.common_words = common_words
+        self._priority = {}
+        self._word_intents = {}
+        self._phrase_intents = {}
+        self._stem_index = {}
+        self._deletes_index = {}
+        self._resolve = lru_cache(maxsize=4096)(self._resolve_token)
+
+    def add_intent(self, intent, keywords):
+        self._priority.setdefault(intent, len(self._priority))
+        for keyword in keywords:
+            words = tuple(TOKEN_PATTERN.findall(keyword.lower()))
+            if len(words) > 1:
+                self._phrase_intents.setdefault(words, []).append((intent, keyword))
+            for word in words:
+                # Multi-word phrase parts only need to resolve, they don't fire on their own
+                targets = self._word_intents.setdefault(word, [])
+                if len(words) == 1:
+                    targets.append((intent, keyword))
+                for stem in stems(word):
+                    self._stem_index.setdefault(stem, word)
+                for variant in _deletes(word, allowed_typos(word)):
+                    self._deletes_index.setdefault(variant, set()).add(word)
+        self._resolve.cache_clear()
+        return self
+
+    def _resolve_token(self, token):
+        """token -> (vocabulary word, distance) or None."""
+        if token in self._word_intents:
+            return token, 0
+        # Simple plurals: 'fees', 'lounges', 'movies'
+        for suffix in ('es', 's'):
+            if token.endswith(suffix) and token[:-len(suffix)] in self._word_intents:
+                return token[:-len(suffix)], 0
+        # Same stem as a keyword: an inflection, not a typo
+        for stem in sorted(stems(token), key=len, reverse=True):
+            if stem in self._stem_index:
+                return self._stem_index[stem], 0
+        # Real words and short tokens ('move' vs 'movie') never go through fuzzy matching
+        if token in self.common_words or allowed_typos(token) == 0:
+            return None
+
+        # A typo keeps the first letter: 'joining' is not 'dining'
+        best = None
+        for variant in _deletes(token, 2):
+            for word in self._deletes_index.get(variant, ()):
+                if word[0] != token[0]:
+                    continue
+                limit = allowed_typos(word)
+                distance = edit_distance(token, word, limit)
+                if distance <= limit and (best is None or (distance, word) < best[::-1]):
+                    best = (word, distance)
+        return best
+
+    def route(self, query):
+        """
+        All intents the query hits, best first.
+        The query is tokenized exactly once.
+        """
+        tokens = TOKEN_PATTERN.findall(str(query).lower())
+        resolved = [self._resolve(token) for token in tokens]
+
+        found = {}
+
+        def record(intent, keyword, token, distance, size):
+            confidence = round(1.0 - distance / max(size, 1), 3)
+            current = found.get(intent)
+            if current is None or confidence > current.confidence:
+                found[intent] = IntentMatch(intent, keyword, token, distance, confidence)
+
+        for token, hit in zip(tokens, resolved):
+            if hit is None:
+                continue
+            word, distance = hit
+            for intent, keyword in self._word_intents[word]:
+                record(intent, keyword, token, distance, max(len(word), len(token)))
+
+        for i in range(len(tokens) - 1):
+            if resolved[i] is None or resolved[i + 1] is None:
+                continue
+            pair = (resolved[i][0], resolved[i + 1][0])
+            for intent, keyword in self._phrase_intents.get(pair, ()):
+                distance = resolved[i][1] + resolved[i + 1][1]
+                record(intent, keyword, f"{tokens[i]} {tokens[i + 1]}", distance, len(keyword))
+
+        return sorted(found.values(), key=lambda m: (self._priority[m.intent], -m.confidence))
+
+    def best(self, query):
+        matches = self.route(query)
+        return matches[0] if matches else None
@@ -0,0 +1,155 @@
+import os
+import re
+import sqlite3
+import threading
+from collections import OrderedDict
+
+# Lives right next to master_cards_final.db, but in its own file so cache
+# writes never look like catalog changes
+DEFAULT_CACHE_DB = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'database', 'merchant_cache.db')
+
+# Any word-token with 2+ digits is a UPI ref, date piece, phone no. or txn ID.
+# No category keyword looks like that, so dropping these never changes a category.
+NOISE_TOKEN = re.compile(r'\b\w*\d\w*\d\w*\b')
+
+
+def clean_description(description):
+    # We replace hyphens and dots with spaces so the regex boundary works perfectly on UPI notes
+    return str(description).upper().replace("-", " ").replace(".", " ")
+
+
+def normalize_merchant(description):
+    """
+    'UPI-ZOMATO-ZOMATO.ORDER@ICICI-9876543210-22/07/2025' -> 'UPI ZOMATO ZOMATO ORDER@ICICI  //'
+    Strips the per-transaction noise so every visit to the same merchant
+    collapses onto ONE canonical key. Separators are kept as-is, so keyword
+    word-boundaries behave exactly like they did on the raw description.
+    """
+    return NOISE_TOKEN.sub('', clean_description(description)).strip()
+
+
+def normalize_merchants(descriptions):
+    """Vectorized normalize_merchant for a pandas Series of descriptions."""
+    return (descriptions.map(str).str.upper()
+            .str.replace("-", " ", regex=False).str.replace(".", " ", regex=False)
+            .str.replace(NOISE_TOKEN, '', regex=True).str.strip())
+
+
+class MerchantCategoryCache:
+    """
+    Bounded LRU (merchant key -> category) in memory, optionally backed by a
+    SQLite table so repeat statements survive restarts.
+    Entries are tagged with the categorizer version - changing the keyword
+    table silently invalidates everything persisted before it.
+    """
+
+    def __init__(self, version, maxsize=50000, db_path=None):
+        self.version = version
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._conn = None
+        self.hits = 0
+        self.persistent_hits = 0
+        self.misses = 0
+        if db_path:
+            self.attach_db(db_path)
+
+    # --- Persistent layer (optional) ---
+    def attach_db(self, db_path=DEFAULT_CACHE_DB):
+        with self._lock:
+            self._conn = sqlite3.connect(db_path, check_same_thread=False)
+            self._conn.execute('''
+                CREATE TABLE IF NOT EXISTS merchant_categories (
+                    merchant_key TEXT PRIMARY KEY,
+                    category TEXT,
+                    categorizer_version TEXT
+                )
+            ''')
+            self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def _load_persisted(self, keys):
+        if self._conn is None or not keys:
+            return {}
+        found = {}
+        # SQLite caps bound parameters, so look keys up in slices
+        for start in range(0, len(keys), 500):
+            batch = keys[start:start + 500]
+            placeholders = ",".join("?" * len(batch))
+            rows = self._conn.execute(
+                f"SELECT merchant_key, category FROM merchant_categories "
+                f"WHERE categorizer_version = ? AND merchant_key IN ({placeholders})",
+                [self.version, *batch]
+            ).fetchall()
+            found.update(rows)
+        return found
+
+    # --- In-memory LRU ---
+    def _remember(self, key, category):
+        self._entries[key] = category
+        self._entries.move_to_end(key)
+        if len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def get_many(self, keys):
+        """Returns {key: category} for every key we already know. Counts hits/misses."""
+        found = {}
+        with self._lock:
+            remaining = []
+            for key in keys:
+                if key in self._entries:
+                    self._entries.move_to_end(key)
+                    found[key] = self._entries[key]
+                    self.hits += 1
+                else:
+                    remaining.append(key)
+
+            persisted = self._load_persisted(remaining)
+            for key, category in persisted.items():
+                self._remember(key, category)
+            found.update(persisted)
+            self.persistent_hits += len(persisted)
+            self.misses += len(remaining) - len(persisted)
+        return found
+
+    def put_many(self, mapping):
+        with self._lock:
+            for key, category in mapping.items():
+                self._remember(key, category)
+            if self._conn is not None and mapping:
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO merchant_categories (merchant_key, category, categorizer_version) VALUES (?, ?, ?)",
+                    [(key, category, self.version) for key, category in mapping.items()]
+                )
+                self._conn.commit()
+
+    def get_or_compute(self, key, compute):
+        found = self.get_many([key])
+        if key in found:
+            return found[key]
+        category = compute(key)
+        self.put_many({key: category})
+        return category
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.persistent_hits = self.misses = 0
+
+    def stats(self):
+        lookups = self.hits + self.persistent_hits + self.misses
+        return {
+            'hits': self.hits,
+            'persistent_hits': self.persistent_hits,
+            'misses': self.misses,
+            'hit_rate': round((self.hits + self.persistent_hits) / lookups, 4) if lookups else 0.0,
+            'size': len(self._entries),
+            'maxsize': self.maxsize,
+            'persistent': self._conn is not None,
+        }
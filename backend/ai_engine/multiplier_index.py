@@ -0,0 +1,135 @@
+"""
+Per-catalog multiplier resolution with a fixed precedence: merchant > category > base.
+
+Card multipliers mix two kinds of keys:
+    category keys  'dining', 'travel', 'online' ...            matched against the category label
+    merchant keys  'swiggy', 'amazon_prime', 'google_pay_bills' matched against the description
+The index splits them once per catalog. A transaction's merchant comes from one
+compiled regex (run once per distinct description), and every (category, merchant)
+pair resolves to a per-card multiplier vector once - after that it's a dict lookup.
+"""
+import re
+import numpy as np
+import pandas as pd
+
+from .categorizer import CATEGORY_KEYWORDS, DEFAULT_CATEGORY
+
+# Keys describing a kind of spend rather than a brand - never matched against descriptions
+SPEND_CHANNEL_KEYS = {'online', 'offline', 'international', 'domestic', 'departmental'}
+CATEGORY_LABELS = [c.lower() for c in [*CATEGORY_KEYWORDS, DEFAULT_CATEGORY]]
+
+# Trailing qualifiers on merchant keys -> category the key is limited to (None = any).
+# 'amazon_prime' / 'amazon_non_prime' are both Amazon; Prime membership isn't in a
+# statement, so when several keys hit the same merchant the LOWEST multiplier is used.
+KEY_QUALIFIERS = {'non_prime': None, 'prime': None, 'bills': 'utilit'}
+# 'google_pay' matches 'GOOGLE PAY', 'GOOGLEPAY', 'GOOGLE-PAY'...
+MERCHANT_SEPARATOR = r'[\s_.-]*'
+
+
+def is_category_key(key):
+    return key in SPEND_CHANNEL_KEYS or any(key in label for label in CATEGORY_LABELS)
+
+
+def split_merchant_key(key):
+    """'google_pay_bills' -> ('google_pay', 'utilit'), 'swiggy' -> ('swiggy', None)."""
+    for qualifier, category in KEY_QUALIFIERS.items():
+        if key.endswith('_' + qualifier) and len(key) > len(qualifier) + 1:
+            return key[:-len(qualifier) - 1], category
+    return key, None
+
+
+class MultiplierIndex:
+    """
+    Built from each card's multipliers dict (None for cards with broken T&Cs).
+    multipliers_for(category, merchant) -> (n_cards,) multipliers, memoized per pair.
+    """
+
+    def __init__(self, card_multipliers):
+        self.n_cards = len(card_multipliers)
+        self.parsed = np.zeros(self.n_cards, dtype=bool)
+        self.category_keys = []   # per card: [(key, multiplier)] in T&C order
+        self.merchant_keys = []   # per card: {merchant token: [(multiplier, required category)]}
+        tokens = {}
+
+        for multipliers in card_multipliers:
+            by_category, by_merchant = [], {}
+            try:
+                for key, value in (multipliers or {}).items():
+                    key, value = str(key).lower().strip(), float(value)
+                    if is_category_key(key):
+                        by_category.append((key, value))
+                    else:
+                        token, required = split_merchant_key(key)
+                        by_merchant.setdefault(token, []).append((value, required))
+                        tokens.setdefault(token, len(tokens))
+                parsed = multipliers is not None
+            except (TypeError, ValueError, AttributeError):
+                by_category, by_merchant, parsed = [], {}, False
+            self.parsed[len(self.category_keys)] = parsed
+            self.category_keys.append(by_category)
+            self.merchant_keys.append(by_merchant)
+
+        # One alternation over every merchant in the catalog; the group name says which one hit.
+        # Descriptions are upper-cased first, and only ones containing a merchant's first word
+        # (a plain substring test) ever reach the regex.
+        self.tokens = list(tokens)
+        self.anchors = sorted({token.split('_')[0].upper() for token in self.tokens})
+        self.pattern = None
+        if self.tokens:
+            branches = [rf"(?P<m{i}>{MERCHANT_SEPARATOR.join(re.escape(p.upper()) for p in token.split('_'))})"
+                        for i, token in enumerate(self.tokens)]
+            self.pattern = re.compile(r"\b(?:" + "|".join(branches) + r")\b")
+        self._resolved = {}
+
+    # --- Merchant detection ---
+    def _merchant_of_text(self, text):
+        if not any(anchor in text for anchor in self.anchors):
+            return None
+        match = self.pattern.search(text)
+        return self.tokens[int(match.lastgroup[1:])] if match else None
+
+    def merchant_of(self, description):
+        """Catalog merchant token found in one description ('swiggy'), or None."""
+        return self._merchant_of_text(str(description).upper()) if self.pattern else None
+
+    def merchants_of(self, descriptions):
+        """Vectorized merchant_of: each distinct description is only looked at once."""
+        descriptions = pd.Series(descriptions)
+        if self.pattern is None or descriptions.empty:
+            return np.full(len(descriptions), None, dtype=object)
+        codes, uniques = pd.factorize(descriptions, use_na_sentinel=False)
+        found = np.array([self._merchant_of_text(str(d).upper()) for d in uniques.tolist()] + [None], dtype=object)
+        return found[codes]
+
+    # --- Resolution ---
+    def _resolve(self, j, category, merchant):
+        cat_key = str(category).lower().strip()
+        # 1. Merchant keys (qualified ones only inside their category)
+        if merchant is not None:
+            hits = [value for value, required in self.merchant_keys[j].get(merchant, ())
+                    if required is None or required in cat_key]
+            if hits:
+                return min(hits)
+        # 2. Category keys: first key found inside the category string wins
+        for key, value in self.category_keys[j]:
+            if key in cat_key:
+                return value
+        # 3. Base rate
+        return 1.0
+
+    def multipliers_for(self, category, merchant=None):
+        pair = (category, merchant)
+        row = self._resolved.get(pair)
+        if row is None:
+            row = self._resolved[pair] = np.array([self._resolve(j, category, merchant) for j in range(self.n_cards)])
+        return row
+
+    def multiplier(self, card_index, category, merchant=None):
+        return float(self.multipliers_for(category, merchant)[card_index])
+
+    def matrix(self, categories, merchants=None):
+        """(len(categories) x n_cards) multipliers; merchants[i] (or None) pairs with categories[i]."""
+        merchants = merchants if merchants is not None else [None] * len(categories)
+        if not len(categories):
+            return np.ones((0, self.n_cards))
+        return np.vstack([self.multipliers_for(c, m) for c, m in zip(categories, merchants)])
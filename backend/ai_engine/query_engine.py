@@ -0,0 +1,189 @@
+import re
+import threading
+import weakref
+import numpy as np
+from .intent_router import IntentRouter
+
+# A. PERK MAPPING (Covering all sub-points from doc)
+# intent -> (keywords, DB column, title). Typos are handled by the router, not listed here.
+PERK_LOGIC = {
+    'network': (['network'], 'network', 'Card Network (Visa/MC/Amex)'),
+    'golf': (['golf'], 'perk_golf', 'Golf Privileges'),
+    'movie': (['movie'], 'perk_movies', 'Movie Benefits'),
+    'lounge': (['lounge'], 'lounge_domestic', 'Lounge Access (Domestic/Intl)'),
+    'expiry': (['expiry', 'expire'], 'reward_expiry_months', 'Reward Expiry Rules'),
+    'taj': (['taj'], 'benefit_special_tieups', 'Taj/Special Tie-ups'),
+    'tie': (['tie', 'tieup'], 'benefit_special_tieups', 'Special Brand Tie-ups'),
+    'milestone': (['milestone'], 'benefit_milestones', 'Milestone Benefits'),
+    'welcome': (['welcome'], 'benefit_welcome', 'Welcome Benefits'),
+    'other': (['other'], 'perk_others', 'Miscellaneous Benefits')
+}
+
+# Fees & Waivers
+FEE_LOGIC = {
+    'waivers': ['waive', 'waiver', 'less spend', 'waiver limit'],
+    'renewal': ['renewal'],
+    'joining': ['fee', 'joining', 'cheap', 'free']
+}
+
+# B. CATEGORY MAPPING for the Universal ROI Math Engine
+CAT_MAP = {
+    'dining': ['dining', 'food'],
+    'international': ['international', 'abroad', 'foreign'],
+    'domestic': ['domestic', 'india', 'local'],
+    'travel': ['travel', 'trip', 'flight'],
+    'utilities': ['utility', 'utilities', 'bill'],
+    'shopping': ['shopping', 'amazon', 'online', 'reward system', 'highest reward']
+}
+
+# Spend-audit questions are answered from the user's statement, not the catalog
+OPTIMIZE_KEYWORDS = ['optimize', 'highlight', 'missed', 'past']
+
+
+def build_chat_router():
+    """Registration order = priority: audit > perks > fees > categories > generic 'reward'."""
+    router = IntentRouter()
+    router.add_intent('optimize', OPTIMIZE_KEYWORDS)
+    for key, (keywords, _, _) in PERK_LOGIC.items():
+        router.add_intent(f'perk:{key}', keywords)
+    for key, keywords in FEE_LOGIC.items():
+        router.add_intent(f'fee:{key}', keywords)
+    for key, keywords in CAT_MAP.items():
+        router.add_intent(f'roi:{key}', keywords)
+    router.add_intent('roi:reward', ['reward'])
+    return router
+
+
+CHAT_ROUTER = build_chat_router()
+
+# Perk cells like 'No', 'None', 'Not available' mean the card doesn't have it
+NO_PERK = re.compile(r'(?i)no|none')
+
+FALLBACK_RESPONSE = "🤖 I can analyze cards for 'Movies', 'Golf', 'Taj tie-ups', 'Waivers', or 'Travel'. Specify a category to query."
+
+
+def _roi_ranking(catalog, target_cat):
+    """Every card's ROI % for one category, best first (ties keep catalog order)."""
+    ranking = []
+    for card in catalog.records:
+        # Unreadable multipliers_json: skipped, as when the JSON was parsed here (not ranked at the 1x base rate)
+        if not card.terms_parsed:
+            continue
+        try:
+            m_json = card.multipliers
+            # Math ROI Formula Calculation
+            mult = m_json.get(target_cat, m_json.get('travel' if 'travel' in str(target_cat) else '', 1.0))
+            unit = card.spends_per_reward_unit or 100
+            roi = (float(mult) / unit) * card.unified_reward_value_inr * 100
+            if roi > -1.0:  # same floor the old 'max_roi = -1.0' loop had (NaN never wins)
+                ranking.append((roi, card))
+        except: continue
+    # sorted() is stable, so the first card to hit the max stays on top
+    return sorted(ranking, key=lambda item: -item[0])
+
+
+def build_query_indexes(catalog):
+    """
+    Scans the catalog ONCE and precomputes everything the chat can ask for:
+      - perk column -> eligible cards (inverted index, already rendered as bullet lines)
+      - fee / renewal / waiver answers from sorted fee arrays
+      - per-category ROI rankings
+    After this, every chat message is a dict lookup instead of a DataFrame scan.
+    Works on the catalog's records and arrays only, so the chat path never imports pandas.
+    """
+    records = catalog.records
+    indexes = {'version': catalog.version, 'perks': {}, 'roi': {}}
+    if not records:
+        return indexes
+
+    # 1. Perk inverted index: column -> lines for cards that actually have the perk
+    for col in {col for _, col, _ in PERK_LOGIC.values()}:
+        if col not in catalog.columns:
+            continue
+        indexes['perks'][col] = [
+            f"- **{r.bank_name} {r.card_name}**: {r.details[col]}\n"
+            for r in records if not NO_PERK.search(str(r.details[col]))
+        ]
+
+    # 2. Fees & waivers (sorted once; quicksort = the same tie order DataFrame.sort_values gave)
+    limits = catalog.waiver_limits
+    eligible = np.flatnonzero(limits > 0)
+    order = eligible[np.argsort(limits[eligible], kind='quicksort')]
+    indexes['waivers'] = "⚖️ **Spend-based Fee Waivers (Lowest First):**\n\n" + "".join(
+        f"- **{records[i].bank_name} {records[i].card_name}**: Waived at ₹{limits[i]:,.0f} annual spend.\n"
+        for i in order
+    )
+    for key, fees, text in (
+        ('renewal', catalog.renewal_fees, "🔄 For the lowest **Renewal Fee**, the **{}** is the winner at ₹{}."),
+        ('joining', catalog.joining_fees, "💰 For the lowest **Joining Fee**, the **{}** is optimal at ₹{}."),
+    ):
+        if not np.isnan(fees).all():
+            best = records[int(np.nanargmin(fees))]
+            indexes[key] = text.format(f"{best.bank_name} {best.card_name}", best.details[f'{key}_fee'])
+
+    # 3. Per-category ROI rankings
+    for target_cat in CAT_MAP:
+        indexes['roi'][target_cat] = _roi_ranking(catalog, target_cat)
+
+    return indexes
+
+
+# Weak keys: a replaced catalog snapshot drops its index with it
+_index_cache = weakref.WeakKeyDictionary()
+_index_lock = threading.Lock()
+
+
+def get_query_indexes(catalog):
+    """Indexes are rebuilt only when the catalog snapshot version changes."""
+    with _index_lock:
+        indexes = _index_cache.get(catalog)
+        if indexes is None or indexes['version'] != catalog.version:
+            indexes = _index_cache[catalog] = build_query_indexes(catalog)
+        return indexes
+
+
+def universal_query_engine(intent, catalog, matches=None):
+    """
+    The Universal DB Benchmarking (A-Z Coverage), answered from precomputed indexes.
+    `matches` lets callers pass an already-routed query (CHAT_ROUTER.route).
+    """
+    return answer_query(intent, catalog, matches)[1]
+
+
+def answer_query(intent, catalog, matches=None):
+    """
+    universal_query_engine that also says which intent answered: (intent, response).
+    The intent is the router's name ('perk:golf', 'fee:waivers', 'roi:dining', ...),
+    'fallback' when nothing in the catalog matched, 'db_error' without a catalog.
+    No Streamlit / input() involved, so load tests can drive it directly.
+    """
+    if catalog is None: return 'db_error', "Database Error."
+    indexes = get_query_indexes(catalog)
+    if matches is None:
+        matches = CHAT_ROUTER.route(intent)
+
+    # Matches arrive in priority order: Perks -> Fees & Waivers -> ROI Math Engine
+    for match in matches:
+        group, _, key = match.intent.partition(':')
+
+        # Priority 1: Perks (skip to the next intent if no card has it)
+        if group == 'perk':
+            _, col, title = PERK_LOGIC[key]
+            lines = indexes['perks'].get(col)
+            if lines:
+                return match.intent, f"✨ **Database Results for {title}:**\n\n" + "".join(lines)
+
+        # Priority 2: Fees & Waivers (Requirement Met)
+        elif group == 'fee' and key in indexes:
+            return match.intent, indexes[key]
+
+        # Priority 3: The Universal ROI Math Engine (Dining, Travel, Utilities, Reward System)
+        elif group == 'roi':
+            target_cat = 'shopping' if key == 'reward' else key # Default to shopping if general reward asked
+            ranking = indexes['roi'].get(target_cat)
+            if ranking:
+                max_roi, best_card = ranking[0]
+                return match.intent, f"📈 **Mathematical Winner for {target_cat.capitalize()}:** The **{best_card.bank_name} {best_card.card_name}** offers a return of **{max_roi:.2f}%**."
+            return 'fallback', FALLBACK_RESPONSE
+
+    return 'fallback', FALLBACK_RESPONSE
@@ -0,0 +1,197 @@
+import os
+import sqlite3
+import threading
+import time
+
+from .instrumentation import stage
+
+# Next to the catalog, in its own file so result writes never look like catalog changes
+DEFAULT_RESULTS_DB = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'database', 'results.db'))
+DEFAULT_USER = 'default'
+DESCRIPTION_WIDTH = 30
+
+SCHEMA = '''
+    CREATE TABLE IF NOT EXISTS statements (
+        statement_id TEXT PRIMARY KEY,
+        user_id TEXT NOT NULL,
+        rows INTEGER NOT NULL,
+        total_savings REAL NOT NULL,
+        updated_at REAL NOT NULL
+    );
+    CREATE INDEX IF NOT EXISTS idx_statements_user ON statements (user_id);
+
+    CREATE TABLE IF NOT EXISTS transactions (
+        statement_id TEXT NOT NULL,
+        row_no INTEGER NOT NULL,
+        user_id TEXT NOT NULL,
+        txn_date TEXT,
+        description TEXT,
+        amount REAL,
+        category TEXT,
+        PRIMARY KEY (statement_id, row_no)
+    ) WITHOUT ROWID;
+
+    CREATE TABLE IF NOT EXISTS recommendations (
+        statement_id TEXT NOT NULL,
+        row_no INTEGER NOT NULL,
+        user_id TEXT NOT NULL,
+        recommended_card TEXT,
+        saved_inr REAL,
+        PRIMARY KEY (statement_id, row_no)
+    ) WITHOUT ROWID;
+    -- Top-N straight off the index: no sort, ties keep statement order
+    CREATE INDEX IF NOT EXISTS idx_recommendations_statement_saved
+        ON recommendations (statement_id, saved_inr DESC, row_no);
+    CREATE INDEX IF NOT EXISTS idx_recommendations_user_saved
+        ON recommendations (user_id, saved_inr DESC, statement_id, row_no);
+
+    -- Maintained on every write, so dashboards never aggregate transactions
+    CREATE TABLE IF NOT EXISTS category_savings (
+        statement_id TEXT NOT NULL,
+        user_id TEXT NOT NULL,
+        category TEXT NOT NULL,
+        transactions INTEGER NOT NULL,
+        spend_inr REAL NOT NULL,
+        saved_inr REAL NOT NULL,
+        PRIMARY KEY (statement_id, category)
+    ) WITHOUT ROWID;
+    CREATE INDEX IF NOT EXISTS idx_category_savings_user
+        ON category_savings (user_id, category, saved_inr, spend_inr, transactions);
+'''
+
+
+class ResultsStore:
+    """
+    Optimization results in SQLite (WAL mode), one statement at a time.
+    Writers replace a statement's rows and its per-category aggregates in one
+    transaction. Readers (app reruns, other server workers, other processes)
+    get top-N lists and category summaries from indexes, not DataFrame work.
+    """
+
+    def __init__(self, db_path=DEFAULT_RESULTS_DB):
+        self.db_path = os.path.abspath(db_path)
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False, timeout=30)
+        # WAL: many readers + one writer at a time, readers never block on the writer
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.executescript(SCHEMA)
+        self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    # --- Writes ---
+    def save_results(self, statement_id, transactions, result, total_savings, user_id=DEFAULT_USER):
+        """
+        Stores one statement's transactions (working or compact frame) + its
+        optimize_compact result (row for row), replacing whatever was stored
+        for statement_id before.
+        """
+        from .compact import transaction_amounts
+
+        n = len(result)
+        with stage('save_results', rows_in=n) as record:
+            dates = (transactions['date'].astype(str).tolist() if 'date' in transactions.columns
+                     else [None] * n)
+            txn_rows = zip([statement_id] * n, range(n), [user_id] * n, dates,
+                           transactions['description'].astype(str).tolist(),
+                           transaction_amounts(transactions).tolist(),
+                           transactions['category'].astype(str).tolist())
+            # Full precision: sums and rankings use exact savings, readers round for display
+            reco_rows = zip([statement_id] * n, range(n), [user_id] * n,
+                            result['card'].astype(str).tolist(),
+                            result['saved_inr'].tolist())
+
+            with self._lock, self._conn:
+                for table in ('transactions', 'recommendations', 'category_savings', 'statements'):
+                    self._conn.execute(f"DELETE FROM {table} WHERE statement_id = ?", (statement_id,))
+                self._conn.executemany("INSERT INTO transactions VALUES (?, ?, ?, ?, ?, ?, ?)", txn_rows)
+                self._conn.executemany("INSERT INTO recommendations VALUES (?, ?, ?, ?, ?)", reco_rows)
+                # Aggregates are built by SQLite from the rows just written
+                self._conn.execute('''
+                    INSERT INTO category_savings
+                    SELECT t.statement_id, t.user_id, t.category, COUNT(*), SUM(t.amount), SUM(r.saved_inr)
+                    FROM transactions t JOIN recommendations r USING (statement_id, row_no)
+                    WHERE t.statement_id = ?
+                    GROUP BY t.category
+                ''', (statement_id,))
+                self._conn.execute("INSERT INTO statements VALUES (?, ?, ?, ?, ?)",
+                                   (statement_id, user_id, n, float(total_savings), time.time()))
+            record.rows_out = n
+
+    def delete_statement(self, statement_id):
+        with self._lock, self._conn:
+            for table in ('transactions', 'recommendations', 'category_savings', 'statements'):
+                self._conn.execute(f"DELETE FROM {table} WHERE statement_id = ?", (statement_id,))
+
+    # --- Reads ---
+    @staticmethod
+    def _scope(statement_id, user_id, alias=''):
+        if statement_id is not None:
+            return f"{alias}statement_id = ?", (statement_id,)
+        return f"{alias}user_id = ?", (user_id or DEFAULT_USER,)
+
+    def _query(self, sql, params):
+        with self._lock:
+            cursor = self._conn.execute(sql, params)
+            columns = [c[0] for c in cursor.description]
+            return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+    def has_statement(self, statement_id):
+        with self._lock:
+            return self._conn.execute("SELECT 1 FROM statements WHERE statement_id = ?",
+                                      (statement_id,)).fetchone() is not None
+
+    def total_savings(self, statement_id=None, user_id=None):
+        where, params = self._scope(statement_id, user_id)
+        with self._lock:
+            return float(self._conn.execute(f"SELECT COALESCE(SUM(total_savings), 0) FROM statements WHERE {where}",
+                                            params).fetchone()[0])
+
+    def category_summary(self, statement_id=None, user_id=None):
+        """[{Category, Transactions, Spend_INR, Saved_INR}] for one statement or all of a user's, biggest savings first."""
+        where, params = self._scope(statement_id, user_id)
+        rows = self._query(f'''
+            SELECT category AS Category, SUM(transactions) AS Transactions,
+                   SUM(spend_inr) AS Spend_INR, SUM(saved_inr) AS Saved_INR
+            FROM category_savings WHERE {where}
+            GROUP BY category
+        ''', params)
+        # Rounded for display only, with Python's round() like category_table and optimize_spends
+        for row in rows:
+            row['Spend_INR'], row['Saved_INR'] = round(row['Spend_INR'], 2), round(row['Saved_INR'], 2)
+        return sorted(rows, key=lambda r: (-r['Saved_INR'], r['Category']))
+
+    def top_savings(self, n=10, statement_id=None, user_id=None):
+        """The n transactions with the biggest savings, in optimize_spends' column layout."""
+        where, params = self._scope(statement_id, user_id, alias='r.')
+        rows = self._query(f'''
+            SELECT SUBSTR(t.description, 1, {DESCRIPTION_WIDTH}) || '...' AS Description, t.amount AS Amount,
+                   t.category AS Category, r.recommended_card AS Recommended_Card, r.saved_inr AS Saved_INR
+            FROM recommendations r JOIN transactions t USING (statement_id, row_no)
+            WHERE {where}
+            ORDER BY r.saved_inr DESC, r.statement_id, r.row_no
+            LIMIT ?
+        ''', (*params, int(n)))
+        for row in rows:
+            row['Saved_INR'] = round(row['Saved_INR'], 2)
+        return rows
+
+
+_shared_stores = {}
+_shared_lock = threading.Lock()
+
+
+def get_results_store(db_path=DEFAULT_RESULTS_DB):
+    """One ResultsStore (connection) per DB file per process."""
+    db_path = os.path.abspath(db_path)
+    with _shared_lock:
+        store = _shared_stores.get(db_path)
+        if store is None:
+            store = _shared_stores[db_path] = ResultsStore(db_path)
+        return store
@@ -0,0 +1,186 @@
+import functools
+import json
+import threading
+import weakref
+import numpy as np
+import pandas as pd
+
+from .multiplier_index import MultiplierIndex
+
+
+def resolve_multiplier(multipliers, category):
+    """
+    Same matching rule the Core Math Engine has always used:
+    first multiplier key found inside the category string wins, else 1.0.
+    """
+    cat_key = str(category).lower().strip()
+    for key, val in multipliers.items():
+        if key in cat_key:
+            return float(val)
+    return 1.0
+
+
+@functools.lru_cache(maxsize=1024)
+def _single_card_index(multiplier_items):
+    return MultiplierIndex([dict(multiplier_items)])
+
+
+def resolve_card_multiplier(multipliers, category, description=None):
+    """
+    One card, one transaction: merchant key (found in description) > category key > 1.0.
+    The card's keys are split and compiled once, then reused for every call.
+    """
+    index = _single_card_index(tuple(multipliers.items()))
+    merchant = index.merchant_of(description) if description is not None else None
+    return index.multiplier(0, category, merchant)
+
+
+def _card_terms(cards):
+    """
+    Yields (spend_unit, inr_value, multipliers_dict) per card, or None for broken rows.
+    A CardCatalog already has everything parsed; a raw DataFrame gets parsed here.
+    """
+    if hasattr(cards, 'records'):
+        for card in cards.records:
+            yield (card.spends_per_reward_unit, card.unified_reward_value_inr, card.multipliers) if card.valid else None
+        return
+    for card in cards.itertuples(index=False):
+        try:
+            yield float(card.spends_per_reward_unit), float(card.unified_reward_value_inr), json.loads(card.multipliers_json)
+        except Exception:
+            # calculate_reward_inr swallows bad rows as 0.0 savings - so do we
+            yield None
+
+
+# Weak keys: a replaced catalog snapshot drops its index with it
+_index_cache = weakref.WeakKeyDictionary()
+_index_lock = threading.Lock()
+
+
+def get_multiplier_index(cards):
+    """
+    The MultiplierIndex for a CardCatalog (rebuilt only when its version changes)
+    or a freshly built one for a raw cards DataFrame.
+    """
+    version = getattr(cards, 'version', None)
+    if version is None:
+        return MultiplierIndex([terms[2] if terms else None for terms in _card_terms(cards)])
+    with _index_lock:
+        cached = _index_cache.get(cards)
+        if cached is None or cached[0] != version:
+            index = MultiplierIndex([terms[2] if terms else None for terms in _card_terms(cards)])
+            cached = _index_cache[cards] = (version, index)
+        return cached[1]
+
+
+def card_display_names(cards):
+    """'HDFC Infinia Metal' style labels for a CardCatalog or a cards DataFrame."""
+    if hasattr(cards, 'display_names'):
+        return list(cards.display_names)
+    return [f"{b} {c}" for b, c in zip(cards['bank_name'], cards['card_name'])]
+
+
+def build_reward_matrix(cards_df, categories, merchants=None, index=None):
+    """
+    Builds the (category x card) reward-rate matrix ONCE from the catalog
+    (a CardCatalog snapshot or the raw cards DataFrame).
+    With `merchants` (one token or None per category entry) every row is a
+    (category, merchant) class instead, so merchant-keyed boosts apply.
+    Each cell holds the per-component rates so savings can later be computed as
+    (Amount / Spend Unit) * Multiplier * Value of 1 Point - the exact same
+    equation (and float order) as calculate_reward_inr.
+
+    Returns a dict with:
+      - 'rates':       (n_categories x n_cards) INR saved per 1 INR spent
+      - 'multipliers': (n_categories x n_cards) applicable multiplier
+      - 'spend_units': (n_cards,) spends per reward unit
+      - 'inr_values':  (n_cards,) value of 1 point in INR
+      - 'valid':       (n_cards,) False for cards with broken T&C data
+    """
+    n_cards = len(cards_df)
+    multipliers = np.ones((len(categories), n_cards))
+    spend_units = np.zeros(n_cards)
+    inr_values = np.zeros(n_cards)
+    valid = np.zeros(n_cards, dtype=bool)
+
+    # 1. Parse every card's T&Cs exactly once (not once per transaction!)
+    index = index or get_multiplier_index(cards_df)
+    for j, terms in enumerate(_card_terms(cards_df)):
+        if terms is None or not index.parsed[j]:
+            continue
+        unit, value, _ = terms
+        if unit > 0:
+            spend_units[j], inr_values[j], valid[j] = unit, value, True
+
+    # 2. Multipliers come pre-resolved from the index (merchant > category > base)
+    if n_cards and len(categories):
+        multipliers[:, valid] = index.matrix(categories, merchants)[:, valid]
+
+    # 3. Collapse into a single rate per (category, card)
+    return assemble_reward_matrix(multipliers, spend_units, inr_values, valid)
+
+
+def assemble_reward_matrix(multipliers, spend_units, inr_values, valid):
+    """
+    The build_reward_matrix dict from already-parsed per-card components.
+    Lets callers stitch cached card columns together and still get bit-identical rates.
+    """
+    with np.errstate(divide='ignore', invalid='ignore'):
+        rates = np.where(valid, multipliers * inr_values / np.where(valid, spend_units, 1.0), 0.0)
+
+    return {
+        'rates': rates,
+        'multipliers': multipliers,
+        'spend_units': spend_units,
+        'inr_values': inr_values,
+        'valid': valid,
+    }
+
+
+def best_cards_for_transactions(amounts, category_codes, matrix):
+    """
+    Picks the best card for every transaction in one NumPy pass.
+    argmax runs over the small (category x card) matrix, then gets broadcast
+    to every transaction via its category code.
+
+    Returns (best_card_index, saved_inr) arrays. Ties go to the first card in
+    the catalog, same as the old strict '>' comparison loop.
+    """
+    amounts = np.asarray(amounts, dtype=float)
+    category_codes = np.asarray(category_codes)
+    n_cards = matrix['rates'].shape[1]
+
+    if n_cards == 0:
+        return np.full(len(amounts), -1), np.full(len(amounts), -1.0)
+
+    # Rounding hides float noise so mathematically equal rates tie properly
+    best_per_category = np.argmax(np.round(matrix['rates'], 12), axis=1)
+    best = best_per_category[category_codes]
+    # A zero spend saves nothing anywhere - the old loop kept the first card
+    best = np.where(amounts > 0, best, 0)
+
+    units = matrix['spend_units'][best]
+    values = matrix['inr_values'][best]
+    mults = matrix['multipliers'][category_codes, best]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        saved = np.where(matrix['valid'][best], (amounts / units) * mults * values, 0.0)
+
+    return best, saved
+
+
+def encode_categories(category_series):
+    """Turns the category column into small integer codes + the unique labels."""
+    codes, uniques = pd.factorize(category_series, use_na_sentinel=False)
+    return codes, list(uniques)
+
+
+def encode_spend_classes(category_series, merchants):
+    """
+    encode_categories for (category, merchant) pairs: integer codes plus the
+    parallel category / merchant label lists that build_reward_matrix takes.
+    """
+    cat_codes, categories = pd.factorize(pd.Series(category_series), use_na_sentinel=False)
+    merchant_codes, merchant_labels = pd.factorize(pd.Series(merchants, dtype=object), use_na_sentinel=False)
+    codes, pairs = pd.factorize(cat_codes * len(merchant_labels) + merchant_codes)
+    return (codes, [categories[p // len(merchant_labels)] for p in pairs],
+            [merchant_labels[p % len(merchant_labels)] for p in pairs])
@@ -0,0 +1,224 @@
+"""
+What-if sweeps over the subjective parts of the catalog.
+
+Point values (unified_reward_value_inr) and multipliers (multipliers_json) are
+judgement calls that change often. Instead of editing init_db.py and re-running
+the pipeline per guess, a sweep takes ONE statement and thousands of perturbed
+catalogs and scores them together:
+
+    rates[s, c, j] = multiplier[c, j] * multiplier_scale[s, (c,) j]
+                     * inr_value[j] * value_scale[s, j] / spend_unit[j]     (0 for removed cards)
+
+over a (scenario x spend class x card) tensor, where a spend class is the same
+(category, merchant) pair score_transactions uses. A statement only enters as its
+spend per class, so the sweep never touches transactions again.
+
+    base = build_scenario_base(transactions, catalog, extra_cards=new_cards_df)
+    scenarios = random_scenarios(base, 5000, value_jitter=0.2, multiplier_jitter=0.1, drop_prob=0.05)
+    report = summarize_sweep(base, sweep_scenarios(base, scenarios))
+
+Scenario 0 is always the unperturbed catalog (extra cards off), so every metric is
+relative to today's recommendation.
+"""
+import numpy as np
+import pandas as pd
+
+from .reward_engine import build_reward_matrix, card_display_names, encode_spend_classes, get_multiplier_index
+from .compact import transaction_amounts
+from .instrumentation import get_logger, stage
+
+log = get_logger('scenario_engine')
+
+# Cells of the (scenario x class x card) tensor evaluated at once (~64 MB of float64)
+BATCH_CELLS = 8_000_000
+TOP_K = 3
+
+
+def build_scenario_base(transactions, cards, extra_cards=None):
+    """
+    Everything a sweep needs from the statement + catalog, computed once.
+    `extra_cards` (rows in credit_cards layout) are candidate cards a scenario can add;
+    they're off in the baseline. Takes working or compact frames, a CardCatalog or cards DataFrame.
+    """
+    # 1. Card universe = catalog + candidates (one index, so candidates' merchant keys count too)
+    universe = cards
+    n_base = len(cards)
+    if extra_cards is not None and len(extra_cards):
+        frame = cards.frame if hasattr(cards, 'frame') else cards
+        universe = pd.concat([frame, pd.DataFrame(extra_cards)], ignore_index=True)
+
+    # 2. Statement -> spend per (category, merchant) class; nothing per-row survives past here
+    index = get_multiplier_index(universe)
+    merchants = index.merchants_of(transactions['description'])
+    codes, categories, merchant_labels = encode_spend_classes(transactions['category'], merchants)
+    amounts = transaction_amounts(transactions)
+    spend = np.bincount(codes, weights=amounts, minlength=len(categories))
+    counts = np.bincount(codes, minlength=len(categories))
+
+    # 3. Per-card components (not collapsed rates): each one is scaled separately per scenario
+    matrix = build_reward_matrix(universe, categories, merchant_labels, index=index)
+    labels = [str(c) if pd.isna(m) else f"{c} ({m})" for c, m in zip(categories, merchant_labels)]
+    return {
+        'spend': spend,
+        'transactions': counts,
+        'classes': labels,
+        'multipliers': matrix['multipliers'],
+        'spend_units': matrix['spend_units'],
+        'inr_values': matrix['inr_values'],
+        'valid': matrix['valid'],
+        'cards': card_display_names(universe),
+        'baseline_active': np.arange(len(matrix['valid'])) < n_base,
+    }
+
+
+def random_scenarios(base, n, value_jitter=0.1, multiplier_jitter=0.1, per_class=False, drop_prob=0.0,
+                     add_prob=0.5, seed=0):
+    """
+    n perturbed catalogs (row 0 = the baseline):
+      value_scale       (n, cards)          point value x U(1 - value_jitter, 1 + value_jitter)
+      multiplier_scale  (n, cards)          every multiplier of a card scaled together, or
+                        (n, classes, cards) with per_class=True (each category's multiplier on its own)
+      active            (n, cards)          catalog cards dropped with drop_prob, candidates added with add_prob
+    Any dict with these keys (shapes as above) can be passed to sweep_scenarios instead.
+    """
+    rng = np.random.default_rng(seed)
+    n_classes, n_cards = base['multipliers'].shape
+    baseline = base['baseline_active']
+
+    value_scale = 1 + rng.uniform(-value_jitter, value_jitter, (n, n_cards))
+    shape = (n, n_classes, n_cards) if per_class else (n, n_cards)
+    multiplier_scale = 1 + rng.uniform(-multiplier_jitter, multiplier_jitter, shape)
+    draws = rng.random((n, n_cards))
+    active = np.where(baseline, draws >= drop_prob, draws < add_prob)
+
+    value_scale[0], multiplier_scale[0], active[0] = 1.0, 1.0, baseline
+    return {'value_scale': value_scale, 'multiplier_scale': multiplier_scale, 'active': active}
+
+
+def sweep_scenarios(base, scenarios, batch_cells=BATCH_CELLS):
+    """
+    Scores every scenario in batched NumPy passes over the (scenario x class x card) tensor.
+
+    Returns a dict with:
+      - 'total_savings': (n,)         INR saved when every class goes to its best card
+      - 'best':          (n, classes) best card per class (-1 when no card is active)
+      - 'card_savings':  (n, cards)   INR the card alone would save on the whole statement
+    """
+    value_scale = np.asarray(scenarios['value_scale'], dtype=float)
+    multiplier_scale = np.asarray(scenarios['multiplier_scale'], dtype=float)
+    active = np.asarray(scenarios['active'], dtype=bool)
+    n = len(active)
+    n_classes, n_cards = base['multipliers'].shape
+    spend = base['spend']
+
+    total = np.zeros(n)
+    best = np.full((n, n_classes), -1)
+    card_savings = np.zeros((n, n_cards))
+    # Per-card constant of the rate formula; broken cards earn nothing in any scenario
+    with np.errstate(divide='ignore', invalid='ignore'):
+        per_unit = np.where(base['valid'], base['inr_values'] / np.where(base['valid'], base['spend_units'], 1.0), 0.0)
+
+    batch = max(1, batch_cells // max(n_classes * n_cards, 1))
+    with stage('sweep_scenarios', rows_in=n) as record:
+        for start in range(0, n, batch):
+            end = min(start + batch, n)
+            scale = multiplier_scale[start:end]
+            if scale.ndim == 2:
+                scale = scale[:, None, :]
+            # 1. (batch x class x card) rates
+            rates = base['multipliers'][None] * scale * (value_scale[start:end] * per_unit)[:, None, :]
+            on = active[start:end][:, None, :]
+
+            # 2. Best card per class: same rounding + first-card tie rule as best_cards_for_transactions
+            choice = np.where(on, np.round(rates, 12), -np.inf)
+            winners = np.argmax(choice, axis=2)
+            any_on = on[:, 0, :].any(axis=1)
+            best[start:end] = np.where(any_on[:, None], winners, -1)
+            best_rates = np.where(any_on[:, None], np.take_along_axis(rates, winners[..., None], axis=2)[..., 0], 0.0)
+            total[start:end] = best_rates @ spend
+
+            # 3. Single-card savings (what the ranking is built on)
+            card_savings[start:end] = np.einsum('c,scj->sj', spend, np.where(on, rates, 0.0))
+        record.count(batch_size=batch, cells=n * n_classes * n_cards)
+        record.rows_out = n
+
+    return {'total_savings': total, 'best': best, 'card_savings': card_savings}
+
+
+def _ranks(values):
+    """Row-wise ranks (0 = biggest); ties keep catalog order."""
+    order = np.argsort(-values, axis=1, kind='stable')
+    ranks = np.empty_like(order)
+    np.put_along_axis(ranks, order, np.arange(values.shape[1])[None, :], axis=1)
+    return ranks
+
+
+def summarize_sweep(base, sweep, top_k=TOP_K):
+    """How much the recommendation moves across scenarios (row 0 = baseline)."""
+    total, best, card_savings = sweep['total_savings'], sweep['best'], sweep['card_savings']
+    n = len(total)
+    cards = base['cards']
+    spend = base['spend']
+
+    # 1. Savings distribution
+    p5, p50, p95 = np.percentile(total, [5, 50, 95])
+    savings = {'baseline': round(float(total[0]), 2), 'mean': round(float(total.mean()), 2),
+               'min': round(float(total.min()), 2), 'p5': round(float(p5), 2), 'p50': round(float(p50), 2),
+               'p95': round(float(p95), 2), 'max': round(float(total.max()), 2)}
+
+    # 2. Best card per spend class: how often today's pick survives, and what replaces it
+    same = best == best[0]
+    by_class = []
+    for c, label in enumerate(base['classes']):
+        alternatives = best[~same[:, c], c]
+        runner_up = None
+        if len(alternatives):
+            picks, picked = np.unique(alternatives, return_counts=True)
+            runner_up = int(picks[np.argmax(picked)])
+        by_class.append({
+            'class': label,
+            'transactions': int(base['transactions'][c]),
+            'spend_inr': round(float(spend[c]), 2),
+            'baseline_card': cards[best[0, c]] if best[0, c] >= 0 else None,
+            'stable_share': round(float(same[:, c].mean()), 4),
+            'top_alternative': cards[runner_up] if runner_up is not None and runner_up >= 0 else None,
+        })
+    by_class.sort(key=lambda r: -r['spend_inr'])
+    weights = spend / spend.sum() if spend.sum() > 0 else np.full(len(spend), 1 / max(len(spend), 1))
+
+    # 3. Card ranking (single-card savings): rank correlation and top-k overlap with the baseline
+    ranks = _ranks(card_savings)
+    n_cards = card_savings.shape[1]
+    if n_cards > 1:
+        spearman = 1 - 6 * ((ranks - ranks[0]) ** 2).sum(axis=1) / (n_cards * (n_cards ** 2 - 1))
+    else:
+        spearman = np.ones(n)
+    k = min(top_k, n_cards)
+    in_top = ranks < k
+    top_kept = (in_top & in_top[0]).sum(axis=1) / max(k, 1)
+    leaders, led = np.unique(np.argmax(card_savings, axis=1), return_counts=True)
+
+    return {
+        'scenarios': n,
+        'savings': savings,
+        # Share of spend whose best card is the baseline's, averaged over scenarios
+        'recommendation_stability': round(float((same * weights).sum(axis=1).mean()), 4),
+        'classes': by_class,
+        'ranking': {
+            'spearman_mean': round(float(spearman.mean()), 4),
+            'spearman_min': round(float(spearman.min()), 4),
+            f'top{k}_kept': round(float(top_kept.mean()), 4),
+            'baseline_top': [cards[j] for j in np.argsort(ranks[0])[:k]],
+            'leader_share': {cards[j]: round(c / n, 4) for j, c in sorted(zip(leaders, led), key=lambda p: -p[1])},
+        },
+    }
+
+
+def run_sweep(transactions, cards, n=1000, extra_cards=None, **perturbation):
+    """One-call sweep: base + random_scenarios(**perturbation) + summary."""
+    base = build_scenario_base(transactions, cards, extra_cards)
+    report = summarize_sweep(base, sweep_scenarios(base, random_scenarios(base, n, **perturbation)))
+    log.info(f"🎲 {n} scenarios over {len(base['classes'])} spend classes x {len(base['cards'])} cards: "
+             f"savings ₹{report['savings']['p5']:,.2f}-₹{report['savings']['p95']:,.2f} (p5-p95), "
+             f"{report['recommendation_stability']:.0%} of spend keeps its card")
+    return report
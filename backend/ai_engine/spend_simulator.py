@@ -0,0 +1,257 @@
+import re
+import numpy as np
+import pandas as pd
+from .reward_engine import (best_cards_for_transactions, build_reward_matrix, card_display_names, encode_spend_classes,
+                            get_multiplier_index)
+from .compact import statement_dates, transaction_amounts
+
+# 'on 1.5L spend', 'on Rs 1 Lakh spend', 'on Rs 150000 spend'
+MILESTONE_SPEND = re.compile(r'(?:rs\.?\s*)?([\d.,]+)\s*(l|lakh|lakhs|k)?\s+spend', re.IGNORECASE)
+# 'Rs 1500 voucher' (INR) or '25000 EDGE Points' / '10000 Bonus Points' (points)
+MILESTONE_INR = re.compile(r'rs\.?\s*([\d.,]+)\s*(?:voucher|cashback)', re.IGNORECASE)
+MILESTONE_POINTS = re.compile(r'([\d.,]+)\s*(?:[a-z]+\s+)?points', re.IGNORECASE)
+
+# (row, card) entries simulated at once (~8 MB per float64 column); whole users per chunk
+CHUNK_ENTRIES = 1_000_000
+
+
+def _to_number(text, unit=None):
+    value = float(text.replace(',', ''))
+    unit = (unit or '').lower()
+    if unit in ('l', 'lakh', 'lakhs'):
+        return value * 100000
+    if unit == 'k':
+        return value * 1000
+    return value
+
+
+def parse_milestone(text, point_value_inr):
+    """
+    'Rs 1500 voucher on 1.5L spend'      -> (150000.0, 1500.0)
+    '25000 EDGE Points on Rs 1 Lakh spend' (0.4/pt) -> (100000.0, 10000.0)
+    Anything without a clear spend threshold -> None.
+    """
+    if not isinstance(text, str):
+        return None
+    spend = MILESTONE_SPEND.search(text)
+    if not spend:
+        return None
+    threshold = _to_number(spend.group(1), spend.group(2))
+
+    head = text[:spend.start()]
+    inr = MILESTONE_INR.search(head)
+    if inr:
+        return threshold, _to_number(inr.group(1))
+    points = MILESTONE_POINTS.search(head)
+    if points and point_value_inr == point_value_inr:
+        return threshold, _to_number(points.group(1)) * point_value_inr
+    return None
+
+
+def _card_terms(cards):
+    """Fees, waiver limits and parsed milestones per card (CardCatalog or DataFrame)."""
+    if hasattr(cards, 'records'):
+        fees, limits, values = cards.renewal_fees, cards.waiver_limits, cards.inr_values
+        milestone_text = [r.details.get('benefit_milestones') for r in cards.records]
+    else:
+        fees = cards['renewal_fee'].to_numpy(dtype=float)
+        limits = cards['waiver_spend_limit'].to_numpy(dtype=float)
+        values = cards['unified_reward_value_inr'].to_numpy(dtype=float)
+        milestone_text = cards['benefit_milestones'].tolist() if 'benefit_milestones' in cards else [None] * len(cards)
+
+    milestones = [parse_milestone(text, value) for text, value in zip(milestone_text, values)]
+    m_spend = np.array([m[0] if m else 0.0 for m in milestones])
+    m_bonus = np.array([m[1] if m else 0.0 for m in milestones])
+    return np.nan_to_num(np.asarray(fees, dtype=float)), np.nan_to_num(np.asarray(limits, dtype=float)), m_spend, m_bonus
+
+
+def _grouped_cumsum(values, group_ids):
+    """
+    Running total of 1-D `values` restarting for every group. Row order = time order.
+    Each group is summed on its own (no global running total minus an offset), so a
+    small account's total doesn't inherit the rounding error of everyone before it.
+    """
+    values = np.asarray(values, dtype=float)
+    if len(values) == 0:
+        return values
+    return pd.Series(values, copy=False).groupby(group_ids, sort=False).cumsum().to_numpy()
+
+
+def _crossings(cumulative, step, threshold):
+    """Rows where a running total first reaches `threshold` (> 0): it's >= now and was < before."""
+    return (threshold > 0) & (cumulative >= threshold) & (cumulative - step < threshold)
+
+
+def _user_chunks(user_codes, width, max_entries):
+    """[(start, stop)] row slices of whole users (rows sorted by user) holding ~max_entries (row, card) entries each."""
+    if len(user_codes) == 0:
+        return []
+    starts = np.flatnonzero(np.r_[True, user_codes[1:] != user_codes[:-1]])
+    # Chunk number of each user = entries before it // budget (a single huge user is a chunk of its own)
+    chunk_of_user = (starts * width) // max(max_entries, 1)
+    cuts = starts[np.flatnonzero(np.r_[True, chunk_of_user[1:] != chunk_of_user[:-1]])]
+    return list(zip(cuts, np.r_[cuts[1:], len(user_codes)]))
+
+
+def simulate_statement(transactions_df, cards, routing='solo', caps=None, user_col=None):
+    """
+    Time-ordered simulation of what each card REALLY earns over the statement,
+    including effects calculate_reward_inr can't see on a single transaction:
+      - fee waivers once cumulative spend reaches waiver_spend_limit
+      - milestone bonuses parsed from benefit_milestones ('Rs 1500 voucher on 1.5L spend')
+      - monthly reward caps per (card, category): caps={'Axis Ace': {'dining': 500}}
+    Running spend is tracked with grouped cumulative sums - no Python row loops -
+    so a year of data for thousands of users (user_col) is one vectorized pass.
+
+    routing: 'solo' = every card gets the whole statement (card-vs-card what-if)
+             'best' = each transaction goes on its best base-rate card
+                      (ties to the first card, as in optimize_spends)
+             array  = card index per transaction (e.g. from a wallet)
+
+    Work is flat (row, card) entries: one per row when routed, rows x cards for solo,
+    processed a bounded chunk of users at a time (CHUNK_ENTRIES).
+
+    Rows without a user (NaN in user_col) raise ValueError: their spend would
+    otherwise land on no one's accumulators.
+
+    Returns (summary_df, events_df).
+    """
+    df = transactions_df.reset_index(drop=True)
+    if user_col and df[user_col].isna().any():
+        raise ValueError(f"{int(df[user_col].isna().sum())} transaction(s) have no '{user_col}'.")
+    dates = statement_dates(df['date']) if 'date' in df else pd.Series(pd.NaT, index=df.index)
+    users = df[user_col].to_numpy() if user_col else np.zeros(len(df), dtype=int)
+    user_codes, user_labels = pd.factorize(users)
+
+    # 1. Time order (stable, per user)
+    order = np.lexsort((dates.to_numpy(), user_codes))
+    df, dates, user_codes = df.iloc[order].reset_index(drop=True), dates.iloc[order].reset_index(drop=True), user_codes[order]
+    if isinstance(routing, (np.ndarray, list, pd.Series)):
+        routing = np.asarray(routing)[order]
+
+    amounts = transaction_amounts(df)
+    cat_codes, categories = pd.factorize(df['category'], use_na_sentinel=False)
+    # Rates per (category, merchant) class, so merchant boosts ('swiggy') apply per row
+    index = get_multiplier_index(cards)
+    merchants = index.merchants_of(df['description']) if 'description' in df else np.full(len(df), None, dtype=object)
+    class_codes, class_categories, class_merchants = encode_spend_classes(df['category'], merchants)
+    matrix = build_reward_matrix(cards, class_categories, class_merchants, index=index)
+    rates = matrix['rates']
+    names = card_display_names(cards)
+    n_cards = len(names)
+    n_users = len(user_labels)
+    fees, limits, m_spend, m_bonus = _card_terms(cards)
+
+    solo = isinstance(routing, str) and routing == 'solo'
+    if not solo:
+        # 'best' = the reward engine's pick, so ties and float noise resolve exactly as in optimize_spends
+        assigned = (best_cards_for_transactions(amounts, class_codes, matrix)[0] if isinstance(routing, str)
+                    else routing.astype(int))
+
+    # Capped (card, category) pairs; month groups are only built when there are caps
+    capped_pairs = []
+    if caps:
+        lower_cats = [str(c).lower() for c in categories]
+        for j, name in enumerate(names):
+            for cat_name, cap in (caps.get(name) or caps.get(j) or {}).items():
+                if cat_name.lower() in lower_cats:
+                    capped_pairs.append((j, lower_cats.index(cat_name.lower()), float(cap)))
+    if capped_pairs:
+        # (user, month, category); undated rows are a month of their own per user
+        month_keys = pd.DataFrame({'user': user_codes, 'month': dates.dt.to_period('M'), 'category': cat_codes})
+        month_groups = month_keys.groupby(['user', 'month', 'category'], sort=False, dropna=False).ngroup().to_numpy()
+
+    names_arr = np.asarray(names, dtype=object)
+    user_names = np.asarray(user_labels, dtype=object)
+    date_values = dates.to_numpy()
+
+    def _events(rows, cols, label, thresholds):
+        return pd.DataFrame({
+            'User': user_names[user_codes[rows]],
+            'Card': names_arr[cols],
+            'Event': label,
+            'Date': date_values[rows],
+            'Threshold_INR': np.broadcast_to(np.asarray(thresholds, dtype=float), len(rows)),
+        })
+
+    # Per (user, card) accumulators, flat (n_users * n_cards)
+    size = n_users * n_cards
+    spend_total, reward_total, lost_total = np.zeros(size), np.zeros(size), np.zeros(size)
+    waived, reached = np.zeros(size, dtype=bool), np.zeros(size, dtype=bool)
+    waiver_dates = np.full(size, np.datetime64('NaT'), dtype='datetime64[ns]')
+    milestone_dates = np.full(size, np.datetime64('NaT'), dtype='datetime64[ns]')
+    events = [_events(np.array([], dtype=int), np.array([], dtype=int), '', 0.0)]
+
+    for start, stop in _user_chunks(user_codes, n_cards if solo else 1, CHUNK_ENTRIES):
+        # 2. (row, card) entries of this chunk, row-major: one per row when routed, every card for solo
+        if solo:
+            rows = np.repeat(np.arange(start, stop), n_cards)
+            cols = np.tile(np.arange(n_cards), stop - start)
+        else:
+            rows = np.arange(start, stop)
+            cols = assigned[start:stop]
+        spend = amounts[rows]
+        rewards = spend * rates[class_codes[rows], cols]
+        keys = user_codes[rows] * n_cards + cols
+        if solo:
+            # Every card sees the same spend, so one running total per user serves all of them
+            running = _grouped_cumsum(amounts[start:stop], user_codes[start:stop])[rows - start]
+        else:
+            running = _grouped_cumsum(spend, keys)
+
+        # 3. Monthly category caps (only the capped (card, category) pairs are touched)
+        if capped_pairs:
+            lost = np.zeros(len(rows))
+            for j, c, cap in capped_pairs:
+                hit = np.flatnonzero((cols == j) & (cat_codes[rows] == c))
+                raw = rewards[hit]
+                cum = _grouped_cumsum(raw, month_groups[rows[hit]])
+                capped = np.minimum(cum, cap) - np.minimum(cum - raw, cap)
+                lost[hit] = raw - capped
+                rewards[hit] = capped
+                cap_rows = rows[hit[_crossings(cum, raw, cap)]]
+                events.append(_events(cap_rows, np.full(len(cap_rows), j), 'monthly_cap_hit', cap))
+            lost_total += np.bincount(keys, weights=lost, minlength=size)
+
+        # 4. Threshold crossings: fee waivers + milestones
+        for thresholds, label, flags, first in ((limits, 'fee_waived', waived, waiver_dates),
+                                                (m_spend, 'milestone_reached', reached, milestone_dates)):
+            hits = np.flatnonzero(_crossings(running, spend, thresholds[cols]))
+            events.append(_events(rows[hits], cols[hits], label, thresholds[cols[hits]]))
+            flags[keys[hits]] = True
+            first[keys[hits]] = date_values[rows[hits]]
+
+        spend_total += np.bincount(keys, weights=spend, minlength=size)
+        reward_total += np.bincount(keys, weights=rewards, minlength=size)
+
+    events_df = pd.concat(events, ignore_index=True)
+    events_df = events_df.sort_values(['User', 'Date'], kind='stable').reset_index(drop=True)
+
+    # 5. Per (user, card) summary
+    bonus = np.where(reached, np.tile(m_bonus, n_users), 0.0)
+    fee = np.where(waived, 0.0, np.tile(fees, n_users))
+    net = reward_total + bonus - fee
+    with np.errstate(divide='ignore', invalid='ignore'):
+        yield_pct = np.where(spend_total > 0, net / spend_total * 100, 0.0)
+
+    summary = pd.DataFrame({
+        'User': np.repeat(user_names, n_cards),
+        'Card': np.tile(names_arr, n_users),
+        'Spend_INR': spend_total.round(2),
+        'Rewards_INR': reward_total.round(2),
+        'Capped_Rewards_Lost_INR': lost_total.round(2),
+        'Milestone_Bonus_INR': bonus.round(2),
+        'Milestone_Date': milestone_dates,
+        'Fee_INR': fee.round(2),
+        'Fee_Waived': waived,
+        'Waiver_Date': waiver_dates,
+        'Net_INR': net.round(2),
+        'Effective_Yield_Pct': yield_pct.round(3),
+    })
+    # Routed modes only report the cards that actually carried spend
+    if not solo:
+        summary = summary[spend_total > 0].reset_index(drop=True)
+    if not user_col:
+        summary = summary.drop(columns='User')
+        events_df = events_df.drop(columns='User')
+    return summary, events_df
@@ -0,0 +1,206 @@
+import hashlib
+import json
+import os
+import shutil
+import time
+from functools import partial
+import numpy as np
+import pandas as pd
+
+from .instrumentation import get_logger, stage as pipeline_stage
+
+log = get_logger('statement_cache')
+
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '.statement_cache')
+MAX_CACHE_BYTES = 512 * 1024 * 1024
+MAX_CACHE_AGE_DAYS = 30
+
+
+def file_content_hash(file_path, block_size=1 << 20):
+    """SHA-256 of the statement's bytes - renaming or re-uploading the same file is still a hit."""
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def source_version(*modules):
+    """Hash of the code that produced a frame. Edit a parser -> old entries stop matching."""
+    digest = hashlib.sha1()
+    for module in modules:
+        with open(module.__file__, 'rb') as f:
+            digest.update(f.read())
+    return digest.hexdigest()[:12]
+
+
+# --- Columnar on-disk format: one memory-mappable .npy per column ---
+def save_frame(df, entry_dir):
+    """
+    Numeric / datetime columns are stored as raw .npy arrays (tz-aware ones as UTC + the zone name).
+    All-str text columns are dictionary-encoded: int32 codes (.npy) + the unique values in meta.json.
+    Anything else (categoricals, objects holding dates / numbers / mixed types) is pickled
+    as-is, so it comes back with the same values and types.
+    Written to a temp dir first and renamed, so readers never see half an entry.
+    """
+    tmp_dir = f"{entry_dir}.tmp-{os.getpid()}"
+    os.makedirs(tmp_dir, exist_ok=True)
+    meta = {'columns': [], 'rows': len(df)}
+
+    for i, col in enumerate(df.columns):
+        series = df[col]
+        file_name = f"col_{i}.npy"
+        if isinstance(series.dtype, pd.DatetimeTZDtype):
+            # tz-aware -> UTC datetime64 (to_numpy() would give Timestamp objects, which can't be mmapped); zone in meta
+            utc = series.dt.tz_convert('UTC').dt.tz_localize(None)
+            np.save(os.path.join(tmp_dir, file_name), utc.to_numpy())
+            meta['columns'].append({'name': col, 'kind': 'array', 'file': file_name, 'dtype': str(utc.dtype),
+                                    'tz': str(series.dt.tz)})
+        elif series.dtype.kind in 'biufcmM':
+            np.save(os.path.join(tmp_dir, file_name), series.to_numpy())
+            meta['columns'].append({'name': col, 'kind': 'array', 'file': file_name, 'dtype': str(series.dtype)})
+        else:
+            codes, uniques = pd.factorize(series)
+            if isinstance(series.dtype, pd.CategoricalDtype) or not all(isinstance(v, str) for v in uniques):
+                file_name = f"col_{i}.pkl"
+                series.to_pickle(os.path.join(tmp_dir, file_name))
+                meta['columns'].append({'name': col, 'kind': 'pickle', 'file': file_name})
+                continue
+            np.save(os.path.join(tmp_dir, file_name), codes.astype(np.int32))
+            meta['columns'].append({
+                'name': col, 'kind': 'dictionary', 'file': file_name, 'dtype': str(series.dtype),
+                'values': list(uniques)
+            })
+
+    with open(os.path.join(tmp_dir, 'meta.json'), 'w') as f:
+        json.dump(meta, f)
+
+    shutil.rmtree(entry_dir, ignore_errors=True)
+    os.replace(tmp_dir, entry_dir)
+
+
+def load_frame(entry_dir):
+    """Memory-maps every column back in. Numeric columns are zero-copy reads; pickled ones are plain reads."""
+    with open(os.path.join(entry_dir, 'meta.json')) as f:
+        meta = json.load(f)
+
+    data = {}
+    for col in meta['columns']:
+        if col['kind'] == 'pickle':
+            data[col['name']] = pd.read_pickle(os.path.join(entry_dir, col['file'])).reset_index(drop=True)
+            continue
+        arr = np.load(os.path.join(entry_dir, col['file']), mmap_mode='r')
+        if col['kind'] == 'array':
+            data[col['name']] = pd.Series(arr, dtype=col['dtype'], copy=False)
+            if col.get('tz'):
+                data[col['name']] = data[col['name']].dt.tz_localize('UTC').dt.tz_convert(col['tz'])
+        else:
+            # code -1 = missing value -> lands on the trailing None
+            values = np.array(col['values'] + [None], dtype=object)
+            data[col['name']] = pd.Series(values[arr], dtype=col['dtype'])
+
+    return pd.DataFrame(data, index=pd.RangeIndex(meta['rows']))
+
+
+# --- Eviction ---
+def _entry_size(entry_dir):
+    return sum(os.path.getsize(os.path.join(entry_dir, f)) for f in os.listdir(entry_dir))
+
+
+def evict_old_entries(cache_dir=CACHE_DIR, max_bytes=MAX_CACHE_BYTES, max_age_days=MAX_CACHE_AGE_DAYS):
+    """Drops entries older than max_age_days, then least-recently-used ones until under max_bytes."""
+    if not os.path.isdir(cache_dir):
+        return
+    now = time.time()
+    entries = []
+    for name in os.listdir(cache_dir):
+        path = os.path.join(cache_dir, name)
+        if not os.path.isdir(path) or '.tmp-' in name:
+            continue
+        last_used = os.path.getmtime(path)
+        if now - last_used > max_age_days * 86400:
+            shutil.rmtree(path, ignore_errors=True)
+            continue
+        entries.append((last_used, _entry_size(path), path))
+
+    total = sum(size for _, size, _ in entries)
+    for _, size, path in sorted(entries):
+        if total <= max_bytes:
+            break
+        shutil.rmtree(path, ignore_errors=True)
+        total -= size
+
+
+def cached_frame(file_path, stage, version, compute, cache_dir=CACHE_DIR):
+    """
+    Content-addressed cache in front of any 'file -> DataFrame' stage.
+    Key = file bytes hash + stage name + code version. compute() only runs on a miss.
+    """
+    with pipeline_stage(f"cached_frame:{stage}") as record:
+        key = hashlib.sha256(f"{file_content_hash(file_path)}:{stage}:{version}".encode()).hexdigest()[:32]
+        entry_dir = os.path.join(cache_dir, key)
+
+        if os.path.isfile(os.path.join(entry_dir, 'meta.json')):
+            try:
+                df = load_frame(entry_dir)
+                os.utime(entry_dir)  # mark as recently used for LRU eviction
+                log.info(f"⚡ Statement cache hit ({stage}): {len(df)} rows loaded from disk.")
+                record.count(statement_cache_hits=1)
+                record.rows_out = len(df)
+                return df
+            except Exception as e:
+                log.warning(f"⚠️ Corrupt cache entry, rebuilding: {e}")
+                shutil.rmtree(entry_dir, ignore_errors=True)
+
+        record.count(statement_cache_misses=1)
+        df = compute(file_path)
+        record.rows_out = 0 if df is None else len(df)
+        if df is not None and not df.empty:
+            try:
+                os.makedirs(cache_dir, exist_ok=True)
+                save_frame(df.reset_index(drop=True), entry_dir)
+                evict_old_entries(cache_dir)
+            except OSError as e:
+                log.warning(f"⚠️ Could not write statement cache: {e}")
+        return df
+
+
+# --- Cached versions of the pipeline stages ---
+def _categorization_modules():
+    """Code a 'category' column depends on: keyword rules and merchant keys (normalize_merchant, NOISE_TOKEN)."""
+    from . import categorizer, merchant_cache
+    return categorizer, merchant_cache
+
+
+def cached_parse_user_transactions(file_path):
+    import parsers.excel_parser as excel_parser
+    return cached_frame(file_path, 'excel', source_version(excel_parser), excel_parser.parse_user_transactions)
+
+
+def cached_parse_pdf_statement(file_path):
+    import parsers.pdf_parser as pdf_parser
+    import parsers.pdf_layout as pdf_layout
+    return cached_frame(file_path, 'pdf', source_version(pdf_parser, pdf_layout), pdf_parser.parse_pdf_statement)
+
+
+# strict=True: a parse error raises (failures are never cached, so the key doesn't depend on it)
+def cached_ai_categorization(file_path, strict=False):
+    import parsers.excel_parser as excel_parser
+    from . import categorizer
+    version = f"{source_version(excel_parser, *_categorization_modules())}-{categorizer.CATEGORIZER_VERSION}"
+    return cached_frame(file_path, 'categorized', version, partial(categorizer.run_ai_categorization, strict=strict))
+
+
+def cached_pdf_categorization(file_path, strict=False):
+    import parsers.pdf_parser as pdf_parser
+    import parsers.pdf_layout as pdf_layout
+    from . import categorizer
+
+    def parse_and_categorize(path):
+        df = pdf_parser.parse_pdf_statement(path, strict=strict)
+        if df is not None and not df.empty:
+            df['category'] = categorizer.categorize_descriptions(df['description'])
+        return df
+
+    version = f"{source_version(pdf_parser, pdf_layout, *_categorization_modules())}-{categorizer.CATEGORIZER_VERSION}"
+    return cached_frame(file_path, 'categorized_pdf', version, parse_and_categorize)
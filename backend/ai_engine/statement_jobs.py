@@ -0,0 +1,250 @@
+"""
+Background statement jobs for interactive front-ends (the Streamlit app).
+
+An upload becomes a StatementJob on a small thread pool: parse + categorize,
+then optimize in row chunks. After every step the job publishes a snapshot -
+category spend first, then savings and the top-N table as chunks finish - so
+the UI renders partial results while the rest is still computing.
+
+Finished statements stay in a process-wide LRU keyed by upload hash and bounded
+by their real in-memory size (not entry count), so many sessions uploading big
+statements can't pile them up in RAM. Sessions only keep the statement id; an
+evicted statement is still readable from the results store.
+"""
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from .card_catalog import get_card_catalog, DEFAULT_DB_PATH
+from .results_store import get_results_store, DEFAULT_RESULTS_DB
+from .statement_loader import SUPPORTED_FORMATS, load_statement
+from .instrumentation import get_logger
+
+log = get_logger('statement_jobs')
+
+# Same content-addressed upload folder the HTTP service writes to
+UPLOAD_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '.uploads')
+CHUNK_ROWS = 20000
+TOP_N = 10
+MAX_RESULT_BYTES = 256 * 1024 * 1024
+MAX_CACHED_STATEMENTS = 1000   # also caps snapshot-only entries, which weigh ~nothing
+JOB_WORKERS = 2
+
+
+class StatementJob:
+    """
+    One statement moving through parse -> categorize -> optimize.
+    snapshot() is what the UI reads; it's replaced (never mutated) under the lock,
+    so a reader always sees one consistent step.
+    """
+
+    def __init__(self, statement_id, path, filename):
+        self.statement_id = statement_id
+        self.path = path
+        self.filename = filename
+        self.transactions = None   # compact frame, once categorized
+        self.result = None         # optimize_compact result, once every chunk is done
+        self.nbytes = 0
+        self.submitted = time.time()
+        self._lock = threading.Lock()
+        self._snapshot = {'status': 'queued', 'progress': 0.0, 'message': "Waiting for a worker...",
+                          'rows': 0, 'rows_done': 0, 'categories': [], 'top': [], 'total_savings': None,
+                          'error': None}
+
+    def snapshot(self):
+        with self._lock:
+            return self._snapshot
+
+    def publish(self, **changes):
+        with self._lock:
+            self._snapshot = {**self._snapshot, **changes}
+
+    @property
+    def status(self):
+        return self.snapshot()['status']
+
+    @property
+    def finished(self):
+        return self.status in ('done', 'empty', 'failed')
+
+
+def category_table(spend, saved):
+    """Per-category rows in ResultsStore.category_summary's layout (biggest savings first)."""
+    rows = [{'Category': str(category), 'Transactions': int(spend['transactions'][category]),
+             'Spend_INR': round(float(spend['spend'][category]), 2),
+             'Saved_INR': round(float(saved.get(category, 0.0)), 2)}
+            for category in spend.index]
+    return sorted(rows, key=lambda r: (-r['Saved_INR'], r['Category']))
+
+
+def upload_statement_id(data):
+    """Statement id of uploaded bytes: same content, same id, whatever the file is called."""
+    return hashlib.sha256(data).hexdigest()[:24]
+
+
+class StatementJobRunner:
+    """
+    Thread-pool job runner + memory-bounded LRU of finished statements.
+    One per process (the app keeps it in st.cache_resource), shared by every session.
+    """
+
+    def __init__(self, workers=JOB_WORKERS, max_bytes=MAX_RESULT_BYTES, db_path=DEFAULT_DB_PATH,
+                 results_db=DEFAULT_RESULTS_DB, upload_dir=UPLOAD_DIR, chunk_rows=CHUNK_ROWS):
+        self.max_bytes = max_bytes
+        self.db_path = db_path
+        self.results_db = results_db
+        self.upload_dir = upload_dir
+        self.chunk_rows = chunk_rows
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='statement-job')
+        self._lock = threading.Lock()
+        self._running = {}
+        self._finished = OrderedDict()   # statement_id -> StatementJob, least recently used first
+        self.cached_bytes = 0
+        self.evictions = 0
+
+    # --- Submitting ---
+    def submit_upload(self, data, filename):
+        """Raw uploaded bytes -> statement_id. Same bytes (any session, any name) share one job."""
+        ext = os.path.splitext(filename)[1].lower()
+        if ext not in SUPPORTED_FORMATS:
+            raise ValueError(f"Unsupported file type '{ext}'. Use one of {', '.join(SUPPORTED_FORMATS)}.")
+        statement_id = upload_statement_id(data)
+        path = os.path.join(self.upload_dir, statement_id + ext)
+        if not os.path.isfile(path):
+            os.makedirs(self.upload_dir, exist_ok=True)
+            tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp, 'wb') as f:
+                f.write(data)
+            os.replace(tmp, path)
+        return self._submit(statement_id, path, filename)
+
+    def submit_file(self, path, statement_id=None):
+        from .statement_cache import file_content_hash
+        statement_id = statement_id or file_content_hash(path)[:24]
+        return self._submit(statement_id, path, os.path.basename(path))
+
+    def _submit(self, statement_id, path, filename):
+        with self._lock:
+            if statement_id in self._running:
+                return statement_id
+            job = self._finished.get(statement_id)
+            if job is not None and job.status != 'failed':
+                self._finished.move_to_end(statement_id)
+                return statement_id
+            if job is not None:
+                self._forget(statement_id)
+            job = StatementJob(statement_id, path, filename)
+            self._running[statement_id] = job
+        self._pool.submit(self._run, job)
+        return statement_id
+
+    # --- Reading ---
+    def get(self, statement_id):
+        """The running or cached job for statement_id, or None (never submitted / evicted)."""
+        with self._lock:
+            job = self._running.get(statement_id)
+            if job is None:
+                job = self._finished.get(statement_id)
+                if job is not None:
+                    self._finished.move_to_end(statement_id)
+            return job
+
+    def stats(self):
+        with self._lock:
+            return {'running': len(self._running), 'cached': len(self._finished),
+                    'cached_bytes': self.cached_bytes, 'max_bytes': self.max_bytes, 'evictions': self.evictions}
+
+    def shutdown(self):
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+    # --- LRU ---
+    def _forget(self, statement_id):
+        job = self._finished.pop(statement_id)
+        self.cached_bytes -= job.nbytes
+
+    def _retire(self, job):
+        from .compact import frame_bytes
+
+        if job.transactions is not None:
+            job.nbytes = frame_bytes(job.transactions) + (frame_bytes(job.result) if job.result is not None else 0)
+        with self._lock:
+            self._running.pop(job.statement_id, None)
+            if job.nbytes > self.max_bytes:
+                # Bigger than the whole budget: keep only the (small) snapshot, drop the frames
+                job.transactions = job.result = None
+                job.nbytes = 0
+            self._finished[job.statement_id] = job
+            self.cached_bytes += job.nbytes
+            # Least recently used first; the job just finished is the newest entry
+            while ((self.cached_bytes > self.max_bytes or len(self._finished) > MAX_CACHED_STATEMENTS)
+                   and len(self._finished) > 1):
+                evicted_id = next(iter(self._finished))
+                self._forget(evicted_id)
+                self.evictions += 1
+                log.info(f"♻️ Evicted statement {evicted_id} from the result cache "
+                         f"({self.cached_bytes / 1e6:.1f} MB of {self.max_bytes / 1e6:.0f} MB in use)")
+
+    # --- The job itself (worker thread) ---
+    def _run(self, job):
+        try:
+            self._compute(job)
+        except Exception as e:
+            log.exception(f"❌ Statement job {job.statement_id} ({job.filename}) failed: {e}")
+            job.publish(status='failed', message="Processing failed.", error=str(e))
+        finally:
+            self._retire(job)
+
+    def _compute(self, job):
+        import pandas as pd
+        from .chat_agent import optimize_compact, render_optimized
+        from .compact import to_compact, transaction_amounts
+
+        # 1. Parse + categorize (one step: the parsers have no finer progress to report)
+        job.publish(status='parsing', progress=0.05, message=f"Reading {job.filename}...")
+        # strict: an unreadable file raises -> 'failed' with the parser's error, not 'empty'
+        df = to_compact(load_statement(job.path, strict=True))
+        if df is None or df.empty:
+            job.publish(status='empty', progress=1.0, message="No debit transactions found in this statement.")
+            return
+        df = df.reset_index(drop=True)
+        job.transactions = df
+        n = len(df)
+
+        # 2. First partial result: what was spent where (savings still 0)
+        amounts = transaction_amounts(df)
+        categories = df['category'].astype(str)
+        spend = pd.DataFrame({'spend': amounts, 'transactions': 1}).groupby(categories.to_numpy()).sum()
+        saved = pd.Series(0.0, index=spend.index)
+        job.publish(status='optimizing', progress=0.3, rows=n, message=f"Optimizing {n:,} transactions...",
+                    categories=category_table(spend, saved))
+
+        # 3. Optimize chunk by chunk; savings + the top-N table grow as chunks land
+        cards = get_card_catalog(self.db_path)
+        chunks, top = [], None
+        for start in range(0, n, self.chunk_rows):
+            chunk = df.iloc[start:start + self.chunk_rows]
+            result, _ = optimize_compact(chunk, cards)
+            chunks.append(result)
+            saved = saved.add(result['saved_inr'].groupby(categories.iloc[start:start + len(chunk)].to_numpy()).sum(),
+                              fill_value=0.0)
+            # Earlier chunks come first, so ties keep statement order
+            candidates = result if top is None else pd.concat([top, result.nlargest(TOP_N, 'saved_inr', keep='first')])
+            top = candidates.nlargest(TOP_N, 'saved_inr', keep='first')
+            done = start + len(chunk)
+            job.publish(progress=0.3 + 0.7 * done / n, rows_done=done,
+                        message=f"Optimized {done:,} of {n:,} transactions...",
+                        categories=category_table(spend, saved),
+                        top=render_optimized(df, top, top.index).to_dict(orient='records'))
+
+        # 4. Whole-statement total (one cumsum, same as a single optimize_compact) + persist for other readers
+        job.result = result = pd.concat(chunks)
+        total = float(result['saved_inr'].to_numpy().cumsum()[-1])
+        store = get_results_store(self.results_db)
+        store.save_results(job.statement_id, df, result, total)
+        # Final table straight from the store, so it matches what evicted statements show later
+        job.publish(status='done', progress=1.0, message=f"Optimized {n:,} transactions.", total_savings=total,
+                    categories=store.category_summary(job.statement_id))
+        log.info(f"✅ Statement {job.statement_id} ({job.filename}): {n} rows, ₹{total:.2f} potential savings")
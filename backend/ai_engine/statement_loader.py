@@ -0,0 +1,36 @@
+"""
+Statement file -> categorized frame, shared by every front-end that reads uploads:
+the HTTP workers (server.py), the nightly batch (batch.py) and the Streamlit jobs.
+
+    df = load_statement(path)                 # None / empty = nothing to optimize
+    df = load_statement(path, strict=True)    # an unreadable file raises instead
+
+Results come from the on-disk statement cache, keyed by file content.
+"""
+from .card_catalog import get_card_catalog
+from .instrumentation import configure_logging
+
+# No legacy .xls: the Excel parser reads with openpyxl, which only opens .xlsx
+SUPPORTED_FORMATS = ('.xlsx', '.csv', '.pdf')
+
+
+class StatementReadError(ValueError):
+    """A statement file the parser couldn't read. Carries only the message, so it crosses process pools."""
+
+
+def init_worker(db_path):
+    """Process-pool initializer: logging + the catalog snapshot, loaded once per worker (jobs only read it)."""
+    configure_logging()
+    get_card_catalog(db_path)
+
+
+def load_statement(path, strict=False):
+    """
+    Parsed + categorized statement. A statement that parses but has no debits is
+    None / empty either way; with strict=True a file the parser can't read raises
+    (the parser's own error) rather than looking like an empty statement.
+    """
+    from .statement_cache import cached_ai_categorization, cached_pdf_categorization
+    if path.lower().endswith('.pdf'):
+        return cached_pdf_categorization(path, strict=strict)
+    return cached_ai_categorization(path, strict=strict)
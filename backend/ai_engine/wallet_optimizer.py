@@ -0,0 +1,159 @@
+import numpy as np
+import pandas as pd
+from .reward_engine import build_reward_matrix, card_display_names, encode_spend_classes, get_multiplier_index
+from .compact import statement_dates, transaction_amounts
+
+
+def category_spend(transactions_df, cards, annualize=True):
+    """
+    Total spend per (category, merchant) class - the same classes optimize_spends
+    scores, so merchant keys ('swiggy') count - optionally scaled up to a full year
+    using the statement's own date span (a 3-month statement counts x4).
+    Returns (spend, categories, merchants, factor); merchants[c] is None for plain category spend.
+    """
+    index = get_multiplier_index(cards)
+    merchants = index.merchants_of(transactions_df['description'])
+    codes, categories, merchant_labels = encode_spend_classes(transactions_df['category'], merchants)
+    spend = np.bincount(codes, weights=transaction_amounts(transactions_df), minlength=len(categories))
+
+    factor = 1.0
+    if annualize and 'date' in transactions_df.columns:
+        dates = statement_dates(transactions_df['date']).dropna()
+        if not dates.empty:
+            span_days = (dates.max() - dates.min()).days + 1
+            factor = 365.0 / max(span_days, 1)
+    return spend * factor, categories, merchant_labels, factor
+
+
+def fee_arrays(cards, first_year=False):
+    """(annual fee, waiver spend limit) per card, from a CardCatalog or a cards DataFrame."""
+    if hasattr(cards, 'records'):
+        fees = cards.joining_fees if first_year else cards.renewal_fees
+        limits = cards.waiver_limits
+    else:
+        fees = cards['joining_fee' if first_year else 'renewal_fee'].to_numpy(dtype=float)
+        limits = cards['waiver_spend_limit'].to_numpy(dtype=float)
+    # Missing fee data counts as free / never waived
+    return np.nan_to_num(np.asarray(fees, dtype=float)), np.nan_to_num(np.asarray(limits, dtype=float))
+
+
+class _WalletSearch:
+    """
+    Branch-and-bound over k-card wallets.
+    value[c, j] = annual reward if ALL of spend class c's spend goes on card j.
+    A wallet routes each class to its best card; a card's fee is waived
+    once the spend routed to it reaches its waiver_spend_limit.
+    """
+
+    def __init__(self, value, spend, fees, limits, k, max_nodes):
+        self.value, self.spend, self.fees, self.limits = value, spend, fees, limits
+        self.k, self.max_nodes = k, max_nodes
+        self.nodes = 0
+        self.complete = True
+        self.best_net, self.best_wallet = 0.0, []  # the empty wallet is always an option
+
+        # Try strong standalone cards first so good incumbents appear early
+        standalone = np.array([self.evaluate([j])[0] for j in range(value.shape[1])])
+        self.order = np.argsort(-standalone, kind='stable')
+
+    def evaluate(self, wallet):
+        """Returns (net, rewards, fees_paid, route, routed_spend) for a list of card indexes."""
+        sub = self.value[:, wallet]
+        route = np.argmax(sub, axis=1)
+        rewards = sub[np.arange(len(route)), route].sum()
+        routed = np.bincount(route, weights=self.spend, minlength=len(wallet))
+        limits = self.limits[wallet]
+        waived = (limits > 0) & (routed >= limits)
+        fees_paid = self.fees[wallet][~waived].sum()
+        return rewards - fees_paid, rewards, fees_paid, route, routed
+
+    def upper_bound(self, cur_best, cur_net, slots, start):
+        """
+        Optimistic net value of any wallet that extends the current one with up
+        to `slots` cards from order[start:]. Rewards are submodular (a max per
+        category), so the gain of several cards is at most the sum of their
+        individual gains. Fees can only grow: existing cards lose routed spend
+        (waivers can only be lost) and new cards never pay less than 0.
+        """
+        remaining = self.value[:, self.order[start:]]
+        if remaining.shape[1] == 0:
+            return cur_net
+        gains = np.clip(remaining - cur_best[:, None], 0, None)
+        # Bound 1: the best card per category; Bound 2: top-`slots` individual gains
+        per_category = gains.max(axis=1).sum()
+        individual = gains.sum(axis=0)
+        if slots < len(individual):
+            individual = np.partition(individual, -slots)[-slots:]
+        return cur_net + min(per_category, individual.sum())
+
+    def search(self, wallet=(), cur_best=None, cur_net=0.0, start=0):
+        if cur_best is None:
+            cur_best = np.zeros(self.value.shape[0])
+        for i in range(start, len(self.order)):
+            if self.nodes >= self.max_nodes:
+                self.complete = False
+                return
+            # Bounds only shrink as `i` moves right, so one failed bound ends the loop
+            if self.upper_bound(cur_best, cur_net, self.k - len(wallet), i) <= self.best_net + 1e-9:
+                return
+            child = list(wallet) + [int(self.order[i])]
+            self.nodes += 1
+            net = self.evaluate(child)[0]
+            if net > self.best_net + 1e-9:
+                self.best_net, self.best_wallet = net, child
+            if len(child) < self.k:
+                child_best = np.maximum(cur_best, self.value[:, child[-1]]) if wallet else self.value[:, child[-1]]
+                self.search(child, child_best, net, i + 1)
+
+
+def optimize_wallet(transactions_df, cards, k=2, annualize=True, first_year=False, max_nodes=1_000_000):
+    """
+    Portfolio mode: finds the k-card wallet (at most k cards) with the highest
+    NET annual value = rewards - fees that the routed spend does not waive.
+    Each (category, merchant) spend class is routed to the wallet's best-rate card for it.
+
+    Returns a dict with the chosen wallet, per-card routed spend (DataFrame),
+    gross rewards, fees paid, net savings and search stats.
+    """
+    spend, categories, merchants, factor = category_spend(transactions_df, cards, annualize)
+    matrix = build_reward_matrix(cards, categories, merchants, index=get_multiplier_index(cards))
+    labels = [str(c) if pd.isna(m) else f"{c} ({m})" for c, m in zip(categories, merchants)]
+    value = spend[:, None] * matrix['rates']
+    fees, limits = fee_arrays(cards, first_year)
+    names = card_display_names(cards)
+
+    searcher = _WalletSearch(value, spend, fees, limits, max(int(k), 0), max_nodes)
+    if searcher.k > 0 and value.shape[1] > 0:
+        searcher.search()
+
+    wallet = searcher.best_wallet
+    rows = []
+    net = rewards = fees_paid = 0.0
+    if wallet:
+        net, rewards, fees_paid, route, routed = searcher.evaluate(wallet)
+        for slot, j in enumerate(wallet):
+            mask = route == slot
+            waived = bool(limits[j] > 0 and routed[slot] >= limits[j])
+            card_rewards = float(value[mask, j].sum())
+            rows.append({
+                "Card": names[j],
+                "Categories": ", ".join(label for label, m in zip(labels, mask) if m),
+                "Routed_Spend_INR": round(float(routed[slot]), 2),
+                "Rewards_INR": round(card_rewards, 2),
+                "Annual_Fee_INR": round(float(fees[j]), 2),
+                "Fee_Waived": waived,
+                "Net_INR": round(card_rewards - (0.0 if waived else float(fees[j])), 2),
+            })
+
+    return {
+        "wallet": [names[j] for j in wallet],
+        "card_indexes": wallet,
+        "routed_spend": pd.DataFrame(rows, columns=["Card", "Categories", "Routed_Spend_INR", "Rewards_INR",
+                                                    "Annual_Fee_INR", "Fee_Waived", "Net_INR"]),
+        "gross_rewards": float(rewards),
+        "fees_paid": float(fees_paid),
+        "net_savings": float(net),
+        "annualization_factor": factor,
+        "nodes_explored": searcher.nodes,
+        "optimal": searcher.complete,
+    }
@@ -1,45 +1,112 @@
-import streamlit as st
 import pandas as pd
-import sys
-import os
-import json
-import re
+import streamlit as st
 
 # --- ARCHITECTURE LINKING ---
-sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), 'ai_engine')))
-from ai_engine.categorizer import run_ai_categorization
-from ai_engine.chat_agent import load_cards_from_db, optimize_spends
+# `streamlit run app.py` puts this folder on sys.path, so the packages import directly
+from ai_engine.chat_agent import SAMPLE_STATEMENT
+from ai_engine.card_catalog import get_card_catalog
+from ai_engine.query_engine import universal_query_engine, CHAT_ROUTER
+from ai_engine.results_store import get_results_store
+from ai_engine.statement_jobs import StatementJobRunner, TOP_N, upload_statement_id
+from ai_engine.statement_loader import SUPPORTED_FORMATS
+from ai_engine.instrumentation import configure_logging
+
+configure_logging()
+
+POLL_SECONDS = 0.5
 
 # --- 1. UI CONFIG ---
 st.set_page_config(page_title="AI Card Optimizer Pro", page_icon="💳", layout="wide")
 st.title("💳 AI Credit Card Optimizer")
 st.markdown("*A Data-Driven Decision Engine for Personal Finance Optimization*")
 
-# --- 2. THE DATA PIPELINE (100% Live Sync) ---
-@st.cache_data
-def load_and_verify_data():
-    try:
-        excel_path = "../data_samples/transactions.xlsx"
-        user_data = run_ai_categorization(excel_path)
-        cards_data = load_cards_from_db()
-        if user_data is not None and cards_data is not None:
-            opt_df, total_savings = optimize_spends(user_data, cards_data)
-            opt_df = opt_df.rename(columns={'Saved_INR': 'Potential_Savings_INR'})
-            return opt_df, total_savings, cards_data
-        return None, 0.0, None
-    except Exception as e:
-        st.error(f"Data Sync Failed: {e}")
-        return None, 0.0, None
-
-opt_df, total_savings, full_cards_db = load_and_verify_data()
+# --- 2. THE DATA PIPELINE (background jobs - a rerun never waits on parsing) ---
+@st.cache_resource
+def get_statement_jobs():
+    # One runner per server process: every session shares its workers and its memory-bounded result LRU
+    return StatementJobRunner()
+
+jobs = get_statement_jobs()
+results = get_results_store()
+
+def statement_view(statement_id):
+    """(snapshot, running) for a statement: the live/cached job, else what the results store kept."""
+    job = jobs.get(statement_id)
+    if job is not None:
+        return job.snapshot(), not job.finished
+    if results.has_statement(statement_id):
+        # Evicted from memory (or computed by another process) - summaries come from SQLite indexes
+        return {'status': 'done', 'progress': 1.0, 'message': '', 'error': None,
+                'total_savings': results.total_savings(statement_id),
+                'categories': results.category_summary(statement_id),
+                'top': results.top_savings(TOP_N, statement_id)}, False
+    return None, False
+
+def needs_submit(source):
+    if st.session_state.get("statement_source") != source:
+        return True
+    statement_id = st.session_state.statement_id
+    # Evicted from memory and never stored (empty / failed statements): run it again
+    return statement_id is not None and jobs.get(statement_id) is None and not results.has_statement(statement_id)
+
+def live(render, running):
+    # Only the fragment re-runs while its job is working; the page (and the chat) stay responsive
+    st.fragment(run_every=POLL_SECONDS if running else None)(render)()
 
 # --- 3. SIDEBAR (Personalized Audit) ---
 with st.sidebar:
     st.header("📊 Spending Insights")
-    if opt_df is not None:
-        st.success(f"**Potential Savings: ₹{total_savings:.2f}**")
-        summary = opt_df.groupby('Category')['Potential_Savings_INR'].sum().reset_index()
-        st.dataframe(summary.sort_values(by='Potential_Savings_INR', ascending=False), hide_index=True)
+    uploaded = st.file_uploader("Upload your statement", type=[ext.lstrip('.') for ext in SUPPORTED_FORMATS])
+    data = uploaded.getvalue() if uploaded is not None else None
+    # Keyed on the bytes: an edited file re-uploaded under the same name and size is a new statement
+    source = upload_statement_id(data) if uploaded is not None else SAMPLE_STATEMENT
+    if needs_submit(source):
+        try:
+            # Content-addressed: the same file from any session joins the same job / cached result
+            st.session_state.statement_id = (jobs.submit_upload(data, uploaded.name)
+                                              if uploaded is not None else jobs.submit_file(SAMPLE_STATEMENT))
+            st.session_state.statement_source = source
+        except Exception as e:
+            st.error(f"Data Sync Failed: {e}")
+            st.session_state.statement_source, st.session_state.statement_id = source, None
+
+    statement_id = st.session_state.statement_id
+    _, running = statement_view(statement_id)
+
+    def render_insights():
+        snapshot, still_running = statement_view(statement_id)
+        if snapshot is None:
+            return
+        if still_running:
+            st.progress(snapshot['progress'], text=snapshot['message'])
+        elif running:
+            st.rerun()  # just finished: one full rerun turns polling off
+        elif snapshot['status'] != 'done':
+            st.warning(snapshot['error'] or snapshot['message'])
+            return
+        if snapshot['total_savings'] is not None:
+            st.success(f"**Potential Savings: ₹{snapshot['total_savings']:.2f}**")
+        if snapshot['categories']:
+            # First partial result: spend per category, savings filling in chunk by chunk
+            summary = pd.DataFrame(snapshot['categories'], columns=['Category', 'Saved_INR'])
+            st.dataframe(summary.rename(columns={'Saved_INR': 'Potential_Savings_INR'}), hide_index=True)
+
+    live(render_insights, running)
+
+def top_savings_table(snapshot):
+    clean_table = pd.DataFrame(snapshot['top'])
+    clean_table = clean_table.rename(columns={'Saved_INR': 'Potential_Savings_INR'})
+    clean_table.index += 1
+    return clean_table[['Category', 'Amount', 'Recommended_Card', 'Potential_Savings_INR']]
+
+if running:
+    def render_progress():
+        snapshot, still_running = statement_view(statement_id)
+        if snapshot and still_running and snapshot['top']:
+            st.caption(f"⏳ {snapshot['message']} Top savings so far:")
+            st.table(top_savings_table(snapshot))
+
+    live(render_progress, running)
 
 # --- 4. CHAT INTERFACE ---
 if "messages" not in st.session_state:
@@ -56,98 +123,27 @@ if prompt := st.chat_input("Query the framework..."):
     with st.chat_message("assistant"):
         p = prompt.lower()
         response = ""
+        # Tokenize + resolve intents ONCE (typos handled by the fuzzy index)
+        matches = CHAT_ROUTER.route(p)
         
         # CATEGORY 1: Spend Optimization (Highlighting spends with clean UI)
-        if any(x in p for x in ['optimize', 'highlight', 'missed', 'past']):
+        if matches and matches[0].intent == 'optimize':
             response = "I have scanned your personal transactions and mapped them to the best available cards to maximize ROI:"
             st.markdown(response)
-            if opt_df is not None:
-                # Fixed: Sorting by savings and clean indexing
-                clean_table = opt_df.sort_values(by='Potential_Savings_INR', ascending=False).head(10).reset_index(drop=True)
-                clean_table.index += 1
-                st.table(clean_table[['Category', 'Amount', 'Recommended_Card', 'Potential_Savings_INR']])
+            snapshot, still_running = statement_view(statement_id)
+            if snapshot is not None and snapshot['top']:
+                # Top 10 from the job (merged chunk by chunk) or the (statement, savings) index - no full-frame sort
+                if still_running:
+                    st.caption(f"⏳ Still working - {snapshot['message']}")
+                st.table(top_savings_table(snapshot))
 
         # CATEGORY 2: The Universal DB Benchmarking (A-Z Coverage)
         else:
-            def universal_query_engine(intent, df):
-                if df is None: return "Database Error."
-                
-                # A. PERK MAPPING (Covering all sub-points from doc)
-                perk_logic = {
-                    'network': ('network', 'Card Network (Visa/MC/Amex)'),
-                    'golf': ('perk_golf', 'Golf Privileges'),
-                    'movie': ('perk_movies', 'Movie Benefits'),
-                    'lounge': ('lounge_domestic', 'Lounge Access (Domestic/Intl)'),
-                    'longue': ('lounge_domestic', 'Lounge Access'), # Typo handle
-                    'expiry': ('reward_expiry_months', 'Reward Expiry Rules'),
-                    'expire': ('reward_expiry_months', 'Reward Expiry Rules'),
-                    'taj': ('benefit_special_tieups', 'Taj/Special Tie-ups'),
-                    'tie': ('benefit_special_tieups', 'Special Brand Tie-ups'),
-                    'milestone': ('benefit_milestones', 'Milestone Benefits'),
-                    'miletsone': ('benefit_milestones', 'Milestone Benefits'), # Typo handle
-                    'welcome': ('benefit_welcome', 'Welcome Benefits'),
-                    'wlecome': ('benefit_welcome', 'Welcome Benefits'), # Typo handle
-                    'other': ('perk_others', 'Miscellaneous Benefits')
-                }
-                
-                # Priority 1: Check if user is asking for a Perk
-                for key, (col, title) in perk_logic.items():
-                    if key in intent:
-                        # Scan ALL cards and filter valid ones
-                        matches = df[~df[col].astype(str).str.contains('(?i)no|none', regex=True)]
-                        if not matches.empty:
-                            res = f"✨ **Database Results for {title}:**\n\n"
-                            for _, row in matches.iterrows():
-                                res += f"- **{row['bank_name']} {row['card_name']}**: {row[col]}\n"
-                            return res
-
-                # Priority 2: Check for Fees & Waivers (Requirement Met)
-                if any(x in intent for x in ['waive', 'waiver', 'less spend', 'waiver limit']):
-                    valid = df[df['waiver_spend_limit'] > 0].sort_values(by='waiver_spend_limit')
-                    res = "⚖️ **Spend-based Fee Waivers (Lowest First):**\n\n"
-                    for _, row in valid.iterrows():
-                        res += f"- **{row['bank_name']} {row['card_name']}**: Waived at ₹{row['waiver_spend_limit']:,.0f} annual spend.\n"
-                    return res
-                if 'renewal' in intent or 'renwal' in intent:
-                    best = df.loc[df['renewal_fee'].idxmin()]
-                    return f"🔄 For the lowest **Renewal Fee**, the **{best['bank_name']} {best['card_name']}** is the winner at ₹{best['renewal_fee']}."
-                if any(x in intent for x in ['fee', 'joining', 'cheap', 'free']):
-                    best = df.loc[df['joining_fee'].idxmin()]
-                    return f"💰 For the lowest **Joining Fee**, the **{best['bank_name']} {best['card_name']}** is optimal at ₹{best['joining_fee']}."
-
-                # Priority 3: The Universal ROI Math Engine (Dining, Travel, Utilities, Reward System)
-                cat_map = {
-                    'dining': ['dining', 'food', 'dinig'],
-                    'international': ['international', 'abroad', 'foreign', 'intetnational'],
-                    'domestic': ['domestic', 'india', 'local'],
-                    'travel': ['travel', 'trip', 'flight'],
-                    'utilities': ['utility', 'utilities', 'bill'],
-                    'shopping': ['shopping', 'amazon', 'online', 'reward system', 'highest reward']
-                }
-                target = next((k for k, v in cat_map.items() if any(word in intent for word in v)), None)
-                
-                if target or 'reward' in intent:
-                    target_cat = target or 'shopping' # Default to shopping if general reward asked
-                    best_card, max_roi = None, -1.0
-                    
-                    for _, row in df.iterrows():
-                        try:
-                            m_json = json.loads(row['multipliers_json'])
-                            # Math ROI Formula Calculation
-                            mult = m_json.get(target_cat, m_json.get('travel' if 'travel' in str(target_cat) else '', 1.0))
-                            unit = float(row['spends_per_reward_unit']) or 100
-                            roi = (float(mult) / unit) * float(row['unified_reward_value_inr']) * 100
-                            
-                            if roi > max_roi:
-                                max_roi, best_card = roi, row
-                        except: continue
-                    
-                    if best_card is not None:
-                        return f"📈 **Mathematical Winner for {target_cat.capitalize()}:** The **{best_card['bank_name']} {best_card['card_name']}** offers a return of **{max_roi:.2f}%**."
-
-                return "🤖 I can analyze cards for 'Movies', 'Golf', 'Taj tie-ups', 'Waivers', or 'Travel'. Specify a category to query."
-
-            response = universal_query_engine(p, full_cards_db)
+            try:
+                catalog = get_card_catalog()
+            except Exception:
+                catalog = None
+            response = universal_query_engine(p, catalog, matches=matches)
             st.markdown(response)
 
         if response:
@@ -0,0 +1,264 @@
+"""
+Nightly batch: every statement in a directory, in parallel, resumable.
+
+    python batch.py /data/statements --out /data/runs/2025-06-01 --workers 8
+    python batch.py /data/statements --out /data/runs/2025-06-01            # re-run = resume
+    python batch.py /data/statements --out /data/runs/2025-06-01 --fresh    # start over
+
+Each .xlsx/.csv/.pdf under the directory is routed to its parser, categorized
+and optimized in a process pool whose workers load the card catalog once.
+Output directory:
+    statements/<statement_id>.csv    best card per transaction (optimize_spends layout)
+    statements/<statement_id>.json   per-statement summary
+    manifest.jsonl                   one line per finished file - what a resume skips
+    report.json / report.csv         consolidated over every finished statement
+
+Statements are identified by content hash (same ids as server uploads), so a
+renamed file is not redone and an edited one is.
+"""
+import argparse
+import csv
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+
+from ai_engine.card_catalog import get_card_catalog, DEFAULT_DB_PATH
+from ai_engine.statement_cache import file_content_hash
+from ai_engine.instrumentation import get_logger, configure_logging
+from ai_engine.statement_loader import SUPPORTED_FORMATS, init_worker, load_statement
+
+log = get_logger('batch')
+
+MANIFEST_FILE = 'manifest.jsonl'
+STATEMENTS_DIR = 'statements'
+# 'failed' (unreadable file, crash) is retried on resume
+DONE_STATUSES = ('ok', 'empty')
+PROGRESS_EVERY_SECONDS = 5
+
+
+def find_statements(root):
+    """Every supported statement under root, in a stable order (Office lock files skipped)."""
+    found = []
+    for folder, dirs, files in os.walk(root):
+        dirs[:] = sorted(d for d in dirs if not d.startswith('.'))
+        for name in sorted(files):
+            if name.lower().endswith(SUPPORTED_FORMATS) and not name.startswith(('~$', '.')):
+                found.append(os.path.join(folder, name))
+    return found
+
+
+def _write_atomic(path, write):
+    tmp = f"{path}.tmp-{os.getpid()}"
+    write(tmp)
+    os.replace(tmp, path)
+
+
+def _write_json(path, payload):
+    with open(path, 'w') as f:
+        f.write(json.dumps(payload, indent=2))
+
+
+# --- Worker side (runs inside the process pool) ---
+def process_statement(path, db_path, out_dir, statement_id):
+    """Parse + categorize + optimize one statement and write its result files. Returns its summary."""
+    from ai_engine.chat_agent import optimize_compact, render_optimized
+    from ai_engine.compact import to_compact, transaction_amounts
+
+    start = time.perf_counter()
+    # strict: a file the parser can't read raises -> 'failed'; only a parsed statement without debits is 'empty'
+    df = to_compact(load_statement(path, strict=True))
+    if df is None or df.empty:
+        return {'status': 'empty', 'rows': 0, 'total_savings': 0.0, 'categories': {},
+                'seconds': round(time.perf_counter() - start, 4)}
+
+    result, total = optimize_compact(df, get_card_catalog(db_path))
+    categories = {}
+    grouped = result.assign(spend=transaction_amounts(df)).groupby(df['category'].astype(str))
+    for category, group in grouped:
+        categories[category] = {'transactions': int(len(group)), 'spend_inr': round(float(group['spend'].sum()), 2),
+                                'saved_inr': round(float(group['saved_inr'].sum()), 2)}
+    summary = {'status': 'ok', 'rows': int(len(df)), 'total_savings': round(total, 2), 'categories': categories}
+
+    base = os.path.join(out_dir, STATEMENTS_DIR, statement_id)
+    _write_atomic(f"{base}.csv", lambda tmp: render_optimized(df, result).to_csv(tmp, index=False))
+    _write_atomic(f"{base}.json", lambda tmp: _write_json(tmp, {'statement_id': statement_id, 'file': path, **summary}))
+    summary['seconds'] = round(time.perf_counter() - start, 4)
+    return summary
+
+
+# --- Parent side ---
+def load_manifest(path):
+    """{statement_id: entry} of files a previous run finished (a torn last line is ignored)."""
+    entries = {}
+    if not os.path.exists(path):
+        return entries
+    with open(path) as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                continue
+            entries[entry['statement_id']] = entry
+    return entries
+
+
+class Manifest:
+    """Append-only JSONL progress log; every line is flushed to disk before the next file counts as done."""
+
+    def __init__(self, path, fresh=False):
+        self.path = path
+        if fresh and os.path.exists(path):
+            os.remove(path)
+        self.entries = load_manifest(path)
+        self._file = open(path, 'a')
+
+    def is_done(self, statement_id):
+        entry = self.entries.get(statement_id)
+        return entry is not None and entry['status'] in DONE_STATUSES
+
+    def record(self, entry):
+        self.entries[entry['statement_id']] = entry
+        self._file.write(json.dumps(entry) + "\n")
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def close(self):
+        self._file.close()
+
+
+def build_report(entries, run_stats):
+    """Consolidated totals over every finished statement (this run and earlier ones)."""
+    done = [e for e in entries.values() if e['status'] == 'ok']
+    categories = {}
+    for entry in done:
+        for category, c in entry['categories'].items():
+            total = categories.setdefault(category, {'transactions': 0, 'spend_inr': 0.0, 'saved_inr': 0.0})
+            total['transactions'] += c['transactions']
+            total['spend_inr'] += c['spend_inr']
+            total['saved_inr'] += c['saved_inr']
+    return {
+        'statements': len(done),
+        'empty': sum(e['status'] == 'empty' for e in entries.values()),
+        'failed': sorted((e['file'] for e in entries.values() if e['status'] == 'failed')),
+        'transactions': sum(e['rows'] for e in done),
+        'total_savings': round(sum(e['total_savings'] for e in done), 2),
+        'categories': {k: {**v, 'spend_inr': round(v['spend_inr'], 2), 'saved_inr': round(v['saved_inr'], 2)}
+                       for k, v in sorted(categories.items(), key=lambda kv: -kv[1]['saved_inr'])},
+        'run': run_stats,
+    }
+
+
+def write_report(out_dir, entries, run_stats):
+    report = build_report(entries, run_stats)
+    _write_atomic(os.path.join(out_dir, 'report.json'), lambda tmp: _write_json(tmp, report))
+
+    def write_csv(tmp):
+        with open(tmp, 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(['file', 'statement_id', 'status', 'rows', 'total_savings', 'seconds', 'error'])
+            for e in sorted(entries.values(), key=lambda e: e['file']):
+                writer.writerow([e['file'], e['statement_id'], e['status'], e['rows'], e['total_savings'],
+                                 e.get('seconds'), e.get('error', '')])
+    _write_atomic(os.path.join(out_dir, 'report.csv'), write_csv)
+    return report
+
+
+def run_batch(input_dir, out_dir, workers=None, db_path=DEFAULT_DB_PATH, fresh=False, max_pending=None):
+    """Processes every statement under input_dir not already finished in out_dir. Returns the report."""
+    workers = workers or os.cpu_count() or 1
+    max_pending = max_pending or workers * 4
+    db_path = os.path.abspath(db_path)
+    os.makedirs(os.path.join(out_dir, STATEMENTS_DIR), exist_ok=True)
+    get_card_catalog(db_path)  # fail fast if the DB is missing
+
+    manifest = Manifest(os.path.join(out_dir, MANIFEST_FILE), fresh=fresh)
+    files = find_statements(input_dir)
+    started = time.perf_counter()
+
+    # 1. Content hashes decide what's left: finished ids are skipped, byte-identical copies run once
+    todo, queued, skipped, duplicates = [], set(), 0, 0
+    for path in files:
+        statement_id = file_content_hash(path)[:24]
+        if manifest.is_done(statement_id):
+            skipped += 1
+        elif statement_id in queued:
+            duplicates += 1
+        else:
+            queued.add(statement_id)
+            todo.append((path, statement_id))
+    log.info(f"📂 {len(files)} statements found, {skipped} already done, {duplicates} duplicates, "
+             f"{len(todo)} to process ({workers} workers)")
+
+    # 2. Bounded submission: at most max_pending files parsed into worker memory at once
+    processed = failed = rows = 0
+    last_progress = time.perf_counter()
+    pending = {}
+    work = iter(todo)
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_worker, initargs=(db_path,)) as pool:
+        while True:
+            while len(pending) < max_pending:
+                item = next(work, None)
+                if item is None:
+                    break
+                path, statement_id = item
+                pending[pool.submit(process_statement, path, db_path, out_dir, statement_id)] = item
+            if not pending:
+                break
+
+            finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in finished:
+                path, statement_id = pending.pop(future)
+                entry = {'file': path, 'statement_id': statement_id}
+                try:
+                    entry.update(future.result())
+                    rows += entry['rows']
+                except Exception as e:
+                    failed += 1
+                    entry.update({'status': 'failed', 'rows': 0, 'total_savings': 0.0, 'categories': {},
+                                  'error': f"{type(e).__name__}: {e}"})
+                    log.error(f"❌ {path}: {entry['error']}")
+                manifest.record(entry)
+                processed += 1
+
+            now = time.perf_counter()
+            if now - last_progress >= PROGRESS_EVERY_SECONDS:
+                last_progress = now
+                log.info(f"📦 {processed}/{len(todo)} statements ({processed / (now - started):.1f} files/s)")
+
+    elapsed = time.perf_counter() - started
+    run_stats = {
+        'files_found': len(files),
+        'skipped_done': skipped,
+        'duplicates': duplicates,
+        'processed': processed,
+        'failed': failed,
+        'rows': rows,
+        'workers': workers,
+        'seconds': round(elapsed, 3),
+        'files_per_second': round(processed / elapsed, 2) if elapsed > 0 else None,
+        'rows_per_second': round(rows / elapsed, 1) if elapsed > 0 else None,
+    }
+    report = write_report(out_dir, manifest.entries, run_stats)
+    manifest.close()
+    log.info(f"✅ Batch done: {processed} statements in {elapsed:.1f}s ({run_stats['files_per_second']} files/s), "
+             f"{failed} failed, ₹{report['total_savings']:,.2f} total savings across {report['statements']} statements")
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Optimize every statement in a directory (resumable).")
+    parser.add_argument('input_dir', help="directory of .xlsx/.csv/.pdf statements (searched recursively)")
+    parser.add_argument('--out', required=True, help="output directory (results, manifest, report)")
+    parser.add_argument('--workers', type=int, default=None, help="process pool size (default: CPU count)")
+    parser.add_argument('--db', default=DEFAULT_DB_PATH, help="card catalog SQLite file")
+    parser.add_argument('--fresh', action='store_true', help="ignore the manifest and redo every statement")
+    args = parser.parse_args()
+    configure_logging()
+
+    report = run_batch(args.input_dir, args.out, args.workers, args.db, fresh=args.fresh)
+    raise SystemExit(1 if report['run']['failed'] else 0)
+
+
+if __name__ == "__main__":
+    main()
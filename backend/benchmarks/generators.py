@@ -0,0 +1,184 @@
+import json
+import os
+import random
+import sqlite3
+from datetime import datetime, timedelta
+import pandas as pd
+
+MASTER_DB = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'database', 'master_cards_final.db'))
+
+# Same columns a real bank export has (see data_samples/transactions.xlsx)
+STATEMENT_COLUMNS = ['Sl. No.', 'Date', 'Cheque No.', 'Transaction Note', 'Amount', 'Transaction Channel',
+                     'Balance', 'Description', 'Merchant Category', 'Transaction Type']
+
+# merchant -> relative weight. Mix of keyword hits and 'Retail/Others' noise, like real statements
+DEFAULT_MERCHANT_MIX = {
+    'ZOMATO': 8, 'SWIGGY': 8, 'STARBUCKS': 2, 'DOMINOS': 2,
+    'UBER': 5, 'OLA': 4, 'IRCTC': 2, 'INDIGO': 1, 'RAPIDO': 2,
+    'BLINKIT': 5, 'ZEPTO': 4, 'BIGBASKET': 2, 'DMART': 2,
+    'AMAZON': 6, 'FLIPKART': 4, 'MYNTRA': 2, 'AJIO': 1,
+    'AIRTEL': 2, 'JIO': 2, 'BESCOM': 1, 'CRED CLUB': 3,
+    'APOLLO PHARMACY': 1, 'PRACTO': 1, 'HPCL': 2, 'INDIAN OIL': 1,
+    'ZERODHA': 1, 'GROWW': 1,
+    'SHARMA KIRANA STORE': 10, 'RAJU TEA STALL': 6, 'AMIT KUMAR': 8, 'ELITE MOTORS PVT LTD': 1,
+}
+UPI_HANDLES = ['YBL', 'OKAXIS', 'OKSBI', 'PAYTM', 'ICICI', 'AXISB', 'HDFCBANK']
+CATALOG_KEYS = ['travel', 'dining', 'shopping', 'groceries', 'utilities', 'online', 'offline', 'international',
+                'domestic', 'swiggy', 'zomato', 'ola', 'myntra', 'amazon_prime', 'google_pay_bills', 'fuel']
+PERK_VALUES = ['No', 'None', 'Unlimited', '4 per year', '2 per quarter', 'BOGO up to Rs 500', 'Priority Pass']
+
+
+def _upi_note(rnd, merchant, upi_noise):
+    """'UPI-ZOMATO-ZOMATO@YBL-YESB0YBLUPI-556923433697-UPI' style notes with random refs."""
+    if rnd.random() > upi_noise:
+        return merchant
+    handle = merchant.replace(' ', '').lower()[:12] + str(rnd.randint(0, 999))
+    return (f"UPI-{merchant}-{handle}@{rnd.choice(UPI_HANDLES)}-"
+            f"{rnd.choice(['UTIB', 'HDFC', 'YESB', 'SBIN'])}{rnd.randint(0, 9999999):07d}-"
+            f"{rnd.randint(10**11, 10**12 - 1)}-UPI")
+
+
+def make_statement_frame(rows, merchant_mix=None, upi_noise=0.8, credit_ratio=0.25, seed=0):
+    """
+    Synthetic bank export with `rows` lines.
+    merchant_mix: {merchant: weight}; upi_noise: share of rows wrapped in UPI refs/IDs;
+    credit_ratio: share of incoming (Credit) rows the parser must filter out.
+    """
+    rnd = random.Random(seed)
+    mix = merchant_mix or DEFAULT_MERCHANT_MIX
+    merchants, weights = list(mix), list(mix.values())
+    start = datetime(2025, 1, 1)
+    balance = 500000.0
+
+    records = []
+    for i in range(rows):
+        merchant = rnd.choices(merchants, weights)[0]
+        is_credit = rnd.random() < credit_ratio
+        amount = round(rnd.lognormvariate(6.5, 1.2), 2)
+        balance += amount if is_credit else -amount
+        records.append((
+            i + 1,
+            start + timedelta(minutes=int(i * 525600 / max(rows, 1))),
+            None,
+            _upi_note(rnd, merchant, upi_noise),
+            amount if is_credit else -amount,
+            ' Upi ',
+            round(balance, 2),
+            f" Transfer {'from' if is_credit else 'to'} {merchant.lower()} ",
+            '  ',
+            ' Credit ' if is_credit else ' Debit ',
+        ))
+    return pd.DataFrame.from_records(records, columns=STATEMENT_COLUMNS)
+
+
+def write_statement(path, rows, **kwargs):
+    """Writes a synthetic statement as .xlsx (openpyxl write-only mode) or .csv."""
+    df = make_statement_frame(rows, **kwargs)
+    if path.lower().endswith('.csv'):
+        df.to_csv(path, index=False)
+        return path
+
+    from openpyxl import Workbook
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet('user 1')
+    ws.append(STATEMENT_COLUMNS)
+    for row in df.itertuples(index=False):
+        ws.append([v.to_pydatetime() if hasattr(v, 'to_pydatetime') else v for v in row])
+    wb.save(path)
+    return path
+
+
+def make_card_rows(n_cards, seed=0):
+    """Random but plausible card T&Cs, in credit_cards column order (minus id)."""
+    rnd = random.Random(seed)
+    banks = ['HDFC', 'SBI', 'ICICI', 'Axis', 'Kotak', 'IDFC', 'AU', 'Yes', 'IndusInd', 'RBL']
+    rows = []
+    for i in range(n_cards):
+        fee = rnd.choice([0, 499, 999, 2500, 4999, 10000, 12500])
+        multipliers = {k: round(rnd.uniform(0.5, 10.0), 1) for k in rnd.sample(CATALOG_KEYS, rnd.randint(1, 4))}
+        rows.append((
+            rnd.choice(banks), f"Synthetic {i:05d}", rnd.choice(['Visa', 'Mastercard', 'Amex', 'RuPay']),
+            rnd.choice(['Rewards', 'Cashback', 'Travel', 'Premium']),
+            fee, fee, rnd.choice([0, 50000, 200000, 400000, 1000000]),
+            rnd.choice(['Points', 'Cashback', 'Miles']), rnd.choice([100, 150, 200]), json.dumps(multipliers),
+            rnd.choice([0.25, 0.4, 0.5, 1.0]), rnd.choice(['Never', '24 Months', '36 Months']),
+            rnd.choice(PERK_VALUES), rnd.choice(PERK_VALUES), rnd.choice(PERK_VALUES), rnd.choice(PERK_VALUES),
+            rnd.choice(PERK_VALUES), rnd.choice(PERK_VALUES), rnd.choice(PERK_VALUES), rnd.choice(PERK_VALUES),
+        ))
+    return rows
+
+
+def write_card_catalog(path, n_cards, seed=0):
+    """Creates a credit_cards DB with `n_cards` synthetic cards, using the live schema from master_cards_final.db."""
+    with sqlite3.connect(MASTER_DB) as master:
+        schema = master.execute("SELECT sql FROM sqlite_master WHERE type='table' AND name='credit_cards'").fetchone()[0]
+        columns = [r[1] for r in master.execute("PRAGMA table_info(credit_cards)") if r[1] != 'id']
+
+    if os.path.exists(path):
+        os.remove(path)
+    conn = sqlite3.connect(path)
+    conn.execute(schema)
+    conn.executemany(
+        f"INSERT INTO credit_cards ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})",
+        make_card_rows(n_cards, seed)
+    )
+    conn.commit()
+    conn.close()
+    return path
+
+
+def write_pdf_statement(path, pages, lines_per_page=40, seed=0):
+    """
+    Minimal text-layer PDF (no extra deps) laid out like a bank statement:
+    Sl.No | Date | Description | Debit | Credit | Balance, header row on every page.
+    """
+    rnd = random.Random(seed)
+    merchants = list(DEFAULT_MERCHANT_MIX)
+    columns_x = [30, 60, 130, 380, 450, 520]
+    header = ["Sl.No", "Date", "Description", "Debit", "Credit", "Balance"]
+    balance = 100000.0
+
+    streams = []
+    serial = 0
+    for _ in range(pages):
+        ops = ["BT /F1 8 Tf"]
+        ops.extend(f"1 0 0 1 {x} 818 Tm ({text}) Tj" for x, text in zip(columns_x, header))
+        y = 800
+        for _ in range(lines_per_page):
+            serial += 1
+            amount = rnd.randint(100, 500000) / 100
+            debit = amount if rnd.random() < 0.7 else 0.0
+            credit = 0.0 if debit else amount
+            balance += credit - debit
+            cells = [str(serial), f"{rnd.randint(1, 28):02d}/{rnd.randint(1, 12):02d}/2025",
+                     rnd.choice(merchants), f"{debit:,.2f}", f"{credit:,.2f}", f"{balance:,.2f}"]
+            for x, text in zip(columns_x, cells):
+                ops.append(f"1 0 0 1 {x} {y} Tm ({text}) Tj")
+            y -= 18
+        ops.append("ET")
+        streams.append("\n".join(ops))
+
+    # 1 = catalog, 2 = page tree, 3 = font, then (page, content) pairs
+    objects = [
+        "<< /Type /Catalog /Pages 2 0 R >>",
+        f"<< /Type /Pages /Kids [{' '.join(f'{4 + 2 * k} 0 R' for k in range(pages))}] /Count {pages} >>",
+        "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    for k, stream in enumerate(streams):
+        objects.append(f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 842] "
+                       f"/Resources << /Font << /F1 3 0 R >> >> /Contents {5 + 2 * k} 0 R >>")
+        objects.append(f"<< /Length {len(stream.encode())} >>\nstream\n{stream}\nendstream")
+
+    data = b"%PDF-1.4\n"
+    offsets = []
+    for i, body in enumerate(objects, start=1):
+        offsets.append(len(data))
+        data += f"{i} 0 obj\n{body}\nendobj\n".encode()
+    xref = len(data)
+    data += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode()
+    data += "".join(f"{o:010d} 00000 n \n" for o in offsets).encode()
+    data += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode()
+
+    with open(path, 'wb') as f:
+        f.write(data)
+    return path
@@ -0,0 +1,198 @@
+"""
+Chat load test: replays recorded user queries at a fixed concurrency.
+
+    python -m benchmarks.loadtest                                  # from backend/, bundled queries, live catalog
+    python -m benchmarks.loadtest my_queries.jsonl --concurrency 16 --cards 2000 --repeat 20
+    python -m benchmarks.loadtest --budget-p95 5 --budget-p99 20   # exit 1 if over budget (ms)
+
+Queries file: one JSON object per line, {"query": "...", "target": "app" | "cli"}
+(a bare JSON string is an app query).
+  app - the Streamlit chat turn: CHAT_ROUTER, then the statement's top-N from the
+        results store for 'optimize', query_engine.answer_query for the rest
+  cli - chat_agent.answer_cli_query against the sample statement
+Every worker thread sends its next query as soon as the last one returned (closed
+loop), so latencies are what `--concurrency` simultaneous users see in one process.
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from .generators import write_card_catalog
+from ai_engine.card_catalog import CardCatalog, get_card_catalog
+from ai_engine.chat_agent import SAMPLE_STATEMENT, chat_session, answer_cli_query
+from ai_engine.compact import to_compact
+from ai_engine.query_engine import CHAT_ROUTER, answer_query
+from ai_engine.results_store import ResultsStore
+from ai_engine.statement_jobs import TOP_N
+
+DEFAULT_QUERIES = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'chat_queries.jsonl')
+TARGETS = ('app', 'cli')
+STATEMENT_ID = 'loadtest'
+
+
+def load_queries(path):
+    """[(target, query)] in file order; blank lines skipped."""
+    queries = []
+    with open(path) as f:
+        for line_no, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            entry = json.loads(line)
+            if isinstance(entry, str):
+                entry = {'query': entry}
+            target = entry.get('target', 'app')
+            if target not in TARGETS or not isinstance(entry.get('query'), str):
+                raise ValueError(f"{path}:{line_no}: expected {{\"query\": str, \"target\": {'|'.join(TARGETS)}}}")
+            queries.append((target, entry['query']))
+    return queries
+
+
+def build_turns(catalog, statement_path, work_dir):
+    """target -> fn(query) -> intent, each running exactly what that front-end runs per message."""
+    from ai_engine.statement_cache import cached_ai_categorization
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        session = chat_session(to_compact(cached_ai_categorization(statement_path)), catalog)
+    # The app reads a finished statement's top-N from the results store (WAL SQLite)
+    store = ResultsStore(os.path.join(work_dir, 'results.db'))
+    store.save_results(STATEMENT_ID, session['transactions'], session['result'], session['total_savings'])
+
+    def app_turn(query):
+        p = query.lower()
+        matches = CHAT_ROUTER.route(p)
+        if matches and matches[0].intent == 'optimize':
+            store.top_savings(TOP_N, STATEMENT_ID)
+            return 'optimize'
+        return answer_query(p, catalog, matches=matches)[0]
+
+    def cli_turn(query):
+        intent, _ = answer_cli_query(query.strip().lower(), session)
+        return intent or 'help'
+
+    return {'app': app_turn, 'cli': cli_turn}, store
+
+
+def replay(queries, turns, concurrency, repeat):
+    """Runs every query `repeat` times on `concurrency` threads. Returns ([(label, seconds)], errors, wall seconds)."""
+    work = iter(queries * repeat)
+    work_lock = threading.Lock()
+
+    def worker():
+        samples, errors = [], []
+        while True:
+            with work_lock:
+                item = next(work, None)
+            if item is None:
+                return samples, errors
+            target, query = item
+            start = time.perf_counter()
+            try:
+                intent = turns[target](query)
+            except Exception as e:
+                errors.append(f"{target} {query!r}: {type(e).__name__}: {e}")
+                intent = 'error'
+            samples.append((f"{target}:{intent}", time.perf_counter() - start))
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix='loadtest') as pool:
+        outcomes = list(pool.map(lambda _: worker(), range(concurrency)))
+    wall = time.perf_counter() - started
+    samples = [s for worker_samples, _ in outcomes for s in worker_samples]
+    errors = [e for _, worker_errors in outcomes for e in worker_errors]
+    return samples, errors, wall
+
+
+def latency_stats(seconds):
+    """count + mean/p50/p95/p99/max in milliseconds."""
+    ms = np.asarray(seconds) * 1000
+    p50, p95, p99 = np.percentile(ms, [50, 95, 99])
+    return {'count': int(len(ms)), 'mean_ms': round(float(ms.mean()), 3), 'p50_ms': round(float(p50), 3),
+            'p95_ms': round(float(p95), 3), 'p99_ms': round(float(p99), 3), 'max_ms': round(float(ms.max()), 3)}
+
+
+def summarize(samples, errors, wall, concurrency, n_cards):
+    by_intent = {}
+    for label, seconds in samples:
+        by_intent.setdefault(label, []).append(seconds)
+    return {
+        'queries': len(samples),
+        'errors': len(errors),
+        'concurrency': concurrency,
+        'cards': n_cards,
+        'seconds': round(wall, 4),
+        'queries_per_second': round(len(samples) / wall, 1) if wall > 0 else None,
+        'latency': latency_stats([s for _, s in samples]),
+        # Slowest intents first: that's where a routing / lookup regression shows up
+        'intents': dict(sorted(((label, latency_stats(s)) for label, s in by_intent.items()),
+                               key=lambda kv: -kv[1]['p95_ms'])),
+    }
+
+
+def print_report(report):
+    overall = report['latency']
+    print(f"\n💬 {report['queries']} queries, {report['concurrency']} concurrent, {report['cards']} cards: "
+          f"{report['queries_per_second']} q/s in {report['seconds']:.2f}s, {report['errors']} errors")
+    print(f"   overall  p50 {overall['p50_ms']:8.3f} ms   p95 {overall['p95_ms']:8.3f} ms   "
+          f"p99 {overall['p99_ms']:8.3f} ms   max {overall['max_ms']:8.3f} ms")
+    print(f"\n   {'intent':<24} {'count':>7} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'max ms':>9}")
+    for label, s in report['intents'].items():
+        print(f"   {label:<24} {s['count']:>7} {s['p50_ms']:>9.3f} {s['p95_ms']:>9.3f} {s['p99_ms']:>9.3f} {s['max_ms']:>9.3f}")
+
+
+def run_loadtest(queries, concurrency=8, repeat=10, n_cards=0, statement_path=SAMPLE_STATEMENT, warmup=1):
+    """Replays `queries` against the live catalog (n_cards=0) or a synthetic one of n_cards. Returns the report."""
+    with tempfile.TemporaryDirectory() as tmp:
+        catalog = CardCatalog(write_card_catalog(os.path.join(tmp, 'cards.db'), n_cards)) if n_cards else get_card_catalog()
+        turns, store = build_turns(catalog, statement_path, tmp)
+        try:
+            # Unmeasured pass: per-catalog indexes and lazy imports are built once, not per user
+            if warmup:
+                replay(queries, turns, 1, warmup)
+            samples, errors, wall = replay(queries, turns, concurrency, repeat)
+        finally:
+            store.close()
+    for error in errors[:5]:
+        print(f"❌ {error}")
+    return summarize(samples, errors, wall, concurrency, len(catalog))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay chat queries concurrently and report latency percentiles.")
+    parser.add_argument('queries', nargs='?', default=DEFAULT_QUERIES, help="JSONL file of queries")
+    parser.add_argument('--concurrency', type=int, default=8, help="simultaneous users (threads)")
+    parser.add_argument('--repeat', type=int, default=10, help="times the whole file is replayed")
+    parser.add_argument('--cards', type=int, default=0, help="synthetic catalog size (default: the live catalog DB)")
+    parser.add_argument('--statement', default=SAMPLE_STATEMENT, help="statement the optimize / CLI intents read")
+    parser.add_argument('--budget-p95', type=float, default=None, help="fail if overall p95 exceeds this many ms")
+    parser.add_argument('--budget-p99', type=float, default=None, help="fail if overall p99 exceeds this many ms")
+    parser.add_argument('--out', default=None, help="optional JSON output path")
+    args = parser.parse_args()
+
+    report = run_loadtest(load_queries(args.queries), args.concurrency, args.repeat, args.cards, args.statement)
+    print_report(report)
+    if args.out:
+        os.makedirs(os.path.dirname(os.path.abspath(args.out)), exist_ok=True)
+        with open(args.out, 'w') as f:
+            json.dump(report, f, indent=2)
+
+    over = [f"{name} {report['latency'][key]:.3f} ms > {budget:.3f} ms"
+            for name, key, budget in (('p95', 'p95_ms', args.budget_p95), ('p99', 'p99_ms', args.budget_p99))
+            if budget is not None and report['latency'][key] > budget]
+    if report['errors'] or over:
+        print(f"❌ Over latency budget: {', '.join(over)}" if over else f"❌ {report['errors']} queries failed")
+        sys.exit(1)
+    if args.budget_p95 is not None or args.budget_p99 is not None:
+        print("✅ Within latency budget")
+
+
+if __name__ == "__main__":
+    main()
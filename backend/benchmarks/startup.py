@@ -0,0 +1,93 @@
+"""
+Cold-start benchmark: how long a FRESH interpreter takes to become useful.
+
+    python -m benchmarks.startup                  # from backend/
+    python -m benchmarks.startup --repeat 10 --budget 1.0
+
+Every scenario runs in a new `python -c` process (nothing pre-imported), and
+reports which heavy libraries it ended up loading. --budget makes the run
+fail (exit 1) if the catalog-only chat path gets slower than that many seconds.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+HEAVY_MODULES = ['numpy', 'pandas', 'openpyxl', 'pdfplumber']
+
+# name -> code run in the fresh interpreter
+SCENARIOS = {
+    'python_baseline': "pass",
+    'chat_catalog_only': (
+        "from ai_engine.card_catalog import get_card_catalog\n"
+        "from ai_engine.query_engine import universal_query_engine\n"
+        "universal_query_engine('which cards have golf access', get_card_catalog())"
+    ),
+    'server_import': "import server",
+    'optimizer_import': "import ai_engine.chat_agent",
+    'parsers_import': "import parsers.excel_parser, parsers.pdf_parser",
+    'full_pipeline_import': "import ai_engine.chat_agent, ai_engine.categorizer, ai_engine.statement_cache",
+}
+BUDGETED_SCENARIO = 'chat_catalog_only'
+
+_REPORT = "\nimport json, sys\nprint(json.dumps([m for m in {heavy!r} if m in sys.modules]))"
+
+
+def run_scenario(code, repeat=5):
+    """Wall time of `repeat` fresh interpreters (seconds) + the heavy modules the code loaded."""
+    script = code + _REPORT.format(heavy=HEAVY_MODULES)
+    timings, loaded = [], []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        out = subprocess.run([sys.executable, '-c', script], cwd=BACKEND_DIR,
+                             capture_output=True, text=True, check=True)
+        timings.append(time.perf_counter() - start)
+        loaded = json.loads(out.stdout.strip().splitlines()[-1])
+    return timings, loaded
+
+
+def measure_startup(repeat=5, scenarios=None):
+    results = []
+    for name in scenarios or SCENARIOS:
+        timings, loaded = run_scenario(SCENARIOS[name], repeat)
+        results.append({
+            'stage': f'cold_start:{name}',
+            'seconds': round(min(timings), 6),
+            'median_seconds': round(statistics.median(timings), 6),
+            'repeat': repeat,
+            'heavy_modules': loaded,
+        })
+        print(f"  {name:<24} best {min(timings) * 1000:8.1f} ms   median {statistics.median(timings) * 1000:8.1f} ms"
+              f"   loads: {', '.join(loaded) or '-'}")
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure cold-start time of the pipeline entry points.")
+    parser.add_argument('--repeat', type=int, default=5, help="fresh interpreters per scenario")
+    parser.add_argument('--budget', type=float, default=None,
+                        help=f"fail if {BUDGETED_SCENARIO} (median) takes longer than this many seconds")
+    parser.add_argument('--out', default=None, help="optional JSON output path")
+    args = parser.parse_args()
+
+    print("🚀 Cold-start benchmark")
+    results = measure_startup(args.repeat)
+    if args.out:
+        os.makedirs(os.path.dirname(os.path.abspath(args.out)), exist_ok=True)
+        with open(args.out, 'w') as f:
+            json.dump(results, f, indent=2)
+
+    if args.budget is not None:
+        chat = next(r for r in results if r['stage'] == f'cold_start:{BUDGETED_SCENARIO}')
+        if chat['median_seconds'] > args.budget:
+            print(f"❌ {BUDGETED_SCENARIO} took {chat['median_seconds']:.3f}s (budget {args.budget:.3f}s)")
+            sys.exit(1)
+        print(f"✅ {BUDGETED_SCENARIO} within budget ({chat['median_seconds']:.3f}s <= {args.budget:.3f}s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,49 +1,17 @@
-import sqlite3
 import json
+import os
+import sys
 
-def initialize_compliant_database():
-    db_path = "master_cards_final.db"
-    conn = sqlite3.connect(db_path)
-    cursor = conn.cursor()
+# Runs as a plain script (python database/init_db.py): make the backend packages importable
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from ai_engine.catalog_db import CatalogDB, CARD_COLUMNS
 
-    cursor.execute('DROP TABLE IF EXISTS credit_cards')
+DB_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "master_cards_final.db")
 
-    # EXHAUSTIVE SCHEMA BASED EXACTLY ON ASSIGNMENT DOC
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS credit_cards (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            bank_name TEXT,
-            card_name TEXT,
-            
-            -- 1. Network & Category
-            network TEXT,
-            primary_category TEXT,
-            
-            -- 2. Fees
-            joining_fee REAL,
-            renewal_fee REAL,
-            waiver_spend_limit REAL,
-            
-            -- 3. Rewards Mechanism
-            reward_type TEXT,
-            spends_per_reward_unit REAL, -- "spends per point/mile/coin"
-            multipliers_json TEXT,
-            unified_reward_value_inr REAL,
-            reward_expiry_months TEXT, -- "Expiry of rewards"
-            
-            -- 4. Perks
-            lounge_domestic TEXT,
-            lounge_international TEXT,
-            perk_movies TEXT,
-            perk_golf TEXT,
-            perk_others TEXT,
-            
-            -- 5. Other Benefits
-            benefit_welcome TEXT,
-            benefit_milestones TEXT,
-            benefit_special_tieups TEXT
-        )
-    ''')
+def initialize_compliant_database(db_path=DB_PATH):
+    # Schema (+ fee / waiver / bank indexes and the normalized multipliers table) lives in ai_engine.catalog_db;
+    # cards are upserted on (bank_name, card_name), so re-running never drops the table or shifts ids
+    catalog = CatalogDB(db_path)
 
     # CURRENT CARDS FROM THE TOP 5 PROVIDERS (Real 2026 T&C Data)
     cards_data = [
@@ -113,18 +81,10 @@ def initialize_compliant_database():
          "None", "10000 Bonus Points on Rs 1.25L spend", "PVR Cinemas")
     ]
 
-    cursor.executemany('''
-        INSERT INTO credit_cards (
-            bank_name, card_name, network, primary_category, joining_fee, renewal_fee, 
-            waiver_spend_limit, reward_type, spends_per_reward_unit, multipliers_json, 
-            unified_reward_value_inr, reward_expiry_months, lounge_domestic, lounge_international, 
-            perk_movies, perk_golf, perk_others, benefit_welcome, benefit_milestones, benefit_special_tieups
-        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-    ''', cards_data)
-
-    conn.commit()
-    conn.close()
-    print(f"✅ STRICTLY COMPLIANT Database initialized with Top 5 Providers and ALL sub-points.")
+    stats = catalog.load_cards([dict(zip(CARD_COLUMNS, card)) for card in cards_data], source='init_db')
+    catalog.close()
+    print(f"✅ STRICTLY COMPLIANT Database initialized with Top 5 Providers and ALL sub-points "
+          f"({stats['inserted']} new, {stats['updated']} updated).")
 
 if __name__ == "__main__":
     initialize_compliant_database()
\ No newline at end of file
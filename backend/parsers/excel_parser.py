@@ -1,48 +1,150 @@
 import pandas as pd
 import os
 
-def parse_user_transactions(file_path):
+from ai_engine.instrumentation import get_logger, instrumented, stage, suspended, configure_logging
+
+log = get_logger('excel_parser')
+
+# Raw bank export headers -> clean Python backend names
+COLUMNS_TO_KEEP = ['Date', 'Transaction Note', 'Amount', 'Transaction Type']
+CLEAN_COLUMNS = ['date', 'description', 'amount', 'type']
+DEFAULT_CHUNK_SIZE = 50000
+
+def _clean_spends(df):
+    """
+    The shared cleaning recipe: rename, drop junk rows, keep ONLY debits,
+    and make amounts positive. Works the same on a full sheet or one chunk.
+    """
+    # 1. Rename columns for clean Python backend usage
+    df.columns = CLEAN_COLUMNS
+    
+    # 2. Remove empty rows to prevent AI hallucination
+    df = df.dropna(subset=['description', 'amount'])
+    
+    # 3. Keep ONLY 'Debit' 
+    is_debit = df['type'].astype(str).str.strip().str.capitalize() == 'Debit'
+    df_spends = df[is_debit].copy()
+    df_spends['type'] = 'Debit'
+    
+    # 4. Convert negative debit amounts to positive absolute numbers
+    df_spends['amount'] = df_spends['amount'].astype(float).abs()
+    return df_spends
+
+@instrumented('parse_user_transactions')
+def parse_user_transactions(file_path, strict=False):
     """
     Reads exact .xlsx transaction statement, removes the junk, 
     and perfectly standardizes it for our AI engine.
+    strict=True re-raises read errors instead of returning None.
     """
-    print("⏳ AI Engine is reading and cleaning the Excel statement...")
+    log.info("⏳ AI Engine is reading and cleaning the Excel statement...")
     
     try:
-        # 1. READ EXCEL FILE
+        # 1. READ EXCEL FILE (strictly the columns the AI needs)
         # Engine 'openpyxl' is the industry standard for reading .xlsx files
-        df = pd.read_excel(file_path, engine='openpyxl')
-        
-        # 2. Extract strictly what the AI needs
-        columns_to_keep = ['Date', 'Transaction Note', 'Amount', 'Transaction Type']
-        df = df[columns_to_keep]
-        
-        # 3. Rename columns for clean Python backend usage
-        df.columns = ['date', 'description', 'amount', 'type']
+        if str(file_path).lower().endswith('.csv'):
+            df = pd.read_csv(file_path, usecols=COLUMNS_TO_KEEP)
+        else:
+            df = pd.read_excel(file_path, engine='openpyxl', usecols=COLUMNS_TO_KEEP)
+        df = df[COLUMNS_TO_KEEP]
         
-        # 4. Remove empty rows to prevent AI hallucination
-        df = df.dropna(subset=['description', 'amount'])
+        # 2. Clean + keep debits only
+        df_spends = _clean_spends(df)
         
-        # 5. Keep ONLY 'Debit' 
-        df['type'] = df['type'].astype(str).str.strip().str.capitalize()
-        df_spends = df[df['type'] == 'Debit'].copy()
-        
-        # 6. Convert negative debit amounts to positive absolute numbers
-        df_spends['amount'] = df_spends['amount'].astype(float).abs()
-        
-        # 7. Reset index for a clean dataframe
+        # 3. Reset index for a clean dataframe
         df_spends = df_spends.reset_index(drop=True)
         
-        print(f"✅ Excel Statement cleaned! Found {len(df_spends)} solid spends ready for reward analysis.")
+        log.info(f"✅ Excel Statement cleaned! Found {len(df_spends)} solid spends ready for reward analysis.")
         return df_spends
         
     except Exception as e:
-        print(f"❌ Error parsing Excel file: {e}")
+        log.error(f"❌ Error parsing Excel file: {e}")
+        if strict:
+            raise
         return None
 
+def _iter_excel_rows(file_path, chunk_size):
+    """Lazily yields raw row-chunks from the first sheet (openpyxl read-only mode)."""
+    from openpyxl import load_workbook
+    
+    wb = load_workbook(file_path, read_only=True, data_only=True)
+    try:
+        rows = wb.worksheets[0].iter_rows(values_only=True)
+        header = list(next(rows, ()))
+        missing = [c for c in COLUMNS_TO_KEEP if c not in header]
+        if missing:
+            raise KeyError(f"Missing columns in statement: {missing}")
+        positions = [header.index(c) for c in COLUMNS_TO_KEEP]
+        
+        batch = []
+        for row in rows:
+            batch.append([row[i] if i < len(row) else None for i in positions])
+            if len(batch) == chunk_size:
+                yield pd.DataFrame(batch, columns=COLUMNS_TO_KEEP)
+                batch = []
+        if batch:
+            yield pd.DataFrame(batch, columns=COLUMNS_TO_KEEP)
+    finally:
+        wb.close()
+
+def iter_user_transactions(file_path, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Streaming mode for huge bank exports (.xlsx or .csv).
+    Reads rows lazily, cleans + filters debits on the fly and yields
+    DataFrame chunks of at most `chunk_size` spends - so peak memory stays
+    flat no matter how long the statement is.
+    Chunk indexes continue from the previous chunk (0..n-1 overall).
+    Read errors are logged and raised, wherever in the file they happen.
+    """
+    log.info(f"⏳ AI Engine is streaming the statement in chunks of {chunk_size} rows...")
+    
+    with stage('iter_user_transactions') as record:
+        try:
+            if str(file_path).lower().endswith('.csv'):
+                raw_chunks = pd.read_csv(file_path, usecols=COLUMNS_TO_KEEP, chunksize=chunk_size)
+            else:
+                raw_chunks = _iter_excel_rows(file_path, chunk_size)
+            
+            total = 0
+            pending = []
+            pending_rows = 0
+            for raw in raw_chunks:
+                spends = _clean_spends(raw[COLUMNS_TO_KEEP])
+                if spends.empty:
+                    continue
+                pending.append(spends)
+                pending_rows += len(spends)
+                
+                # Debit filtering shrinks chunks - re-pack them to full size before yielding
+                while pending_rows >= chunk_size:
+                    merged = pd.concat(pending) if len(pending) > 1 else pending[0]
+                    chunk, rest = merged.iloc[:chunk_size], merged.iloc[chunk_size:]
+                    chunk.index = pd.RangeIndex(total, total + len(chunk))
+                    total += len(chunk)
+                    record.rows_out = total
+                    with suspended(record):
+                        yield chunk
+                    pending, pending_rows = ([rest] if len(rest) else []), len(rest)
+            
+            if pending_rows:
+                chunk = pd.concat(pending) if len(pending) > 1 else pending[0]
+                chunk.index = pd.RangeIndex(total, total + len(chunk))
+                total += len(chunk)
+                record.rows_out = total
+                with suspended(record):
+                    yield chunk
+            
+            log.info(f"✅ Statement streamed! Found {total} solid spends ready for reward analysis.")
+            
+        except Exception as e:
+            # Re-raised: chunks may already be out, so returning would pass off a truncated statement as complete
+            log.error(f"❌ Error streaming statement: {e}")
+            raise
+
 if __name__ == "__main__":
     # Test path - Ensure your file is named exactly 'transactions.xlsx' in data_samples folder
-    test_path = "../../data_samples/transactions.xlsx"
+    test_path = os.path.join(os.path.dirname(__file__), '..', '..', 'data_samples', 'transactions.xlsx')
+    configure_logging()
     
     if os.path.exists(test_path):
         cleaned_data = parse_user_transactions(test_path)
@@ -0,0 +1,225 @@
+"""
+Column layout templates for coordinate-based PDF statements.
+
+Every bank prints the same table on every page: a header row (Date | Narration |
+Withdrawal | Deposit | Balance ...) and one line per transaction below it. The
+header row on the first page gives the columns' x-boundaries ONCE; every word on
+every page is then placed in its column with a bisect on its x-centre instead of
+regex-guessing which of a line's numbers is the debit.
+
+Finding the header means interpreting page 1, which costs as much as parsing it,
+so the parser detects the template from page 1's lines and parses those same
+lines with it - page 1 is never interpreted twice (see parse_pdf_statement).
+The fingerprint (page size + header cells) only names the template in logs.
+"""
+import bisect
+import hashlib
+import re
+
+# Header cell text (lower-cased, letters only) -> column role. Longest alias wins.
+COLUMN_ALIASES = {
+    'serial': ('sl', 'sl no', 'slno', 's no', 'sno', 'sr', 'sr no', 'srno', 'no'),
+    'date': ('date', 'txn date', 'tran date', 'trans date', 'transaction date', 'post date', 'posting date'),
+    'value_date': ('value date', 'value dt'),
+    'description': ('description', 'narration', 'particulars', 'details', 'transaction details', 'remarks',
+                    'transaction remarks'),
+    'reference': ('chq', 'cheque', 'chq no', 'cheque no', 'chq ref no', 'ref', 'ref no', 'reference'),
+    'debit': ('debit', 'debits', 'dr', 'withdrawal', 'withdrawals', 'withdrawal amt', 'debit amount'),
+    'credit': ('credit', 'credits', 'cr', 'deposit', 'deposits', 'deposit amt', 'credit amount'),
+    'balance': ('balance', 'closing balance', 'running balance'),
+}
+_ALIASES = sorted(((alias, role) for role, aliases in COLUMN_ALIASES.items() for alias in aliases),
+                  key=lambda pair: -len(pair[0]))
+REQUIRED_COLUMNS = ('date', 'description', 'debit')
+AMOUNT_COLUMNS = ('debit', 'credit', 'balance')
+
+LINE_TOLERANCE = 3      # same bucketing as parse_page_words: tops within ~3pt are one line
+X_TOLERANCE = 3         # char gap that starts a new word (pdfplumber's default)
+HEADER_WORD_GAP = 0.6   # words closer than this x their height are one header cell ('Value Date')
+
+DATE = re.compile(r'\d{2}/\d{2}/\d{4}')
+AMOUNT = re.compile(r'-?[\d,]*\d\.\d+')
+DR_CR_MARKER = re.compile(r'(?i)\(?(dr|cr)\)?\.?')
+
+
+def clean_amount_text(text):
+    # Bank's Digital Text Layer often has OCR errors - sanitized before any math
+    return text.replace('o.d', '0.0').replace('O.D', '0.0')
+
+
+def parse_amount(words):
+    """A money cell's words -> float, or None when it holds no amount ('', '-')."""
+    for word in words:
+        text = clean_amount_text(word)
+        if AMOUNT.fullmatch(text):
+            return float(text.replace(',', ''))
+    return None
+
+
+def column_role(text):
+    normalized = re.sub(r'[^a-z]+', ' ', text.lower()).strip()
+    for alias, role in _ALIASES:
+        if normalized == alias or normalized.startswith(alias + ' '):
+            return role
+    return None
+
+
+# --- Page text: chars -> lines -> words ---
+def page_chars(page):
+    """
+    (text, x0, x1, top, bottom) for every upright char on a pdfplumber page, read
+    straight off pdfminer's layout. pdfplumber's own per-char dicts (every attribute
+    resolved, colours, fonts) cost more than interpreting the PDF itself.
+    """
+    from pdfminer.layout import LTChar, LTContainer  # pdfminer is already loaded by pdfplumber
+
+    height = page.height
+    mb_x0, mb_top = page.mediabox[:2]
+    chars = []
+
+    def walk(objects):
+        for obj in objects:
+            if isinstance(obj, LTChar):
+                if obj.upright:
+                    # Same coordinate conversion as pdfplumber's Page.process_object
+                    chars.append((obj.get_text(), obj.x0 + mb_x0, obj.x1 + mb_x0,
+                                  height - obj.y1 + mb_top, height - obj.y0 + mb_top))
+            elif isinstance(obj, LTContainer):
+                walk(obj)
+
+    walk(page.layout)
+    return chars
+
+
+def page_has_text(page):
+    """
+    True when the page's layout holds any char at all. Scanned or outlined-glyph
+    pages have none, and pdfplumber's word extraction would otherwise convert
+    every curve and rect on them just to find no words.
+    """
+    from pdfminer.layout import LTChar, LTContainer
+
+    def walk(objects):
+        for obj in objects:
+            if isinstance(obj, LTChar) or (isinstance(obj, LTContainer) and walk(obj)):
+                return True
+        return False
+
+    return walk(page.layout)
+
+
+def page_lines(chars):
+    """Chars -> [(y, [(word, x0, x1, height), ...])] top to bottom, words left to right."""
+    buckets = {}
+    for char in chars:
+        buckets.setdefault(round(char[3] / LINE_TOLERANCE) * LINE_TOLERANCE, []).append(char)
+
+    lines = []
+    for y in sorted(buckets):
+        words, text, x0, x1, height = [], '', 0.0, 0.0, 0.0
+        for char, c0, c1, top, bottom in sorted(buckets[y], key=lambda c: c[1]):
+            # A space or a visible gap ends the current word
+            if char.isspace() or (text and c0 - x1 > X_TOLERANCE):
+                if text:
+                    words.append((text, x0, x1, height))
+                text = ''
+                if char.isspace():
+                    continue
+            if not text:
+                x0, height = c0, bottom - top
+            text += char
+            x1 = c1
+        if text:
+            words.append((text, x0, x1, height))
+        lines.append((y, words))
+    return lines
+
+
+class PdfLayout:
+    """
+    Column roles left to right (None = a column we don't read) + the x-boundaries
+    between them. Plain attributes only, so it pickles into worker processes.
+    """
+
+    def __init__(self, roles, boundaries, fingerprint):
+        self.roles = list(roles)
+        self.boundaries = list(boundaries)
+        self.fingerprint = fingerprint
+        self.positions = {role: i for i, role in enumerate(self.roles) if role is not None}
+        self.amount_positions = {self.positions[r] for r in AMOUNT_COLUMNS if r in self.positions}
+        # Words that can't live in a money column (wrapped narration) belong to the description
+        self.overflow_position = self.positions['description']
+
+    def __repr__(self):
+        return f"PdfLayout({' | '.join(role or '?' for role in self.roles)}, {self.fingerprint})"
+
+    def split_line(self, words):
+        """One line's words -> per-column word lists, placed by each word's x-centre."""
+        cells = [[] for _ in self.roles]
+        for text, x0, x1, _ in words:
+            position = bisect.bisect_right(self.boundaries, (x0 + x1) / 2)
+            if position in self.amount_positions and not AMOUNT.fullmatch(clean_amount_text(text)):
+                if DR_CR_MARKER.fullmatch(text):
+                    continue
+                position = self.overflow_position
+            cells[position].append(text)
+        return cells
+
+    def parse_lines(self, lines):
+        """Page lines -> debit transactions (same records parse_page_words produces)."""
+        date_at, description_at, debit_at = (self.positions[r] for r in REQUIRED_COLUMNS)
+        transactions = []
+        for _, words in lines:
+            cells = self.split_line(words)
+            # Header rows, totals and page furniture have no date in the date column
+            date_match = DATE.search(" ".join(cells[date_at]))
+            if not date_match:
+                continue
+            debit_amount = parse_amount(cells[debit_at])
+            if debit_amount is None or debit_amount <= 0:
+                continue
+            transactions.append({
+                'date': date_match.group(),
+                'description': " ".join(cells[description_at]),
+                'amount': debit_amount,
+                'type': 'Debit'
+            })
+        return transactions
+
+
+def header_cells(words):
+    """A line's words -> [(text, x0, x1)], merging words that sit closer than a space apart."""
+    cells = []
+    for text, x0, x1, height in words:
+        if cells and x0 - cells[-1][2] <= max(height, 1.0) * HEADER_WORD_GAP:
+            previous = cells[-1]
+            cells[-1] = (f"{previous[0]} {text}", previous[1], x1)
+        else:
+            cells.append((text, x0, x1))
+    return cells
+
+
+def detect_layout(lines, page_width):
+    """
+    Finds the statement's header row among the first page's lines and returns its
+    PdfLayout, or None when no line looks like a header.
+    """
+    for _, words in lines:
+        cells = header_cells(words)
+        roles = [column_role(text) for text, _, _ in cells]
+        if not all(role in roles for role in REQUIRED_COLUMNS):
+            continue
+        # A repeated role (two 'Date' columns) is only read from its first column
+        seen = set()
+        for i, role in enumerate(roles):
+            if role in seen:
+                roles[i] = None
+            seen.add(role)
+
+        signature = f"{round(page_width)}|" + "|".join(
+            f"{role or '-'}@{round(x0)}-{round(x1)}" for role, (_, x0, x1) in zip(roles, cells))
+        fingerprint = hashlib.sha1(signature.encode()).hexdigest()[:12]
+        # Boundary = middle of the gap between neighbouring header cells
+        boundaries = [(left[2] + right[1]) / 2 for left, right in zip(cells, cells[1:])]
+        return PdfLayout(roles, boundaries, fingerprint)
+    return None
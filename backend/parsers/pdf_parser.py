@@ -1,89 +1,174 @@
-import pdfplumber
 import pandas as pd
 import re
+import os
+from concurrent.futures import ProcessPoolExecutor
 
-def parse_pdf_statement(file_path):
+from ai_engine.instrumentation import get_logger, instrumented, count, configure_logging
+from .pdf_layout import detect_layout, page_chars, page_has_text, page_lines
+
+log = get_logger('pdf_parser')
+
+# Below two task ranges the pool's start-up and page-1 hand-off cost more than the split saves
+PARALLEL_MIN_PAGES = 16
+
+def parse_page_words(words):
+    """
+    Turns ONE page's words (with X/Y coordinates) into debit transactions.
+    Pure function of the words - safe to run in any worker process.
+    Fallback for statements without a recognizable header row (see pdf_layout).
+    """
+    transactions = []
+    
+    # Group words into horizontal lines based on Y-coordinate
+    lines = {}
+    for word in words:
+        # Grouping words that are on the same vertical line (tolerance of 3 pixels)
+        top_rounded = round(word['top'] / 3) * 3
+        if top_rounded not in lines:
+            lines[top_rounded] = []
+        lines[top_rounded].append(word)
+        
+    # Read the page from top to bottom
+    for y_coord in sorted(lines.keys()):
+        # Read the line from left to right
+        line_words = sorted(lines[y_coord], key=lambda w: w['x0'])
+        line_text = " ".join([w['text'] for w in line_words])
+        
+        # 1. Check if line has a Date (DD/MM/YYYY)
+        date_match = re.search(r'\d{2}/\d{2}/\d{4}', line_text)
+        if not date_match:
+            continue
+            
+        # 2. Extract Date
+        date_val = date_match.group()
+        
+        # 3. Bank's Digital Text Layer often has OCR errors 
+        # We sanitize it before math (trust me, at the code layer, banks do this)
+        clean_text = line_text.replace(',', '').replace('o.d', '0.0').replace('O.D', '0.0')
+        
+        # 4. Find all numbers with decimals in this line
+        amounts = re.findall(r'\b\d+\.\d+\b', clean_text)
+        
+        # Sequence is always: Description -> Debit -> Credit -> Balance
+        if len(amounts) >= 3:
+            debit_str = amounts[-3]
+            try:
+                debit_amount = float(debit_str)
+                if debit_amount > 0:
+                    # Description is the text without dates and amounts
+                    desc = line_text
+                    desc = re.sub(r'\d{2}/\d{2}/\d{4}', '', desc)
+                    for amt in re.findall(r'\b\d+[.,]\d+\b', line_text):
+                        desc = desc.replace(amt, '')
+                    # Clean up leading serial numbers
+                    desc = re.sub(r'^\s*\d+\s+', '', desc).strip()
+                    
+                    transactions.append({
+                        'date': date_val,
+                        'description': desc,
+                        'amount': debit_amount,
+                        'type': 'Debit'
+                    })
+            except:
+                continue
+    return transactions
+
+def parse_pages(pages, layout=None):
+    """
+    pdfplumber pages -> (debit transactions, layout). With a layout template every
+    word goes straight to its column; without one (and starting at page 1) the
+    template is learned from the first page's header and that page's lines are
+    parsed with it, so page 1 is interpreted only once. Pages without a text layer
+    are skipped before pdfplumber builds their word objects.
+    Each page's cache is flushed right after use so memory stays bounded.
+    """
+    transactions = []
+    for page in pages:
+        if layout is not None or page.page_number == 1:
+            lines = page_lines(page_chars(page))
+            if layout is None:
+                layout = detect_layout(lines, page.width)
+        if layout is not None:
+            transactions.extend(layout.parse_lines(lines))
+        elif page_has_text(page):
+            # Extract every single word and its exact screen coordinates
+            transactions.extend(parse_page_words(page.extract_words()))
+        page.flush_cache()
+    return transactions, layout
+
+def parse_page_range(file_path, start, stop, layout=None):
+    """Worker job: opens the PDF on its own and parses pages [start, stop)."""
+    import pdfplumber  # heavy (pdfminer) - only loaded when a PDF is actually parsed
+
+    with pdfplumber.open(file_path) as pdf:
+        pages = pdf.pages[start:stop]
+        transactions, layout = parse_pages(pages, layout)
+    count(pages=len(pages), template_pages=len(pages) if layout is not None else 0)
+    return transactions
+
+@instrumented('parse_pdf_statement')
+def parse_pdf_statement(file_path, workers=1, pages_per_task=8, strict=False, min_pages=PARALLEL_MIN_PAGES):
     """
     The 'Coordinate-Based' Word Engine. 
     Bypasses hidden bank tables and reads words purely by their X/Y position on the screen.
+    Column x-boundaries come from the first page's header row (pdf_layout templates).
+    
+    workers > 1 hands page ranges to a process pool and merges the results
+    back in page order - the output is identical to the serial path.
+    workers=None uses every CPU core. Statements under min_pages pages are
+    parsed in this process whatever workers says.
+    strict=True re-raises read errors instead of returning None (0 debits is still None).
     """
-    print("⏳ AI Engine: Initiating 'Coordinate-Based Word Extraction' (The Final Boss)...")
+    log.info("⏳ AI Engine: Initiating 'Coordinate-Based Word Extraction' (The Final Boss)...")
     transactions = []
     
     try:
-        with pdfplumber.open(file_path) as pdf:
-            for page in pdf.pages:
-                # Extract every single word and its exact screen coordinates
-                words = page.extract_words()
-                
-                # Group words into horizontal lines based on Y-coordinate
-                lines = {}
-                for word in words:
-                    # Grouping words that are on the same vertical line (tolerance of 3 pixels)
-                    top_rounded = round(word['top'] / 3) * 3
-                    if top_rounded not in lines:
-                        lines[top_rounded] = []
-                    lines[top_rounded].append(word)
-                    
-                # Read the page from top to bottom
-                for y_coord in sorted(lines.keys()):
-                    # Read the line from left to right
-                    line_words = sorted(lines[y_coord], key=lambda w: w['x0'])
-                    line_text = " ".join([w['text'] for w in line_words])
-                    
-                    # 1. Check if line has a Date (DD/MM/YYYY)
-                    date_match = re.search(r'\d{2}/\d{2}/\d{4}', line_text)
-                    if not date_match:
-                        continue
-                        
-                    # 2. Extract Date
-                    date_val = date_match.group()
-                    
-                    # 3. Bank's Digital Text Layer often has OCR errors 
-                    # We sanitize it before math (trust me, at the code layer, banks do this)
-                    clean_text = line_text.replace(',', '').replace('o.d', '0.0').replace('O.D', '0.0')
-                    
-                    # 4. Find all numbers with decimals in this line
-                    amounts = re.findall(r'\b\d+\.\d+\b', clean_text)
-                    
-                    # Sequence is always: Description -> Debit -> Credit -> Balance
-                    if len(amounts) >= 3:
-                        debit_str = amounts[-3]
-                        try:
-                            debit_amount = float(debit_str)
-                            if debit_amount > 0:
-                                # Description is the text without dates and amounts
-                                desc = line_text
-                                desc = re.sub(r'\d{2}/\d{2}/\d{4}', '', desc)
-                                for amt in re.findall(r'\b\d+[.,]\d+\b', line_text):
-                                    desc = desc.replace(amt, '')
-                                # Clean up leading serial numbers
-                                desc = re.sub(r'^\s*\d+\s+', '', desc).strip()
-                                
-                                transactions.append({
-                                    'date': date_val,
-                                    'description': desc,
-                                    'amount': debit_amount,
-                                    'type': 'Debit'
-                                })
-                        except:
-                            continue
+        if workers is None:
+            workers = os.cpu_count() or 1
+        
+        if workers <= 1:
+            transactions = parse_page_range(file_path, 0, None)
+        else:
+            import pdfplumber
+
+            # Page 1 is parsed here: the header template comes from the same lines,
+            # then ships to every worker with its page range
+            with pdfplumber.open(file_path) as pdf:
+                n_pages = len(pdf.pages)
+                transactions, layout = parse_pages(pdf.pages[:1])
+                if n_pages < min_pages:
+                    # Too small to pay for a pool: the rest of the pages stay in this process
+                    transactions.extend(parse_pages(pdf.pages[1:], layout)[0])
+            ranges = [(start, min(start + pages_per_task, n_pages)) for start in range(1, n_pages, pages_per_task)]
+            # Worker processes have their own metrics, so pages are counted here
+            count(pages=n_pages, template_pages=n_pages if layout is not None else 0)
+            # 0-1 pages (or a small statement): nothing to hand out, the result is already complete
+            if ranges and n_pages >= min_pages:
+                starts, stops = zip(*ranges)
+                with ProcessPoolExecutor(max_workers=min(workers, len(ranges))) as pool:
+                    # map() keeps submission order = page order; every iterable has len(ranges) items
+                    for page_transactions in pool.map(parse_page_range, [file_path] * len(ranges), starts, stops,
+                                                      [layout] * len(ranges)):
+                        transactions.extend(page_transactions)
 
         df_spends = pd.DataFrame(transactions)
         
         if df_spends.empty:
-            print("⚠️ Parsed successfully, but 0 debits. System strictly needs OCR.")
+            log.warning("⚠️ Parsed successfully, but 0 debits. System strictly needs OCR.")
             return None
             
-        print(f"✅ BOOM! Coordinate Engine bypassed the bank's security! Found {len(df_spends)} solid spends.")
+        log.info(f"✅ BOOM! Coordinate Engine bypassed the bank's security! Found {len(df_spends)} solid spends.")
         return df_spends
 
     except Exception as e:
-        print(f"❌ Error: {e}")
+        log.error(f"❌ Error: {e}")
+        if strict:
+            raise
         return None
 
 if __name__ == "__main__":
-    test_pdf_path = "../../data_samples/act statement1.pdf"
+    test_pdf_path = os.path.join(os.path.dirname(__file__), '..', '..', 'data_samples', 'act statement1.pdf')
+    configure_logging()
     cleaned_pdf_data = parse_pdf_statement(test_pdf_path)
     if cleaned_pdf_data is not None:
         print("\n--- Top 5 Cleaned Spends from PDF ---")
@@ -0,0 +1,378 @@
+"""
+Headless optimization service (stdlib asyncio, no web framework).
+
+    python server.py --port 8080 --workers 4
+
+    POST /statements?filename=may.xlsx     raw file body (.xlsx/.csv/.pdf) -> statement_id
+    POST /statements/<id>/optimize         best card per transaction + total savings
+    POST /statements/<id>/wallet?k=2       best k-card wallet (net of fees)
+    GET  /statements/<id>/summary?top=10   per-category savings + top-N rows of the last optimize
+    POST /chat                             {"query": "..."} -> chat answer
+    GET  /health                           catalog + load info
+    GET  /metrics                          per-stage timers/counters summed over all workers
+
+Parsing, categorization and optimization run in a process pool. Each worker
+loads the card catalog once at start-up and only reads it afterwards. When
+every worker slot and queue slot is busy the service answers 503 with
+Retry-After instead of queueing without limit, so a load balancer can route
+elsewhere.
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from urllib.parse import urlsplit, parse_qs
+
+# Only the catalog-only chat path loads at start-up; pandas & the parsers load in the workers
+from ai_engine.card_catalog import get_card_catalog, DEFAULT_DB_PATH
+from ai_engine.results_store import get_results_store, DEFAULT_RESULTS_DB
+from ai_engine.query_engine import universal_query_engine, CHAT_ROUTER
+from ai_engine.statement_loader import SUPPORTED_FORMATS, StatementReadError, init_worker, load_statement
+from ai_engine.instrumentation import get_logger, get_metrics, configure_logging
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+
+log = get_logger('server')
+
+UPLOAD_DIR = os.path.join(BACKEND_DIR, '.uploads')
+MAX_UPLOAD_BYTES = 25 * 1024 * 1024
+MAX_HEADER_BYTES = 16 * 1024
+REQUEST_TIMEOUT_SECONDS = 30
+
+STATUS_TEXT = {200: 'OK', 201: 'Created', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed',
+               413: 'Payload Too Large', 422: 'Unprocessable Entity', 500: 'Internal Server Error',
+               503: 'Service Unavailable'}
+
+
+class HTTPError(Exception):
+    def __init__(self, status, message, headers=None):
+        super().__init__(message)
+        self.status, self.message, self.headers = status, message, headers or {}
+
+
+# --- Worker side (runs inside the process pool) ---
+def _run_instrumented(fn, *args):
+    # Stage metrics live in the worker process - ship a snapshot back with every result
+    return os.getpid(), fn(*args), get_metrics()
+
+
+def _load_upload(path):
+    # strict: an unreadable upload must not look like a statement without debits
+    try:
+        return load_statement(path, strict=True)
+    except Exception as e:
+        raise StatementReadError(f"{type(e).__name__}: {e}") from None
+
+
+def categorize_job(path):
+    df = _load_upload(path)
+    if df is None or df.empty:
+        return {'rows': 0, 'categories': {}}
+    return {'rows': int(len(df)), 'categories': {str(k): int(v) for k, v in df['category'].value_counts().items()}}
+
+
+def optimize_job(path, db_path, results_db, statement_id):
+    from ai_engine.chat_agent import optimize_compact, render_optimized
+    from ai_engine.compact import to_compact
+    df = to_compact(_load_upload(path))
+    if df is None or df.empty:
+        return None
+    result, total = optimize_compact(df, get_card_catalog(db_path))
+    # WAL: workers write while the service (and anyone else) reads the same file
+    get_results_store(results_db).save_results(statement_id, df, result, total)
+    # Display strings only at the response boundary
+    return {'total_savings': round(total, 2), 'transactions': render_optimized(df, result).to_dict(orient='records')}
+
+
+def wallet_job(path, db_path, k):
+    from ai_engine.wallet_optimizer import optimize_wallet
+    df = _load_upload(path)
+    if df is None or df.empty:
+        return None
+    result = optimize_wallet(df, get_card_catalog(db_path), k=k)
+    result['routed_spend'] = result['routed_spend'].to_dict(orient='records')
+    return result
+
+
+# --- Service side (asyncio event loop) ---
+class OptimizerService:
+    def __init__(self, workers=None, max_pending=None, db_path=DEFAULT_DB_PATH, upload_dir=UPLOAD_DIR,
+                 results_db=DEFAULT_RESULTS_DB):
+        self.workers = workers or os.cpu_count() or 1
+        # Backpressure: at most this many CPU jobs running or waiting at once
+        self.max_pending = max_pending or self.workers * 4
+        self.db_path = os.path.abspath(db_path)
+        self.upload_dir = upload_dir
+        self.results_db = os.path.abspath(results_db)
+        self.pool = None
+        self.inflight = 0
+        self.served = 0
+        self.rejected = 0
+        self.started = time.time()
+        self.worker_metrics = {}
+
+    def start_pool(self):
+        # 'spawn' never copies the parent's open SQLite handle or event loop into the workers
+        ctx = multiprocessing.get_context('spawn')
+        self.pool = ProcessPoolExecutor(max_workers=self.workers, mp_context=ctx,
+                                        initializer=init_worker, initargs=(self.db_path,))
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.shutdown(wait=True, cancel_futures=True)
+
+    async def run_job(self, fn, *args):
+        if self.inflight >= self.max_pending:
+            self.rejected += 1
+            raise HTTPError(503, "Server busy, retry shortly.", {'Retry-After': '1'})
+        self.inflight += 1
+        try:
+            pid, result, metrics = await asyncio.get_running_loop().run_in_executor(
+                self.pool, _run_instrumented, fn, *args)
+            self.worker_metrics[pid] = metrics
+            return result
+        except StatementReadError as e:
+            raise HTTPError(422, f"Could not read this statement: {e}")
+        finally:
+            self.inflight -= 1
+
+    def statement_path(self, statement_id):
+        for ext in SUPPORTED_FORMATS:
+            path = os.path.join(self.upload_dir, statement_id + ext)
+            if os.path.isfile(path):
+                return path
+        raise HTTPError(404, f"Unknown statement_id: {statement_id}")
+
+    # --- Endpoints ---
+    async def health(self, query, body):
+        catalog = get_card_catalog(self.db_path)
+        return 200, {
+            'status': 'ok', 'cards': len(catalog), 'catalog_version': catalog.version,
+            'workers': self.workers, 'inflight': self.inflight, 'max_pending': self.max_pending,
+            'served': self.served, 'rejected': self.rejected, 'uptime_s': round(time.time() - self.started, 1),
+        }
+
+    async def metrics(self, query, body):
+        totals = {}
+        for snapshot in [get_metrics(), *self.worker_metrics.values()]:
+            for name, values in snapshot.items():
+                merged = totals.setdefault(name, {})
+                for key, value in values.items():
+                    if key == 'last_wall_s':
+                        merged[key] = value
+                    else:
+                        merged[key] = merged.get(key, 0) + value
+        return 200, {'workers_reporting': len(self.worker_metrics), 'stages': totals}
+
+    async def upload(self, query, body):
+        filename = (query.get('filename') or ['statement.xlsx'])[0]
+        ext = os.path.splitext(filename)[1].lower()
+        if ext not in SUPPORTED_FORMATS:
+            raise HTTPError(400, f"Unsupported file type '{ext}'. Use one of {', '.join(SUPPORTED_FORMATS)}.")
+        if not body:
+            raise HTTPError(400, "Empty upload.")
+
+        # Content-addressed: re-uploading the same file reuses every cache downstream
+        statement_id = hashlib.sha256(body).hexdigest()[:24]
+        os.makedirs(self.upload_dir, exist_ok=True)
+        path = os.path.join(self.upload_dir, statement_id + ext)
+        if not os.path.isfile(path):
+            tmp = f"{path}.{os.getpid()}.tmp"
+            with open(tmp, 'wb') as f:
+                f.write(body)
+            os.replace(tmp, path)
+
+        summary = await self.run_job(categorize_job, path)
+        if not summary['rows']:
+            raise HTTPError(422, "No debit transactions found in this statement.")
+        return 201, {'statement_id': statement_id, 'format': ext.lstrip('.'), **summary}
+
+    async def optimize(self, statement_id, query, body):
+        result = await self.run_job(optimize_job, self.statement_path(statement_id), self.db_path,
+                                    self.results_db, statement_id)
+        if result is None:
+            raise HTTPError(422, "No debit transactions found in this statement.")
+        return 200, {'statement_id': statement_id, **result}
+
+    async def wallet(self, statement_id, query, body):
+        try:
+            k = int((query.get('k') or ['2'])[0])
+        except ValueError:
+            raise HTTPError(400, "k must be an integer.")
+        if k < 1:
+            raise HTTPError(400, "k must be at least 1.")
+        result = await self.run_job(wallet_job, self.statement_path(statement_id), self.db_path, k)
+        if result is None:
+            raise HTTPError(422, "No debit transactions found in this statement.")
+        return 200, {'statement_id': statement_id, **result}
+
+    async def summary(self, statement_id, query, body):
+        try:
+            top = int((query.get('top') or ['10'])[0])
+        except ValueError:
+            raise HTTPError(400, "top must be an integer.")
+        store = get_results_store(self.results_db)
+
+        def read():
+            # Indexed lookups on the stored results - no worker round-trip
+            if not store.has_statement(statement_id):
+                return None
+            return {'statement_id': statement_id,
+                    'total_savings': round(store.total_savings(statement_id), 2),
+                    'categories': store.category_summary(statement_id),
+                    'top': store.top_savings(top, statement_id)}
+
+        result = await asyncio.to_thread(read)
+        if result is None:
+            raise HTTPError(404, f"No results for {statement_id} yet - call /statements/{statement_id}/optimize first.")
+        return 200, result
+
+    async def chat(self, query, body):
+        try:
+            payload = json.loads(body or b'{}')
+            text = str(payload['query'])
+        except (ValueError, KeyError, TypeError):
+            raise HTTPError(400, 'Body must be JSON like {"query": "..."}.')
+        # Index lookups only - cheap enough to answer on the event loop
+        matches = CHAT_ROUTER.route(text.lower())
+        intent = matches[0].intent if matches else None
+        if intent == 'optimize':
+            answer = "Upload a statement to /statements, then call /statements/<id>/optimize."
+        else:
+            answer = universal_query_engine(text.lower(), get_card_catalog(self.db_path), matches=matches)
+        return 200, {'intent': intent, 'response': answer}
+
+    def route(self, method, path):
+        parts = [p for p in path.split('/') if p]
+        if parts == ['health'] and method == 'GET':
+            return self.health
+        if parts == ['metrics'] and method == 'GET':
+            return self.metrics
+        if parts == ['chat'] and method == 'POST':
+            return self.chat
+        if parts == ['statements'] and method == 'POST':
+            return self.upload
+        if len(parts) == 3 and parts[0] == 'statements' and parts[2] == 'summary' and method == 'GET':
+            return lambda query, body: self.summary(parts[1], query, body)
+        if len(parts) == 3 and parts[0] == 'statements' and method == 'POST':
+            action = {'optimize': self.optimize, 'wallet': self.wallet}.get(parts[2])
+            if action:
+                return lambda query, body: action(parts[1], query, body)
+        if parts and parts[0] in ('health', 'metrics', 'chat', 'statements'):
+            raise HTTPError(405, f"{method} not allowed on {path}")
+        raise HTTPError(404, f"No route for {path}")
+
+    # --- HTTP/1.1 plumbing ---
+    async def read_request(self, reader):
+        head = await reader.readuntil(b'\r\n\r\n')
+        if len(head) > MAX_HEADER_BYTES:
+            raise HTTPError(400, "Headers too large.")
+        lines = head.decode('latin-1').split('\r\n')
+        try:
+            method, target, version = lines[0].split(' ', 2)
+        except ValueError:
+            raise HTTPError(400, "Malformed request line.")
+        headers = {}
+        for line in lines[1:]:
+            if ':' in line:
+                name, value = line.split(':', 1)
+                headers[name.strip().lower()] = value.strip()
+
+        raw_length = headers.get('content-length') or '0'
+        # Digits only: int() would also take '-5', ' 7' or '1_000'
+        if not (raw_length.isascii() and raw_length.isdigit()):
+            raise HTTPError(400, "Content-Length must be a non-negative integer.")
+        length = int(raw_length)
+        if length > MAX_UPLOAD_BYTES:
+            raise HTTPError(413, f"Upload limit is {MAX_UPLOAD_BYTES // (1024 * 1024)} MB.")
+        body = await reader.readexactly(length) if length else b''
+        return method.upper(), target, version, headers, body
+
+    @staticmethod
+    def write_response(writer, status, payload, keep_alive, extra_headers=None):
+        data = json.dumps(payload, default=str).encode()
+        headers = {
+            'Content-Type': 'application/json',
+            'Content-Length': str(len(data)),
+            'Connection': 'keep-alive' if keep_alive else 'close',
+            **(extra_headers or {}),
+        }
+        head = f"HTTP/1.1 {status} {STATUS_TEXT.get(status, '')}\r\n"
+        head += ''.join(f"{k}: {v}\r\n" for k, v in headers.items()) + "\r\n"
+        writer.write(head.encode('latin-1') + data)
+
+    async def handle_connection(self, reader, writer):
+        try:
+            while True:
+                try:
+                    method, target, version, headers, body = await asyncio.wait_for(
+                        self.read_request(reader), REQUEST_TIMEOUT_SECONDS)
+                except (asyncio.IncompleteReadError, asyncio.TimeoutError, ConnectionError):
+                    break
+                except asyncio.LimitOverrunError:
+                    self.write_response(writer, 400, {'error': "Headers too large."}, False)
+                    break
+                except HTTPError as e:
+                    self.write_response(writer, e.status, {'error': e.message}, False, e.headers)
+                    break
+
+                keep_alive = headers.get('connection', '').lower() != 'close' and version == 'HTTP/1.1'
+                url = urlsplit(target)
+                try:
+                    handler = self.route(method, url.path)
+                    status, payload = await handler(parse_qs(url.query), body)
+                    extra = {}
+                    self.served += 1
+                except HTTPError as e:
+                    status, payload, extra = e.status, {'error': e.message}, e.headers
+                except Exception as e:
+                    log.exception(f"❌ Request failed ({method} {url.path}): {e}")
+                    status, payload, extra = 500, {'error': "Internal error."}, {}
+
+                self.write_response(writer, status, payload, keep_alive, extra)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        finally:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+    async def serve(self, host='127.0.0.1', port=8080):
+        get_card_catalog(self.db_path)  # fail fast if the DB is missing
+        self.start_pool()
+        server = await asyncio.start_server(self.handle_connection, host, port, limit=MAX_HEADER_BYTES)
+        log.info(f"🚀 Optimizer service on http://{host}:{port} ({self.workers} workers, max {self.max_pending} pending jobs)")
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            self.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Headless credit card optimizer service.")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--workers', type=int, default=None, help="process pool size (default: CPU count)")
+    parser.add_argument('--max-pending', type=int, default=None, help="CPU jobs allowed in flight before 503 (default: 4 x workers)")
+    parser.add_argument('--db', default=DEFAULT_DB_PATH, help="card catalog SQLite file")
+    parser.add_argument('--results-db', default=DEFAULT_RESULTS_DB, help="SQLite file optimize results are stored in")
+    args = parser.parse_args()
+    configure_logging()
+
+    service = OptimizerService(args.workers, args.max_pending, args.db, results_db=args.results_db)
+    try:
+        asyncio.run(service.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        log.info("👋 Service stopped.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+CatalogDB: bulk loads upsert in one validated transaction, and the indexed
+queries rank cards the way a scan over every card would.
+"""
+import json
+import sqlite3
+
+import pytest
+
+from ai_engine.card_catalog import DEFAULT_DB_PATH
+from ai_engine.catalog_db import CARD_COLUMNS, CatalogDB
+from benchmarks.generators import write_card_catalog
+
+
+def _card(card_name, **terms):
+    entry = {'bank_name': 'Axis', 'card_name': card_name, 'joining_fee': 500, 'renewal_fee': 500,
+             'waiver_spend_limit': 0, 'spends_per_reward_unit': 100, 'unified_reward_value_inr': 1.0,
+             'multipliers': {}}
+    entry.update(terms)
+    return entry
+
+
+@pytest.fixture
+def db(tmp_path):
+    db = CatalogDB(write_card_catalog(str(tmp_path / 'cards.db'), 40, seed=11))
+    yield db
+    db.close()
+
+
+def _scan(db):
+    with sqlite3.connect(db.db_path) as conn:
+        conn.row_factory = sqlite3.Row
+        return [dict(row) for row in conn.execute("SELECT * FROM credit_cards ORDER BY id")]
+
+
+def test_schema_matches_the_shipped_catalog(tmp_path):
+    def columns(path):
+        with sqlite3.connect(path) as conn:
+            return [(row[1], row[2]) for row in conn.execute("PRAGMA table_info(credit_cards)")]
+
+    CatalogDB(str(tmp_path / 'fresh.db')).close()
+    assert columns(str(tmp_path / 'fresh.db')) == columns(DEFAULT_DB_PATH)
+    assert [name for name, _ in columns(DEFAULT_DB_PATH)] == ['id'] + CARD_COLUMNS
+
+
+def test_upsert_keeps_ids_and_replaces_multipliers(tmp_path):
+    db = CatalogDB(str(tmp_path / 'cards.db'))
+    assert db.load_cards([_card('Ace', multipliers={'Dining': 4})]) == {
+        'cards': 1, 'inserted': 1, 'updated': 0, 'multiplier_rows': 2}
+    card_id = _scan(db)[0]['id']
+
+    stats = db.load_cards([_card('Ace', joining_fee='1,000', multipliers={'travel': 2}), _card('Flipkart')])
+    assert (stats['inserted'], stats['updated']) == (1, 1)
+    ace = _scan(db)[0]
+    assert (ace['id'], ace['joining_fee'], json.loads(ace['multipliers_json'])) == (card_id, 1000.0, {'travel': 2.0})
+    assert db.best_cards_for_category('dining', 1)[0]['multiplier'] == 1.0  # the old dining row is gone
+    db.close()
+
+
+def test_an_invalid_row_loads_nothing(db):
+    before = _scan(db)
+    with pytest.raises(ValueError, match='1 invalid card rows, nothing loaded'):
+        db.load_cards([_card('Fine'), _card('Broken', multipliers='[1, 2]')])
+    assert _scan(db) == before
+
+
+@pytest.mark.parametrize('key', ['dining', 'travel', 'swiggy', 'no_such_key'])
+def test_best_cards_match_a_full_scan(db, key):
+    def rate(card):
+        multiplier = json.loads(card['multipliers_json']).get(key, 1.0)
+        return multiplier / card['spends_per_reward_unit'] * card['unified_reward_value_inr']
+
+    ranked = sorted(_scan(db), key=lambda card: (-rate(card), card['id']))[:5]
+    best = db.best_cards_for_category(key, 5)
+    assert [(c['bank_name'], c['card_name']) for c in best] == [(c['bank_name'], c['card_name']) for c in ranked]
+    assert [c['roi_pct'] for c in best] == [round(rate(c) * 100, 4) for c in ranked]
+
+
+def test_fee_and_waiver_queries_are_ordered(db):
+    cards = _scan(db)
+    cheapest = sorted(cards, key=lambda c: (c['renewal_fee'], c['id']))[:3]
+    assert [c['card_name'] for c in db.lowest_fee_cards('renewal', 3)] == [c['card_name'] for c in cheapest]
+
+    waived = sorted((c for c in cards if 0 < c['waiver_spend_limit'] <= 200000),
+                    key=lambda c: (c['waiver_spend_limit'], c['id']))
+    assert [c['card_name'] for c in db.waiver_cards(200000)] == [c['card_name'] for c in waived]
@@ -0,0 +1,60 @@
+"""
+Compact frames: the dictionary-encoded / paise layout round-trips to the
+working frame and optimizes to the same result at a fraction of the memory.
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from ai_engine.card_catalog import CardCatalog
+from ai_engine.categorizer import run_ai_categorization
+from ai_engine.chat_agent import optimize_compact, optimize_spends
+from ai_engine.compact import (NO_RECOMMENDATION, card_codes, frame_bytes, from_compact, is_compact, statement_dates,
+                               to_compact, transaction_amounts)
+from benchmarks.generators import write_card_catalog, write_statement
+
+
+@pytest.fixture(scope='module')
+def statement(tmp_path_factory):
+    return run_ai_categorization(write_statement(str(tmp_path_factory.mktemp('compact') / 'statement.csv'), 600))
+
+
+def test_round_trip_keeps_every_value(statement):
+    compact = to_compact(statement)
+    assert is_compact(compact) and not is_compact(statement)
+    assert compact['amount_paise'].dtype == np.int64
+    assert frame_bytes(compact) < frame_bytes(statement) / 2
+
+    restored = from_compact(compact)
+    assert list(restored.columns) == list(statement.columns)
+    assert not compact['date'].isna().any()
+    pd.testing.assert_frame_equal(restored, statement.assign(date=compact['date']), check_dtype=False)
+
+
+def test_iso_and_day_first_dates_both_parse():
+    # Excel / CSV statements give ISO timestamps, PDF statements dd/mm/yyyy
+    dates = statement_dates(['2025-02-06 12:00:00', '06/02/2025', '13/02/2025', 'n/a'])
+    assert dates[:3].tolist() == [pd.Timestamp('2025-02-06 12:00'), pd.Timestamp('2025-02-06'),
+                                  pd.Timestamp('2025-02-13')]
+    assert pd.isna(dates[3])
+
+
+def test_paise_are_exact_for_two_decimal_amounts():
+    df = pd.DataFrame({'description': ['A', 'B', 'C'], 'amount': [0.1 + 0.2, 1234567.89, 19.995]})
+    compact = to_compact(df)
+    assert compact['amount_paise'].tolist() == [30, 123456789, 2000]
+    assert transaction_amounts(compact).tolist() == [0.3, 1234567.89, 20.0]
+
+
+def test_card_codes_label_duplicates_and_no_recommendation():
+    codes = card_codes([0, 1, -1, 2], ['Axis Ace', 'HDFC Regalia', 'Axis Ace'])
+    assert list(codes.categories) == ['Axis Ace', 'HDFC Regalia', 'Axis Ace (2)', NO_RECOMMENDATION]
+    assert codes.tolist() == ['Axis Ace', 'HDFC Regalia', NO_RECOMMENDATION, 'Axis Ace (2)']
+
+
+def test_optimize_compact_matches_optimize_spends(statement, tmp_path):
+    cards = CardCatalog(write_card_catalog(str(tmp_path / 'cards.db'), 30))
+    expected, expected_total = optimize_spends(statement, cards)
+    result, total = optimize_compact(to_compact(statement), cards)
+    assert total == pytest.approx(expected_total, rel=1e-12)
+    assert result['card'].astype(str).tolist() == expected['Recommended_Card'].tolist()
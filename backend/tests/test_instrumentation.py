@@ -0,0 +1,44 @@
+"""
+Stage accounting: a streaming stage is only charged for its own work, and
+per-stage timings stay out of INFO logs.
+"""
+import logging
+import time
+
+from ai_engine.instrumentation import count, get_metrics, reset_metrics, stage
+from benchmarks.generators import write_statement
+from parsers.excel_parser import iter_user_transactions
+
+CONSUMER_PAUSE_S = 0.05
+
+
+def test_generator_stage_is_not_charged_for_its_consumer(tmp_path):
+    path = write_statement(str(tmp_path / 'statement.csv'), 400)
+    reset_metrics()
+    chunks = 0
+    for chunk in iter_user_transactions(path, chunk_size=50):
+        chunks += 1
+        time.sleep(CONSUMER_PAUSE_S)
+        count(consumer_rows=len(chunk))  # no stage of the consumer's own is running
+        with stage('consumer_step'):
+            count(steps=1)
+
+    metrics = get_metrics()
+    streamed = metrics['iter_user_transactions']
+    assert chunks > 2
+    assert streamed['wall_s'] < CONSUMER_PAUSE_S * chunks / 2
+    assert 'consumer_rows' not in streamed
+    assert 'steps' not in streamed
+    assert metrics['consumer_step']['steps'] == chunks
+
+
+def test_stage_timings_log_at_debug(caplog):
+    with caplog.at_level(logging.INFO, logger='card_optimizer'):
+        with stage('quiet_stage'):
+            pass
+    assert not [r for r in caplog.records if 'quiet_stage' in r.getMessage()]
+
+    with caplog.at_level(logging.DEBUG, logger='card_optimizer'):
+        with stage('quiet_stage'):
+            pass
+    assert [r.levelno for r in caplog.records if 'quiet_stage' in r.getMessage()] == [logging.DEBUG]
@@ -0,0 +1,46 @@
+"""
+Chat routing: inflections and typos of a keyword still route, real words that
+merely look like one don't.
+"""
+import pytest
+
+from ai_engine.chat_agent import CLI_ROUTER
+from ai_engine.query_engine import CHAT_ROUTER
+
+
+def _intents(query):
+    return [match.intent for match in CHAT_ROUTER.route(query)]
+
+
+@pytest.mark.parametrize('query, intent', [
+    ('how much have i saved', 'savings'),
+    ('what am i saving', 'savings'),
+    ('showing my spends', 'top'),
+    ('explain the logical steps', 'logic'),
+    ('total', 'savings'),
+])
+def test_cli_routes_inflected_keywords(query, intent):
+    assert CLI_ROUTER.best(query).intent == intent
+
+
+@pytest.mark.parametrize('query, intent', [
+    ('movies', 'perk:movie'),
+    ('billing offers', 'roi:utilities'),
+    ('travelling abroad', 'roi:international'),
+    ('optimized spends', 'optimize'),
+    ('cheapest card', 'fee:joining'),
+    ('longue access', 'perk:lounge'),
+    ('miletsone bonus', 'perk:milestone'),
+    ('lounj acess', 'perk:lounge'),
+])
+def test_chat_routes_inflections_and_typos(query, intent):
+    assert _intents(query)[0] == intent
+
+
+@pytest.mark.parametrize('query', ['move', 'offline purchases', 'feed', 'showing', 'good'])
+def test_chat_ignores_lookalike_words(query):
+    assert _intents(query) == []
+
+
+def test_cli_does_not_read_joining_as_dining():
+    assert CLI_ROUTER.best('cheapest joining fee') is None
@@ -0,0 +1,352 @@
+"""
+Fast paths must give the same answers as the code they replaced, and the edge
+cases found in review (0-page PDFs, bad Content-Length, unreadable statements)
+stay fixed. Inputs come from benchmarks.generators, so no sample files are needed.
+
+    cd backend && python -m pytest -q tests
+"""
+import asyncio
+import json
+import sqlite3
+import time
+
+import pandas as pd
+import pytest
+
+from batch import run_batch
+from benchmarks.generators import make_statement_frame, write_card_catalog, write_pdf_statement, write_statement
+from ai_engine.card_catalog import CardCatalog
+from ai_engine.categorizer import run_ai_categorization
+from ai_engine.chat_agent import optimize_compact, optimize_spends
+from ai_engine.compact import to_compact
+from ai_engine.delta_optimizer import incremental_optimize
+from ai_engine.scenario_engine import build_scenario_base, random_scenarios, sweep_scenarios
+from parsers import pdf_parser
+from parsers.pdf_parser import PARALLEL_MIN_PAGES, parse_pdf_statement
+
+
+@pytest.fixture(scope='module')
+def statement(tmp_path_factory):
+    """A categorized synthetic statement (~600 debits)."""
+    return run_ai_categorization(write_statement(str(tmp_path_factory.mktemp('statement') / 'statement.xlsx'), 800))
+
+
+@pytest.fixture(scope='module')
+def catalog_path(tmp_path_factory):
+    return write_card_catalog(str(tmp_path_factory.mktemp('catalog') / 'cards.db'), 40)
+
+
+def _read_cards(path):
+    with sqlite3.connect(path) as conn:
+        return pd.read_sql_query("SELECT * FROM credit_cards", conn)
+
+
+# Merchant keys in generators.CATALOG_KEYS ('google_pay_bills' -> GOOGLE). The baseline only matched
+# category keys, so rows naming one of these merchants legitimately earn differently now.
+MERCHANT_KEY_WORDS = ('SWIGGY', 'ZOMATO', 'OLA', 'MYNTRA', 'AMAZON', 'GOOGLE')
+
+
+def _baseline_reward_inr(amount, category, card):
+    """calculate_reward_inr as the baseline shipped it (frozen): first category key that is a substring wins."""
+    try:
+        spends_unit = float(card['spends_per_reward_unit'])
+        inr_value = float(card['unified_reward_value_inr'])
+        multipliers = json.loads(card['multipliers_json'])
+        cat_key = str(category).lower().strip()
+        applicable_multiplier = 1.0
+        for key, val in multipliers.items():
+            if key in cat_key:
+                applicable_multiplier = float(val)
+                break
+        if spends_unit > 0:
+            base_reward_units = amount / spends_unit
+            return base_reward_units * applicable_multiplier * inr_value
+        return 0.0
+    except:
+        return 0.0
+
+
+def _baseline_optimize(transactions_df, cards_df):
+    """The baseline's per-row x per-card loop (first card to hit the max wins)."""
+    cards = cards_df.to_dict('records')
+    best_cards, saved = [], []
+    for txn in transactions_df.itertuples():
+        best_card, max_saving = "No Recommendation", -1.0
+        for card in cards:
+            saving = _baseline_reward_inr(txn.amount, txn.category, card)
+            if saving > max_saving:
+                max_saving, best_card = saving, f"{card['bank_name']} {card['card_name']}"
+        best_cards.append(best_card)
+        saved.append(max_saving)
+    return best_cards, saved
+
+
+def test_optimize_spends_matches_the_baseline_loop(statement, catalog_path):
+    cards_df = _read_cards(catalog_path)
+    category_rows = ~statement['description'].str.upper().str.contains('|'.join(MERCHANT_KEY_WORDS))
+    assert category_rows.mean() > 0.5
+    best_cards, saved = _baseline_optimize(statement[category_rows], cards_df)
+    for cards in (cards_df, CardCatalog(catalog_path)):
+        optimized_df, _ = optimize_spends(statement, cards)
+        optimized_df = optimized_df[category_rows.to_numpy()]
+        assert optimized_df['Recommended_Card'].tolist() == best_cards
+        assert optimized_df['Saved_INR'].tolist() == [round(x, 2) for x in saved]
+
+
+@pytest.mark.parametrize('pages', [0, 1, 7])
+def test_parallel_pdf_parsing_matches_serial(tmp_path, pages):
+    path = write_pdf_statement(str(tmp_path / 'statement.pdf'), pages, lines_per_page=12)
+    serial = parse_pdf_statement(path)
+    parallel = parse_pdf_statement(path, workers=2, pages_per_task=2, min_pages=0)
+    if serial is None:
+        assert parallel is None
+    else:
+        assert parallel.equals(serial)
+
+
+@pytest.mark.parametrize('pages, pooled', [(PARALLEL_MIN_PAGES - 1, False), (PARALLEL_MIN_PAGES, True)])
+def test_small_pdfs_skip_the_process_pool(tmp_path, monkeypatch, pages, pooled):
+    pools = []
+
+    class RecordingPool(pdf_parser.ProcessPoolExecutor):
+        def __init__(self, *args, **kwargs):
+            pools.append(self)
+            super().__init__(*args, **kwargs)
+
+    monkeypatch.setattr(pdf_parser, 'ProcessPoolExecutor', RecordingPool)
+    path = write_pdf_statement(str(tmp_path / 'statement.pdf'), pages, lines_per_page=4)
+    parallel = parse_pdf_statement(path, workers=4)
+    assert bool(pools) == pooled
+    assert parallel.equals(parse_pdf_statement(path))
+
+
+def test_incremental_optimize_matches_a_full_run(statement, catalog_path, tmp_path):
+    uncategorized = statement.drop(columns='category')
+    cards_df = _read_cards(catalog_path)
+    state_dir = str(tmp_path / 'delta')
+
+    # Nightly re-run: the last run saw all but the newest rows
+    incremental_optimize(uncategorized.iloc[:-40], cards_df, 'user', state_dir)
+    optimized_df, total, stats = incremental_optimize(uncategorized, cards_df, 'user', state_dir)
+    expected_df, expected_total = optimize_spends(statement, cards_df)
+    pd.testing.assert_frame_equal(optimized_df, expected_df)
+    assert total == expected_total
+    assert stats['new_rows'] == 40 and stats['reused_rows'] > 0
+
+    # Then a card's terms change
+    edited = cards_df.copy()
+    edited.loc[3, 'multipliers_json'] = json.dumps({'dining': 25.0, 'utilities': 12.0})
+    optimized_df, total, stats = incremental_optimize(uncategorized, edited, 'user', state_dir)
+    expected_df, expected_total = optimize_spends(statement, edited)
+    pd.testing.assert_frame_equal(optimized_df, expected_df)
+    assert total == expected_total
+    assert stats['changed_cards'] == 1
+
+
+def test_incremental_optimize_only_rescores_rows_an_edit_can_move(statement, catalog_path, tmp_path):
+    uncategorized = statement.drop(columns='category')
+    cards_df = _read_cards(catalog_path)
+    state_dir = str(tmp_path / 'delta')
+    expected_df, _ = optimize_spends(statement, cards_df)
+    incremental_optimize(uncategorized, cards_df, 'user', state_dir)
+
+    # A card that wins no row gets worse: every stored best card still stands
+    names = cards_df['bank_name'] + ' ' + cards_df['card_name']
+    loser = int(names[~names.isin(expected_df['Recommended_Card'])].index[0])
+    edited = cards_df.copy()
+    edited.loc[loser, 'multipliers_json'] = json.dumps({})
+    optimized_df, total, stats = incremental_optimize(uncategorized, edited, 'user', state_dir)
+    pd.testing.assert_frame_equal(optimized_df, optimize_spends(statement, edited)[0])
+    assert (stats['changed_cards'], stats['rescored_rows']) == (1, 0)
+
+    # Reordered catalog: ties between unchanged cards may now resolve differently
+    reordered = edited.iloc[::-1].reset_index(drop=True)
+    optimized_df, total, stats = incremental_optimize(uncategorized, reordered, 'user', state_dir)
+    expected_df, expected_total = optimize_spends(statement, reordered)
+    pd.testing.assert_frame_equal(optimized_df, expected_df)
+    assert total == expected_total
+    assert stats['rescored_rows'] == len(statement)
+
+
+def test_scenario_zero_is_todays_recommendation(statement, catalog_path, tmp_path):
+    catalog = CardCatalog(catalog_path)
+    compact = to_compact(statement)
+    candidates = _read_cards(write_card_catalog(str(tmp_path / 'candidates.db'), 5, seed=7)).drop(columns='id')
+
+    base = build_scenario_base(compact, catalog, extra_cards=candidates)
+    sweep = sweep_scenarios(base, random_scenarios(base, 50, value_jitter=0.3, multiplier_jitter=0.2, drop_prob=0.1))
+    _, total = optimize_compact(compact, catalog)
+    assert sweep['total_savings'][0] == pytest.approx(total, rel=1e-9)
+
+
+def test_batch_tells_unreadable_files_from_empty_statements(tmp_path):
+    statements = tmp_path / 'statements'
+    statements.mkdir()
+    write_statement(str(statements / 'good.csv'), 200, seed=1)
+    make_statement_frame(50, seed=2).assign(**{'Transaction Type': 'Credit'}).to_csv(statements / 'credits.csv', index=False)
+    (statements / 'corrupt.xlsx').write_bytes(b'not a spreadsheet')
+
+    out = tmp_path / 'run'
+    report = run_batch(str(statements), str(out), workers=1, db_path=write_card_catalog(str(tmp_path / 'cards.db'), 20))
+    with open(out / 'manifest.jsonl') as f:
+        status = {json.loads(line)['file'].rsplit('/', 1)[-1]: json.loads(line)['status'] for line in f}
+
+    assert status == {'good.csv': 'ok', 'credits.csv': 'empty', 'corrupt.xlsx': 'failed'}
+    assert report['run']['failed'] == 1
+    assert report['failed'] == [str(statements / 'corrupt.xlsx')]
+
+
+@pytest.mark.parametrize('value', ['abc', '-5', '1_000', '+3'])
+def test_bad_content_length_is_a_400(value):
+    from server import HTTPError, OptimizerService
+
+    async def read():
+        reader = asyncio.StreamReader()
+        reader.feed_data(f"POST /chat HTTP/1.1\r\nContent-Length: {value}\r\n\r\n".encode())
+        reader.feed_eof()
+        return await OptimizerService(workers=1).read_request(reader)
+
+    with pytest.raises(HTTPError) as error:
+        asyncio.run(read())
+    assert error.value.status == 400
+
+
+def test_statement_cache_round_trips_tz_aware_dates(tmp_path):
+    from ai_engine.statement_cache import load_frame, save_frame
+
+    df = pd.DataFrame({'date': pd.date_range('2025-03-30', periods=4, freq='h', tz='Asia/Kolkata'),
+                       'amount': [10.0, 20.0, 30.0, 40.0], 'description': ['a', 'b', 'a', None]})
+    save_frame(df, str(tmp_path / 'entry'))
+    pd.testing.assert_frame_equal(load_frame(str(tmp_path / 'entry')), df)
+
+
+def test_statement_cache_keeps_non_str_object_values(tmp_path):
+    from datetime import date
+    from ai_engine.statement_cache import load_frame, save_frame
+
+    df = pd.DataFrame({'date': pd.Series([date(2025, 1, 2), date(2025, 1, 3), None], dtype=object),
+                       'ref': pd.Series([101, 'UPI-7', 2.5], dtype=object),
+                       'category': pd.Categorical(['Dining', 'Travel', 'Dining'], categories=['Travel', 'Dining', 'Fuel'])})
+    save_frame(df, str(tmp_path / 'entry'))
+    loaded = load_frame(str(tmp_path / 'entry'))
+    pd.testing.assert_frame_equal(loaded, df)
+    assert [type(v) for v in loaded['ref']] == [int, str, float]
+
+
+def test_streaming_parser_raises_on_a_mid_file_error(tmp_path):
+    from parsers.excel_parser import iter_user_transactions
+
+    path = write_statement(str(tmp_path / 'statement.csv'), 3000, seed=4)
+    lines = open(path).read().splitlines()
+    with open(path, 'w') as f:
+        f.write("\n".join(lines[:2000] + ['1,2,"unterminated'] + lines[2001:]) + "\n")
+
+    streamed = []
+    with pytest.raises(Exception):
+        for chunk in iter_user_transactions(path, chunk_size=500):
+            streamed.append(chunk)
+    assert streamed  # the error came after chunks were already handed out
+
+
+def test_statement_job_reports_unreadable_upload_as_failed(tmp_path):
+    from ai_engine.statement_jobs import StatementJobRunner
+
+    runner = StatementJobRunner(db_path=write_card_catalog(str(tmp_path / 'cards.db'), 20),
+                                results_db=str(tmp_path / 'results.db'), upload_dir=str(tmp_path / 'uploads'))
+    try:
+        job = runner.get(runner.submit_upload(b'not a spreadsheet', 'corrupt.xlsx'))
+        deadline = time.time() + 30
+        while not job.finished and time.time() < deadline:
+            time.sleep(0.01)
+        snapshot = job.snapshot()
+    finally:
+        runner.shutdown()
+    assert snapshot['status'] == 'failed'
+    assert snapshot['error']
+
+
+def test_uploads_are_keyed_on_their_bytes(tmp_path):
+    from ai_engine.statement_jobs import StatementJobRunner, upload_statement_id
+
+    original = write_statement(str(tmp_path / 'statement.csv'), 50)
+    with open(original, 'rb') as f:
+        data = f.read()
+    edited = data.replace(b'SWIGGY', b'ZOMATO', 1)  # same name, same size, different statement
+    assert len(edited) == len(data) and edited != data
+    assert upload_statement_id(edited) != upload_statement_id(data)
+
+    runner = StatementJobRunner(db_path=write_card_catalog(str(tmp_path / 'cards.db'), 20),
+                                results_db=str(tmp_path / 'results.db'), upload_dir=str(tmp_path / 'uploads'))
+    try:
+        # Renaming a file doesn't make it a new statement
+        first = runner.submit_upload(data, 'march.csv')
+        assert runner.submit_upload(data, 'copy of march.csv') == first == upload_statement_id(data)
+    finally:
+        runner.shutdown()
+
+
+def test_roi_ranking_skips_cards_with_unreadable_multipliers(tmp_path):
+    from ai_engine.card_catalog import CardCatalog
+    from ai_engine.query_engine import _roi_ranking
+
+    path = write_card_catalog(str(tmp_path / 'cards.db'), 12)
+    with sqlite3.connect(path) as conn:
+        broken = conn.execute("SELECT bank_name || ' ' || card_name FROM credit_cards ORDER BY id LIMIT 1").fetchone()[0]
+        conn.execute("UPDATE credit_cards SET multipliers_json = '{not json' WHERE id = (SELECT MIN(id) FROM credit_cards)")
+    ranked = [card.display_name for _, card in _roi_ranking(CardCatalog(path), 'dining')]
+    assert broken not in ranked
+    assert len(ranked) == 11
+
+
+def test_server_reports_unreadable_upload_with_the_parser_error(tmp_path):
+    from server import HTTPError, OptimizerService
+
+    service = OptimizerService(workers=1, db_path=write_card_catalog(str(tmp_path / 'cards.db'), 5),
+                               upload_dir=str(tmp_path / 'uploads'), results_db=str(tmp_path / 'results.db'))
+    service.start_pool()
+    try:
+        with pytest.raises(HTTPError) as error:
+            asyncio.run(service.upload({'filename': ['corrupt.csv']}, b'not,a\nstatement,file\n'))
+    finally:
+        service.close()
+    assert error.value.status == 422
+    assert error.value.message.startswith("Could not read this statement: ")
+
+
+@pytest.mark.parametrize('k', ['0', '-3', 'two'])
+def test_wallet_rejects_bad_k(k):
+    from server import HTTPError, OptimizerService
+
+    with pytest.raises(HTTPError) as error:
+        asyncio.run(OptimizerService(workers=1).wallet('any', {'k': [k]}, b''))
+    assert error.value.status == 400
+
+
+def test_full_wallet_earns_what_optimize_spends_saves(statement):
+    from ai_engine.card_catalog import DEFAULT_DB_PATH
+    from ai_engine.wallet_optimizer import optimize_wallet
+
+    # Live catalog: Axis Ace's swiggy / zomato keys are merchant boosts; fees off so every useful card is kept
+    cards_df = _read_cards(DEFAULT_DB_PATH).assign(renewal_fee=0, joining_fee=0)
+    wallet = optimize_wallet(statement, cards_df, k=len(cards_df), annualize=False)
+    _, total = optimize_spends(statement, cards_df)
+    assert wallet['optimal']
+    assert wallet['gross_rewards'] == pytest.approx(total, rel=1e-9)
+    assert any('(' in c for c in wallet['routed_spend']['Categories'])  # merchant classes routed on their own
+
+
+def test_catalog_refresh_publishes_a_new_snapshot(tmp_path):
+    from ai_engine.card_catalog import get_card_catalog
+
+    path = write_card_catalog(str(tmp_path / 'cards.db'), 6)
+    old = get_card_catalog(path)
+    assert get_card_catalog(path) is old  # unchanged DB: same snapshot
+    names = list(old.display_names)
+
+    with sqlite3.connect(path) as conn:
+        conn.execute("DELETE FROM credit_cards WHERE id = (SELECT MIN(id) FROM credit_cards)")
+    new = get_card_catalog(path)
+    assert new is not old and new.version == old.version + 1
+    assert len(new) == len(new.display_names) == len(new.spend_units) == 5
+    # A reader still holding the old snapshot sees it whole
+    assert old.display_names == names and len(old.records) == len(old.spend_units) == 6
@@ -0,0 +1,75 @@
+"""
+Layout templates: the header row fixes the column boundaries, and every word
+is read from the column its x-centre falls in.
+"""
+import pytest
+
+from parsers.pdf_layout import column_role, detect_layout, header_cells, page_lines, parse_amount
+
+HEIGHT = 8.0
+
+
+def _line(y, *cells):
+    """cells: (text, x0) pairs; each word is 5pt wide per character."""
+    words = []
+    for text, x0 in cells:
+        for word in text.split():
+            words.append((word, x0, x0 + 5 * len(word), HEIGHT))
+            x0 += 5 * len(word) + 2  # closer than a space: same header cell
+    return (y, words)
+
+
+HEADER = _line(100, ('Txn Date', 20), ('Value Date', 80), ('Narration', 150), ('Withdrawal Amt', 320),
+               ('Deposit Amt', 420), ('Closing Balance', 500))
+
+
+@pytest.mark.parametrize('text, role', [
+    ('Txn Date', 'date'), ('Value Date', 'value_date'), ('NARRATION', 'description'), ('Withdrawal Amt.', 'debit'),
+    ('Dr', 'debit'), ('Chq./Ref.No.', 'reference'), ('Closing Balance', 'balance'), ('Amount', None),
+])
+def test_column_roles_use_the_longest_alias(text, role):
+    assert column_role(text) == role
+
+
+def test_header_words_merge_into_cells():
+    assert [text for text, _, _ in header_cells(HEADER[1])] == [
+        'Txn Date', 'Value Date', 'Narration', 'Withdrawal Amt', 'Deposit Amt', 'Closing Balance']
+
+
+def test_detect_layout_finds_the_header_below_page_furniture():
+    layout = detect_layout([_line(40, ('HDFC BANK', 20), ('Statement of account', 200)), HEADER], 600)
+    assert layout.roles == ['date', 'value_date', 'description', 'debit', 'credit', 'balance']
+    assert layout.boundaries == sorted(layout.boundaries)
+    # Same header on the same page size -> same fingerprint
+    assert detect_layout([HEADER], 600).fingerprint == layout.fingerprint
+    assert detect_layout([HEADER], 842).fingerprint != layout.fingerprint
+    assert detect_layout([_line(40, ('Date', 20), ('Narration', 150))], 600) is None
+
+
+def test_words_are_read_from_their_column():
+    layout = detect_layout([HEADER], 600)
+    lines = [
+        HEADER,
+        _line(120, ('01/07/2025', 20), ('01/07/2025', 80), ('UPI-SWIGGY', 150), ('1,250.50', 330),
+              ('48,749.50', 505)),
+        # A wrapped narration word drifting into the debit column, plus a Dr marker
+        _line(132, ('02/07/2025', 20), ('AMAZON PAY', 150), ('INDIA', 310), ('99.00', 335), ('Dr', 380)),
+        # A credit: nothing in the debit column
+        _line(144, ('03/07/2025', 20), ('SALARY', 150), ('50,000.00', 425), ('98,650.50', 505)),
+        _line(156, ('Total', 20), ('1,349.50', 330)),
+    ]
+    assert layout.split_line(lines[2][1]) == [['02/07/2025'], [], ['AMAZON', 'PAY', 'INDIA'], ['99.00'], [], []]
+    assert layout.parse_lines(lines) == [
+        {'date': '01/07/2025', 'description': 'UPI-SWIGGY', 'amount': 1250.5, 'type': 'Debit'},
+        {'date': '02/07/2025', 'description': 'AMAZON PAY INDIA', 'amount': 99.0, 'type': 'Debit'},
+    ]
+
+
+def test_page_lines_bucket_chars_into_words():
+    # (char, x0, x1, top, bottom); the second line sits 1pt lower but is the same row
+    chars = [(c, 10 + 5 * i, 15 + 5 * i, 50.0, 58.0) for i, c in enumerate('AB CD')]
+    chars += [(c, 100 + 5 * i, 105 + 5 * i, 51.0, 59.0) for i, c in enumerate('1o.d0')]
+    (_, words), = page_lines(chars)
+    assert [w[0] for w in words] == ['AB', 'CD', '1o.d0']
+    assert parse_amount([words[-1][0]]) == 10.0
+    assert parse_amount(['-']) is None
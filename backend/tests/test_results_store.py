@@ -0,0 +1,52 @@
+"""
+ResultsStore round trip: savings are stored exactly and only rounded on the
+way out, so aggregates and rankings match the full-precision result.
+"""
+import pandas as pd
+import pytest
+
+from ai_engine.results_store import ResultsStore
+
+
+def _statement(descriptions, categories, amounts, cards, saved):
+    transactions = pd.DataFrame({'date': ['01/01/2025'] * len(amounts), 'description': descriptions,
+                                 'category': categories, 'amount': amounts})
+    return transactions, pd.DataFrame({'card': cards, 'saved_inr': saved})
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = ResultsStore(str(tmp_path / 'results.db'))
+    yield store
+    store.close()
+
+
+def test_aggregates_use_full_precision_savings(store):
+    saved = [0.004, 0.004, 0.004, 1.001, 1.004]
+    transactions, result = _statement(['CAFE A', 'CAFE B', 'CAFE C', 'FLIGHT', 'HOTEL'],
+                                      ['Dining', 'Dining', 'Dining', 'Travel', 'Travel'],
+                                      [10.0, 10.0, 10.0, 100.333, 100.333], ['A', 'A', 'A', 'B', 'B'], saved)
+    store.save_results('s1', transactions, result, sum(saved), user_id='u1')
+
+    summary = {row['Category']: row for row in store.category_summary('s1')}
+    # Rounding each row first would have summed to 0.0
+    assert summary['Dining']['Saved_INR'] == 0.01
+    assert summary['Travel'] == {'Category': 'Travel', 'Transactions': 2, 'Spend_INR': 200.67, 'Saved_INR': 2.0}
+    assert store.total_savings('s1') == pytest.approx(sum(saved), rel=1e-12)
+
+    top = store.top_savings(2, 's1')
+    # Both show as 1.0, but the exact values still decide the order
+    assert [(row['Description'], row['Saved_INR']) for row in top] == [('HOTEL...', 1.0), ('FLIGHT...', 1.0)]
+
+
+def test_user_aggregates_span_statements_and_resaves_replace(store):
+    for statement_id, saved in (('s1', [0.006]), ('s2', [0.006]), ('s2', [0.007])):
+        transactions, result = _statement(['CAFE'], ['Dining'], [50.0], ['A'], saved)
+        store.save_results(statement_id, transactions, result, sum(saved), user_id='u1')
+
+    assert store.category_summary(user_id='u1') == [
+        {'Category': 'Dining', 'Transactions': 2, 'Spend_INR': 100.0, 'Saved_INR': 0.01}]
+    assert store.total_savings(user_id='u1') == pytest.approx(0.013)
+    store.delete_statement('s2')
+    assert not store.has_statement('s2')
+    assert store.total_savings(user_id='u1') == pytest.approx(0.006)
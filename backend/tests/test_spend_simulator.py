@@ -0,0 +1,54 @@
+"""
+simulate_statement: 'best' routing picks the same card optimize_spends does,
+and rows it can't attribute to a user are refused.
+"""
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from ai_engine.chat_agent import optimize_spends
+from ai_engine.spend_simulator import simulate_statement
+
+
+def _cards():
+    # 1 x 0.3 and 3 x 0.1 are the same rate, apart from float noise in the second
+    return pd.DataFrame({
+        'bank_name': ['Axis', 'HDFC'], 'card_name': ['Flat', 'Triple'],
+        'renewal_fee': [0.0, 0.0], 'waiver_spend_limit': [0.0, 0.0],
+        'spends_per_reward_unit': [100.0, 100.0], 'unified_reward_value_inr': [0.3, 0.1],
+        'multipliers_json': [json.dumps({'dining': 1.0}), json.dumps({'dining': 3.0})],
+    })
+
+
+def _transactions(users=None):
+    df = pd.DataFrame({'date': ['01/01/2025', '02/01/2025', '03/01/2025'],
+                       'description': ['CAFE', 'CAFE', 'CAFE'],
+                       'category': ['Dining'] * 3, 'amount': [100.0, 250.0, 80.0]})
+    if users is not None:
+        df['user'] = users
+    return df
+
+
+def test_best_routing_breaks_float_ties_like_optimize_spends():
+    cards = _cards()
+    rates = np.array([0.3 / 100, 3.0 * 0.1 / 100])
+    assert rates[1] > rates[0]  # a plain argmax would pick the second card
+
+    summary, _ = simulate_statement(_transactions(), cards, routing='best')
+    optimized, _ = optimize_spends(_transactions(), cards)
+    assert set(optimized['Recommended_Card']) == {'Axis Flat'}
+    # Routed summaries only list the cards that carried spend
+    assert summary[['Card', 'Spend_INR']].values.tolist() == [['Axis Flat', 430.0]]
+
+
+def test_rows_without_a_user_are_rejected():
+    with pytest.raises(ValueError, match="no 'user'"):
+        simulate_statement(_transactions(['a', None, 'b']), _cards(), routing='best', user_col='user')
+
+
+def test_users_are_simulated_separately():
+    summary, _ = simulate_statement(_transactions(['a', 'b', 'a']), _cards(), routing='best', user_col='user')
+    spend = summary[summary['Card'] == 'Axis Flat'].set_index('User')['Spend_INR']
+    assert spend.to_dict() == {'a': 180.0, 'b': 250.0}
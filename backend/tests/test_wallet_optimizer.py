@@ -0,0 +1,76 @@
+"""
+optimize_wallet: branch-and-bound finds the wallet a brute-force search over
+every card combination would, and fees are only charged when not waived.
+"""
+import itertools
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from ai_engine.card_catalog import CardCatalog
+from ai_engine.categorizer import run_ai_categorization
+from ai_engine.reward_engine import build_reward_matrix, get_multiplier_index
+from ai_engine.wallet_optimizer import category_spend, fee_arrays, optimize_wallet
+from benchmarks.generators import write_card_catalog, write_statement
+
+
+def _brute_force_net(transactions_df, cards, k):
+    """Best net over every wallet of at most k cards, each spend class on the wallet's best card for it."""
+    spend, categories, merchants, _ = category_spend(transactions_df, cards, annualize=True)
+    rates = build_reward_matrix(cards, categories, merchants, index=get_multiplier_index(cards))['rates']
+    fees, limits = fee_arrays(cards)
+    best = 0.0
+    for size in range(1, k + 1):
+        for wallet in itertools.combinations(range(rates.shape[1]), size):
+            value = spend[:, None] * rates[:, wallet]
+            route = value.argmax(axis=1)
+            routed = np.bincount(route, weights=spend, minlength=size)
+            paid = sum(fees[j] for slot, j in enumerate(wallet) if not (limits[j] > 0 and routed[slot] >= limits[j]))
+            best = max(best, value.max(axis=1).sum() - paid)
+    return best
+
+
+@pytest.mark.parametrize('k', [1, 2, 3])
+def test_branch_and_bound_matches_brute_force(tmp_path, k):
+    transactions = run_ai_categorization(write_statement(str(tmp_path / 'statement.csv'), 300, seed=5))
+    cards = CardCatalog(write_card_catalog(str(tmp_path / 'cards.db'), 14, seed=3))
+
+    result = optimize_wallet(transactions, cards, k=k)
+    assert result['optimal']
+    assert len(result['wallet']) <= k
+    assert result['net_savings'] == pytest.approx(_brute_force_net(transactions, cards, k), rel=1e-9, abs=1e-9)
+    assert result['net_savings'] == pytest.approx(result['gross_rewards'] - result['fees_paid'])
+
+
+def _fee_cards(waiver_limit):
+    return pd.DataFrame({
+        'bank_name': ['Axis', 'HDFC'], 'card_name': ['Free', 'Premium'],
+        'joining_fee': [0.0, 1000.0], 'renewal_fee': [0.0, 500.0], 'waiver_spend_limit': [0.0, waiver_limit],
+        'spends_per_reward_unit': [100.0, 100.0], 'unified_reward_value_inr': [1.0, 1.0],
+        'multipliers_json': [json.dumps({}), json.dumps({'dining': 3.0})],
+    })
+
+
+def _dining(amount):
+    return pd.DataFrame({'date': ['01/01/2025'], 'description': ['CAFE'], 'category': ['Dining'], 'amount': [amount]})
+
+
+@pytest.mark.parametrize('waiver_limit, wallet, fees_paid', [
+    (0.0, ['Axis Free'], 0.0),                # 3% on 20,000 = 600 - 500 fee loses to 1% for free
+    (20000.0, ['HDFC Premium'], 0.0),         # the routed spend waives the fee
+    (20000.01, ['Axis Free'], 0.0),           # one paisa short of the waiver
+])
+def test_fees_are_charged_unless_the_routed_spend_waives_them(waiver_limit, wallet, fees_paid):
+    result = optimize_wallet(_dining(20000.0), _fee_cards(waiver_limit), k=1, annualize=False)
+    assert result['wallet'] == wallet
+    assert result['fees_paid'] == fees_paid
+
+
+def test_first_year_uses_the_joining_fee():
+    cards = _fee_cards(0.0).assign(multipliers_json=[json.dumps({}), json.dumps({'dining': 10.0})])
+    renewal = optimize_wallet(_dining(20000.0), cards, k=1, annualize=False)
+    first_year = optimize_wallet(_dining(20000.0), cards, k=1, annualize=False, first_year=True)
+    assert renewal['net_savings'] == pytest.approx(2000.0 - 500.0)
+    assert first_year['net_savings'] == pytest.approx(2000.0 - 1000.0)